@@ -0,0 +1,486 @@
+"""Batch edits to combatant cards, authorizations, warrants and waivers.
+
+A batch is a list of operations, each naming a combatant by UUID:
+
+    add_authorization / remove_authorization: discipline, authorization
+    add_warrant / remove_warrant: discipline, marshal
+    set_card_date: discipline, date_issued
+    set_waiver_date: date_signed
+
+The whole batch is permission-checked up front (once per discipline), then
+applied in a single transaction with bulk inserts, updates and deletes.
+Reminders are regenerated once for each card or waiver whose dates changed.
+"""
+
+import logging
+
+from cards.api.permissions import (
+    CardDatePermission,
+    CombatantAuthorizationPermission,
+    CombatantMarshalPermission,
+    WaiverDatePermission,
+)
+from cards.models import (
+    Authorization,
+    Card,
+    Combatant,
+    CombatantAuthorization,
+    CombatantWarrant,
+    Discipline,
+    Marshal,
+    Reminder,
+    Waiver,
+)
+from cards.models.user_permission import UserPermission
+from cards.utility.marshal_roster import invalidate_roster
+from cards.utility.roster_snapshot import record_combatant_changes
+from cards.utility.time import today
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count
+from rest_framework import serializers, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+logger = logging.getLogger("cards")
+
+MAX_OPERATIONS = 500
+
+# Operation name => (permission, field naming the thing being changed)
+DISCIPLINE_OPERATIONS = {
+    "add_authorization": (
+        CombatantAuthorizationPermission.WRITE_PERMISSION,
+        "authorization",
+    ),
+    "remove_authorization": (
+        CombatantAuthorizationPermission.WRITE_PERMISSION,
+        "authorization",
+    ),
+    "add_warrant": (CombatantMarshalPermission.WRITE_PERMISSION, "marshal"),
+    "remove_warrant": (CombatantMarshalPermission.WRITE_PERMISSION, "marshal"),
+    "set_card_date": (CardDatePermission.WRITE_PERMISSION, "date_issued"),
+}
+WAIVER_OPERATIONS = {"set_waiver_date": "date_signed"}
+
+
+class BatchError(Exception):
+    """A batch can't be applied. Carries the response to send instead."""
+
+    def __init__(self, detail, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    """Serializer for one operation in a batch"""
+
+    op = serializers.ChoiceField(
+        choices=list(DISCIPLINE_OPERATIONS) + list(WAIVER_OPERATIONS)
+    )
+    combatant_uuid = serializers.UUIDField()
+    discipline = serializers.SlugField(required=False)
+    authorization = serializers.SlugField(required=False)
+    marshal = serializers.SlugField(required=False)
+    date_issued = serializers.DateField(required=False)
+    date_signed = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        op = attrs["op"]
+        if op in DISCIPLINE_OPERATIONS:
+            required = ["discipline", DISCIPLINE_OPERATIONS[op][1]]
+        else:
+            required = [WAIVER_OPERATIONS[op]]
+
+        missing = [field for field in required if not attrs.get(field)]
+        if missing:
+            raise serializers.ValidationError(f"{op} requires {', '.join(missing)}")
+        return attrs
+
+    def create(self, validated_data):
+        raise NotImplementedError("This serializer is read-only")
+
+    def update(self, instance, validated_data):
+        raise NotImplementedError("This serializer is read-only")
+
+
+class BatchSerializer(serializers.Serializer):
+    """Serializer for a batch of operations"""
+
+    operations = BatchOperationSerializer(many=True, allow_empty=False)
+
+    def validate_operations(self, value):
+        if len(value) > MAX_OPERATIONS:
+            raise serializers.ValidationError(
+                f"A batch may contain at most {MAX_OPERATIONS} operations"
+            )
+        return value
+
+    def create(self, validated_data):
+        raise NotImplementedError("This serializer is read-only")
+
+    def update(self, instance, validated_data):
+        raise NotImplementedError("This serializer is read-only")
+
+
+class CombatantBatchView(APIView):
+    """
+    API endpoint to apply a batch of card, authorization, warrant and waiver
+    changes in one transaction
+    """
+
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [JSONRenderer]
+
+    def post(self, request):
+        """
+        POST data:
+            operations - A list of operations (see module docstring)
+
+        Returns:
+            A list of results in the same order as the operations. Adds
+            carry the uuid of the CombatantAuthorization or CombatantWarrant.
+        """
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        operations = serializer.validated_data["operations"]
+
+        try:
+            batch = Batch(operations)
+            batch.check_permissions(request.user)
+            with transaction.atomic():
+                results = batch.apply()
+        except BatchError as exc:
+            return Response({"detail": exc.detail}, status=exc.status_code)
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class Batch:
+    """Resolve and apply a validated list of batch operations"""
+
+    def __init__(self, operations):
+        self.operations = operations
+        self.new_card_ids = set()
+
+        uuids = {op["combatant_uuid"] for op in operations}
+        self.combatants = {
+            combatant.uuid: combatant
+            for combatant in Combatant.objects.filter(uuid__in=uuids)
+        }
+        unknown = uuids - set(self.combatants)
+        if unknown:
+            raise BatchError(
+                f"Unknown combatants: {', '.join(sorted(map(str, unknown)))}",
+                status.HTTP_404_NOT_FOUND,
+            )
+
+        slugs = {op["discipline"] for op in operations if op.get("discipline")}
+        self.disciplines = {
+            discipline.slug: discipline
+            for discipline in Discipline.objects.filter(slug__in=slugs)
+        }
+        unknown = slugs - set(self.disciplines)
+        if unknown:
+            raise BatchError(
+                f"Unknown disciplines: {', '.join(sorted(unknown))}",
+                status.HTTP_404_NOT_FOUND,
+            )
+
+        self.authorizations = self._lookup(Authorization, "authorization")
+        self.marshals = self._lookup(Marshal, "marshal")
+
+    def _lookup(self, model, field):
+        """Map (discipline_id, slug) to model instances named in operations"""
+        wanted = {
+            (self.disciplines[op["discipline"]].id, op[field])
+            for op in self.operations
+            if op.get(field) and op["op"] in DISCIPLINE_OPERATIONS
+        }
+        if not wanted:
+            return {}
+
+        found = {
+            (instance.discipline_id, instance.slug): instance
+            for instance in model.objects.filter(
+                discipline_id__in={discipline_id for discipline_id, _ in wanted},
+                slug__in={slug for _, slug in wanted},
+            )
+        }
+        unknown = wanted - set(found)
+        if unknown:
+            raise BatchError(
+                f"Unknown {field}s: {', '.join(sorted(slug for _, slug in unknown))}",
+                status.HTTP_404_NOT_FOUND,
+            )
+        return found
+
+    def check_permissions(self, user):
+        """Check every permission the batch needs, once per discipline
+
+        Raises:
+            BatchError: 403 naming everything the user may not do
+        """
+        needed = {
+            (DISCIPLINE_OPERATIONS[op["op"]][0], op["discipline"])
+            for op in self.operations
+            if op["op"] in DISCIPLINE_OPERATIONS
+        }
+        granted = UserPermission.user_discipline_permissions(
+            user,
+            list({permission for permission, _ in needed}),
+            list(self.disciplines.values()),
+        )
+        denied = sorted(
+            f"{permission} ({slug})"
+            for permission, slug in needed
+            if not granted[self.disciplines[slug].id][permission]
+        )
+
+        if any(op["op"] in WAIVER_OPERATIONS for op in self.operations):
+            if not UserPermission.user_has_permission(
+                user, WaiverDatePermission.WRITE_PERMISSION
+            ):
+                denied.append(WaiverDatePermission.WRITE_PERMISSION)
+
+        if denied:
+            raise BatchError(
+                f"Permission denied: {', '.join(denied)}", status.HTTP_403_FORBIDDEN
+            )
+
+    def apply(self):
+        """Apply the batch. Call inside a transaction."""
+        cards = self._cards()
+        dated_cards = self._card_dates(cards)
+        auth_results, removed_auths = self._sync(
+            cards,
+            CombatantAuthorization,
+            "authorization",
+            self.authorizations,
+            "add_authorization",
+            "remove_authorization",
+        )
+        warrant_results, removed_warrants = self._sync(
+            cards,
+            CombatantWarrant,
+            "marshal",
+            self.marshals,
+            "add_warrant",
+            "remove_warrant",
+        )
+        deleted_cards = self._delete_empty_cards(removed_auths | removed_warrants)
+        waivers = self._waivers()
+
+        reminder_targets = [
+            card for card in dated_cards if card.id not in deleted_cards
+        ] + waivers
+        Reminder.bulk_create_or_update_reminders(reminder_targets)
+        if deleted_cards:
+            Reminder.objects.filter(
+                content_type=ContentType.objects.get_for_model(Card),
+                object_id__in=deleted_cards,
+            ).delete()
+
+        if dated_cards or warrant_results or removed_warrants or deleted_cards:
+            invalidate_roster()
+        record_combatant_changes(combatant.id for combatant in self.combatants.values())
+
+        results = []
+        for index, op in enumerate(self.operations):
+            result = {"op": op["op"]}
+            result.update(auth_results.get(index, {}))
+            result.update(warrant_results.get(index, {}))
+            results.append(result)
+        return results
+
+    def _card_key(self, op):
+        combatant = self.combatants[op["combatant_uuid"]]
+        return (combatant.id, self.disciplines[op["discipline"]].id)
+
+    def _cards(self):
+        """Fetch the cards the batch touches, creating any that adds need"""
+        keys = {
+            self._card_key(op)
+            for op in self.operations
+            if op["op"] in DISCIPLINE_OPERATIONS
+        }
+        cards = self._fetch_cards(keys)
+
+        new_keys = {
+            self._card_key(op)
+            for op in self.operations
+            if op["op"] in ("add_authorization", "add_warrant", "set_card_date")
+        } - set(cards)
+
+        if new_keys:
+            logger.debug("Batch creating %s cards", len(new_keys))
+            Card.objects.bulk_create(
+                Card(
+                    combatant_id=combatant_id,
+                    discipline_id=discipline_id,
+                    date_issued=today(),
+                )
+                for combatant_id, discipline_id in new_keys
+            )
+            # MySQL doesn't return primary keys from bulk_create
+            new_cards = self._fetch_cards(new_keys)
+            self.new_card_ids = {card.id for card in new_cards.values()}
+            cards.update(new_cards)
+
+        return cards
+
+    @staticmethod
+    def _fetch_cards(keys):
+        """Fetch cards by (combatant_id, discipline_id)"""
+        if not keys:
+            return {}
+
+        return {
+            (card.combatant_id, card.discipline_id): card
+            for card in Card.objects.filter(
+                combatant_id__in={combatant_id for combatant_id, _ in keys},
+                discipline_id__in={discipline_id for _, discipline_id in keys},
+            )
+            if (card.combatant_id, card.discipline_id) in keys
+        }
+
+    def _card_dates(self, cards):
+        """Apply card date changes. Returns every card whose date is new."""
+        changed = {}
+        for op in self.operations:
+            if op["op"] == "set_card_date":
+                card = cards[self._card_key(op)]
+                if card.date_issued != op["date_issued"]:
+                    card.date_issued = op["date_issued"]
+                    changed[card.id] = card
+
+        if changed:
+            Card.objects.bulk_update(changed.values(), ["date_issued"])
+
+        changed.update(
+            {card.id: card for card in cards.values() if card.id in self.new_card_ids}
+        )
+        return list(changed.values())
+
+    def _sync(self, cards, model, field, targets, add_op, remove_op):
+        """Apply adds and removes of one kind of card relation
+
+        Returns:
+            A dict of operation index to result, and the set of card ids
+            that lost a relation, including ones added and removed again in
+            this batch
+        """
+        touched = [
+            (index, op)
+            for index, op in enumerate(self.operations)
+            if op["op"] in (add_op, remove_op)
+        ]
+        if not touched:
+            return {}, set()
+
+        card_ids = {
+            cards[self._card_key(op)].id
+            for _, op in touched
+            if self._card_key(op) in cards
+        }
+        existing = {
+            (row.card_id, getattr(row, f"{field}_id")): row
+            for row in model.objects.filter(card_id__in=card_ids)
+        }
+
+        results = {}
+        to_create = {}
+        to_delete = {}
+        cancelled = set()
+        for index, op in touched:
+            card = cards.get(self._card_key(op))
+            target = targets[(self.disciplines[op["discipline"]].id, op[field])]
+            key = (card.id if card else None, target.id)
+
+            if op["op"] == add_op:
+                to_delete.pop(key, None)
+                row = existing.get(key) or to_create.get(key)
+                if row is None:
+                    row = model(card=card, **{field: target})
+                    to_create[key] = row
+                results[index] = row
+            elif key in existing or key in to_create:
+                if to_create.pop(key, None) is not None:
+                    # A card made for this add may now be empty
+                    cancelled.add(card.id)
+                if key in existing:
+                    to_delete[key] = existing[key]
+
+        if to_create:
+            model.objects.bulk_create(to_create.values())
+        if to_delete:
+            model.objects.filter(id__in=[row.id for row in to_delete.values()]).delete()
+
+        logger.debug(
+            "Batch added %s and removed %s %s records",
+            len(to_create),
+            len(to_delete),
+            field,
+        )
+        return (
+            {index: {"uuid": str(row.uuid)} for index, row in results.items()},
+            {card_id for card_id, _ in to_delete} | cancelled,
+        )
+
+    def _delete_empty_cards(self, card_ids):
+        """Delete cards left with no authorizations or warrants"""
+        if not card_ids:
+            return set()
+
+        empty = set(
+            Card.objects.filter(id__in=card_ids)
+            .annotate(
+                auth_count=Count("authorizations", distinct=True),
+                warrant_count=Count("warrants", distinct=True),
+            )
+            .filter(auth_count=0, warrant_count=0)
+            .values_list("id", flat=True)
+        )
+        if empty:
+            logger.debug("Batch removing %s empty cards", len(empty))
+            Card.objects.filter(id__in=empty).delete()
+        return empty
+
+    def _waivers(self):
+        """Apply waiver date changes. Returns the waivers that changed."""
+        dates = {
+            self.combatants[op["combatant_uuid"]].id: op["date_signed"]
+            for op in self.operations
+            if op["op"] in WAIVER_OPERATIONS
+        }
+        if not dates:
+            return []
+
+        waivers = {
+            waiver.combatant_id: waiver
+            for waiver in Waiver.objects.filter(combatant_id__in=dates)
+        }
+        changed = []
+        for combatant_id, date_signed in dates.items():
+            waiver = waivers.get(combatant_id)
+            if waiver is not None and waiver.date_signed != date_signed:
+                waiver.date_signed = date_signed
+                changed.append(waiver)
+
+        if changed:
+            Waiver.objects.bulk_update(changed, ["date_signed"])
+
+        new_ids = [
+            combatant_id for combatant_id in dates if combatant_id not in waivers
+        ]
+        if new_ids:
+            Waiver.objects.bulk_create(
+                Waiver(combatant_id=combatant_id, date_signed=dates[combatant_id])
+                for combatant_id in new_ids
+            )
+            # MySQL doesn't return primary keys from bulk_create
+            changed.extend(Waiver.objects.filter(combatant_id__in=new_ids))
+
+        return changed
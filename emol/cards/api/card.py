@@ -11,6 +11,7 @@ from rest_framework import serializers, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
 
 logger = logging.getLogger("cards")
@@ -124,3 +125,63 @@ class CardDateViewSet(GenericViewSet):
         )
 
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class CardRenewalSerializer(serializers.Serializer):
+    """Serializer for bulk card renewals"""
+
+    discipline_slug = serializers.CharField()
+    combatant_uuids = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False, max_length=1000
+    )
+    date_issued = serializers.DateField(required=False)
+
+    # We never try to save anything but in case we do someday, we have not
+    # implemented these methods.
+    def create(self, validated_data):
+        raise NotImplementedError("This serializer is read-only")
+
+    def update(self, instance, validated_data):
+        raise NotImplementedError("This serializer is read-only")
+
+
+class CardRenewalView(APIView):
+    """
+    API endpoint to renew many combatants' cards in one discipline
+    """
+
+    permission_classes = [CardDatePermission]
+    renderer_classes = [JSONRenderer]
+
+    def post(self, request):
+        """
+        POST data:
+            discipline_slug - The discipline whose cards to renew
+            combatant_uuids - The combatants to renew
+            date_issued - The new card date, default today
+
+        Returns:
+            renewed - How many cards were renewed
+            not_found - UUIDs of combatants with no card in the discipline
+        """
+        serializer = CardRenewalSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        discipline = get_object_or_404(
+            Discipline, slug=serializer.validated_data["discipline_slug"]
+        )
+        combatant_uuids = set(serializer.validated_data["combatant_uuids"])
+
+        renewed = Card.bulk_renew(
+            discipline,
+            combatant_uuids,
+            serializer.validated_data.get("date_issued"),
+        )
+
+        return Response(
+            {
+                "renewed": len(renewed),
+                "not_found": sorted(str(uuid) for uuid in combatant_uuids - renewed),
+            },
+            status=status.HTTP_200_OK,
+        )
@@ -0,0 +1,136 @@
+import logging
+
+from cards.utility.card_payload import (
+    PREFIX,
+    PayloadError,
+    card_status,
+    lookup_cards,
+    read_payload,
+)
+from query_budget.decorators import query_budget
+from rest_framework import serializers, status
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+logger = logging.getLogger("cards")
+
+MAX_LOOKUPS = 300
+
+
+class CardVerifySerializer(serializers.Serializer):
+    payload = serializers.CharField(max_length=2048, trim_whitespace=True)
+
+    # We never try to save anything but in case we do someday, we have not
+    # implemented these methods.
+    def create(self, validated_data):
+        raise NotImplementedError("This serializer is read-only")
+
+    def update(self, instance, validated_data):
+        raise NotImplementedError("This serializer is read-only")
+
+
+@query_budget(queries=10)
+class CardVerifyView(APIView):
+    """
+    API endpoint to verify the signed payload from a card's QR code
+    (see cards.utility.card_payload)
+
+    Open to anyone: a payload only verifies if we signed it, and the response
+    shows no more than the card it came from.
+    """
+
+    permission_classes = [AllowAny]
+    renderer_classes = [JSONRenderer]
+
+    def get(self, request):
+        """
+        Query parameters:
+            payload - The scanned QR payload
+
+        Returns:
+            The card's current status along with what was printed on it, 400
+            if the payload doesn't verify, or 404 if the card no longer exists
+        """
+        serializer = CardVerifySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            printed = read_payload(serializer.validated_data["payload"])
+        except PayloadError as exc:
+            return Response({"payload": [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+
+        current = card_status(printed["card_id"])
+        if current is None:
+            return Response(
+                {"detail": "Card not found", "printed": printed},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        return Response({**current, "printed": printed}, status=status.HTTP_200_OK)
+
+
+class CardLookupSerializer(serializers.Serializer):
+    cards = serializers.ListField(
+        child=serializers.CharField(max_length=2048, trim_whitespace=True),
+        allow_empty=False,
+        max_length=MAX_LOOKUPS,
+    )
+
+    # We never try to save anything but in case we do someday, we have not
+    # implemented these methods.
+    def create(self, validated_data):
+        raise NotImplementedError("This serializer is read-only")
+
+    def update(self, instance, validated_data):
+        raise NotImplementedError("This serializer is read-only")
+
+
+# The lookup runs a fixed number of queries however many cards are sent
+@query_budget(queries=10)
+class CardLookupView(APIView):
+    """
+    API endpoint to check a stack of cards at once, by card_id or scanned QR
+    payload
+    """
+
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [JSONRenderer]
+
+    def post(self, request):
+        """
+        Request body:
+            cards - Up to MAX_LOOKUPS card_ids or QR payloads, mixed as needed
+
+        Returns:
+            One result per entry, in order: the card's current status (see
+            cards.utility.card_payload.lookup_cards) with found set, found
+            false for an unknown card_id, or an error for a payload that
+            doesn't verify
+        """
+        serializer = CardLookupSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        entries = []
+        for value in serializer.validated_data["cards"]:
+            if not value.startswith(f"{PREFIX}."):
+                entries.append((value, None))
+                continue
+            try:
+                entries.append((read_payload(value)["card_id"], None))
+            except PayloadError as exc:
+                entries.append((None, str(exc)))
+
+        statuses = lookup_cards(card_id for card_id, _ in entries if card_id)
+
+        results = []
+        for card_id, error in entries:
+            if error:
+                results.append({"found": False, "error": error})
+            elif card_id in statuses:
+                results.append({"found": True, **statuses[card_id]})
+            else:
+                results.append({"found": False, "card_id": card_id})
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
@@ -2,6 +2,7 @@ import logging
 
 from cards.api.permissions import CombatantInfoPermission
 from cards.models import Combatant, Region
+from query_budget.decorators import query_budget
 from rest_framework import serializers
 from rest_framework.renderers import JSONRenderer
 from rest_framework.serializers import ModelSerializer
@@ -29,6 +30,7 @@ class CombatantListSerializer(ModelSerializer):
         return obj.has_pin
 
 
+@query_budget(queries=10)
 class CombatantListViewSet(ReadOnlyModelViewSet):
     """
     API endpoint for the combatant list view
@@ -67,6 +69,9 @@ class CombatantSerializer(ModelSerializer):
     def validate(self, attrs):
         """
         Validate that member_expiry requires member_number and province code exists.
+
+        Bulk callers can pass the active region codes in the serializer
+        context as region_codes to avoid a query per record.
         """
         if attrs.get("member_expiry") and not attrs.get("member_number"):
             raise serializers.ValidationError(
@@ -76,7 +81,11 @@ class CombatantSerializer(ModelSerializer):
         # Validate province code exists in Region table
         if attrs.get("province"):
             province_code = attrs["province"]
-            codes = Region.objects.filter(active=True).values_list("code", flat=True)
+            codes = self.context.get("region_codes")
+            if codes is None:
+                codes = Region.objects.filter(active=True).values_list(
+                    "code", flat=True
+                )
             if province_code not in codes:
                 raise serializers.ValidationError(
                     f"Province code '{province_code}' is not valid. "
@@ -0,0 +1,76 @@
+import json
+import logging
+
+from cards.api.card import CardSerializer
+from cards.api.combatant import CombatantSerializer
+from cards.api.permissions import CombatantInfoPermission, WaiverDatePermission
+from cards.api.waiver import WaiverSerializer
+from cards.models import Card, Combatant, CombatantAuthorization, CombatantWarrant
+from cards.models.user_permission import UserPermission
+from cards.utility.http_cache import make_etag
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.viewsets import GenericViewSet
+
+logger = logging.getLogger("cards")
+
+
+class CombatantBundleViewSet(GenericViewSet):
+    """
+    API endpoint returning everything the combatant detail modal needs:
+    the combatant, their waiver, and their cards with authorizations and
+    warrants, in a fixed number of queries.
+    """
+
+    permission_classes = [CombatantInfoPermission]
+    renderer_classes = [JSONRenderer]
+    lookup_field = "uuid"
+
+    def get_queryset(self):
+        cards = Card.objects.select_related("discipline").prefetch_related(
+            Prefetch(
+                "combatantauthorization_set",
+                queryset=CombatantAuthorization.objects.select_related("authorization"),
+            ),
+            Prefetch(
+                "combatantwarrant_set",
+                queryset=CombatantWarrant.objects.select_related("marshal"),
+            ),
+        )
+        return Combatant.objects.select_related("waiver").prefetch_related(
+            Prefetch("cards", queryset=cards)
+        )
+
+    def retrieve(self, request, uuid):
+        """
+        Handle GET requests
+
+        params:
+            uuid - A combatant's UUID
+        """
+        combatant = get_object_or_404(self.get_queryset(), uuid=uuid)
+
+        waiver = None
+        if UserPermission.user_has_permission(
+            request.user, WaiverDatePermission.WRITE_PERMISSION
+        ):
+            waiver = getattr(combatant, "waiver", None)
+
+        data = {
+            "combatant": CombatantSerializer(combatant).data,
+            "waiver": WaiverSerializer(waiver).data if waiver else None,
+            "cards": CardSerializer(combatant.cards.all(), many=True).data,
+        }
+
+        etag = make_etag(json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True))
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(data)
+
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
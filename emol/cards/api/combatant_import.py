@@ -0,0 +1,87 @@
+import csv
+import io
+import logging
+import os
+
+from cards.api.permissions import CombatantImportPermission
+from cards.utility.combatant_import import IMPORT_FORMATS, CombatantImporter, read_rows
+from rest_framework import serializers, status
+from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+logger = logging.getLogger("cards")
+
+
+class CombatantImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    format = serializers.ChoiceField(choices=IMPORT_FORMATS, required=False)
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if "format" not in attrs:
+            extension = os.path.splitext(attrs["file"].name)[1].lstrip(".").lower()
+            attrs["format"] = "json" if extension in ("json", "jsonl") else extension
+        if attrs["format"] not in IMPORT_FORMATS:
+            raise serializers.ValidationError(
+                {"format": f"Specify one of {', '.join(IMPORT_FORMATS)}"}
+            )
+        return attrs
+
+    # We never try to save anything but in case we do someday, we have not
+    # implemented these methods.
+    def create(self, validated_data):
+        raise NotImplementedError("This serializer is read-only")
+
+    def update(self, instance, validated_data):
+        raise NotImplementedError("This serializer is read-only")
+
+
+class CombatantImportView(APIView):
+    """
+    API endpoint for bulk importing combatants from a CSV or JSON upload.
+    """
+
+    permission_classes = [CombatantImportPermission]
+    parser_classes = [MultiPartParser]
+    renderer_classes = [JSONRenderer]
+
+    def post(self, request):
+        """
+        Import combatants.
+
+        POST data:
+            file - The CSV or JSON file (see cards.utility.combatant_import)
+            format - csv or json; defaults to the file extension
+            dry_run - Validate only, import nothing
+
+        Returns:
+            The import report: row count, rows imported, and per-row errors
+        """
+        serializer = CombatantImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data["file"]
+
+        importer = CombatantImporter(
+            allowed_disciplines=CombatantImportPermission.import_disciplines(
+                request.user
+            ),
+            dry_run=serializer.validated_data["dry_run"],
+        )
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        try:
+            report = importer.run(
+                read_rows(stream, serializer.validated_data["format"])
+            )
+        except (UnicodeDecodeError, ValueError, csv.Error) as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        logger.info(
+            "%s imported %s of %s combatants%s",
+            request.user,
+            report["imported"],
+            report["rows"],
+            " (dry run)" if report["dry_run"] else "",
+        )
+        return Response(report, status=status.HTTP_200_OK)
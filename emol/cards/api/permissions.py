@@ -1,5 +1,6 @@
 """Proxy UserPermission checks as DRF permissions"""
 
+from cards.models.discipline import Discipline
 from cards.models.user_permission import UserPermission
 from rest_framework import permissions
 
@@ -107,3 +108,32 @@ class InitiatePinResetPermission(permissions.BasePermission):
 
     def has_permission(self, request, view):
         return UserPermission.user_has_permission(request.user, self.PERMISSION)
+
+
+class CombatantImportPermission(permissions.BasePermission):
+    """Check if user can import combatants.
+
+    Importing creates combatants, so it needs write_combatant_info as well as
+    can_import. can_import is per discipline and also limits which
+    disciplines imported cards may be for; the view checks that per row.
+    """
+
+    PERMISSION = "can_import"
+
+    def has_permission(self, request, view):
+        return UserPermission.user_has_permission(
+            request.user, CombatantInfoPermission.WRITE_PERMISSION
+        ) and bool(self.import_disciplines(request.user))
+
+    @classmethod
+    def import_disciplines(cls, user):
+        """Slugs of the disciplines the user may import cards for"""
+        disciplines = list(Discipline.objects.all())
+        granted = UserPermission.user_discipline_permissions(
+            user, [cls.PERMISSION], disciplines
+        )
+        return [
+            discipline.slug
+            for discipline in disciplines
+            if granted[discipline.id][cls.PERMISSION]
+        ]
@@ -0,0 +1,87 @@
+import logging
+
+from cards.utility import signing
+from cards.utility.roster_snapshot import get_snapshot
+from cards.utility.time import today
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from query_budget.decorators import query_budget
+from rest_framework import serializers, status
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+logger = logging.getLogger("cards")
+
+
+class RosterSnapshotSerializer(serializers.Serializer):
+    since = serializers.IntegerField(required=False, min_value=0)
+
+    # We never try to save anything but in case we do someday, we have not
+    # implemented these methods.
+    def create(self, validated_data):
+        raise NotImplementedError("This serializer is read-only")
+
+    def update(self, instance, validated_data):
+        raise NotImplementedError("This serializer is read-only")
+
+
+@query_budget(queries=20)
+class RosterSnapshotView(APIView):
+    """
+    API endpoint for the signed offline roster snapshot
+    (see cards.utility.roster_snapshot)
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Query parameters:
+            since - The snapshot version the device already holds; omit for a
+                full snapshot
+
+        Returns:
+            The signed snapshot envelope. A full snapshot carries an ETag
+            naming its version and day, so an unchanged roster costs a 304
+            until the day changes and cards may have expired.
+        """
+        serializer = RosterSnapshotSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        since = serializer.validated_data.get("since")
+
+        day = today()
+        version, envelope = get_snapshot(since, day)
+
+        etag = f'"roster-{version}-{day.isoformat()}"'
+        response = None
+        if since is None:
+            response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(envelope, content_type="application/json")
+
+        response["ETag"] = etag
+        response["X-Roster-Version"] = str(version)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class SigningKeyView(APIView):
+    """
+    API endpoint publishing the public key that verifies roster snapshots
+    and card payloads offline
+    """
+
+    permission_classes = [AllowAny]
+    renderer_classes = [JSONRenderer]
+
+    def get(self, request):
+        return Response(
+            {
+                "kid": signing.key_id(),
+                "alg": signing.ALGORITHM,
+                "public_key": signing.b64encode(signing.public_key()),
+            },
+            status=status.HTTP_200_OK,
+        )
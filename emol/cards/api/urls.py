@@ -1,9 +1,14 @@
-from cards.api.card import CardDateViewSet, CardViewSet
+from cards.api.batch import CombatantBatchView
+from cards.api.card import CardDateViewSet, CardRenewalView, CardViewSet
+from cards.api.card_verify import CardLookupView, CardVerifyView
 from cards.api.combatant import CombatantListViewSet, CombatantViewSet
 from cards.api.combatant_authorization import CombatantAuthorizationViewSet
+from cards.api.combatant_bundle import CombatantBundleViewSet
+from cards.api.combatant_import import CombatantImportView
 from cards.api.combatant_warrant import CombatantWarrantViewSet
 from cards.api.pin import InitiatePinResetView
 from cards.api.privacy import ResendPrivacyView
+from cards.api.roster_snapshot import RosterSnapshotView, SigningKeyView
 from cards.api.waiver import WaiverViewSet
 from django.urls import include, path, re_path
 from rest_framework import routers
@@ -11,6 +16,9 @@ from rest_framework import routers
 api_router = routers.SimpleRouter()
 api_router.register(r"combatant-list", CombatantListViewSet, basename="combatant-list")
 api_router.register(r"combatant", CombatantViewSet, basename="combatant")
+api_router.register(
+    r"combatant-bundle", CombatantBundleViewSet, basename="combatant-bundle"
+)
 api_router.register(
     r"combatant-authorization/(?P<discipline>[-\w]+)",
     CombatantAuthorizationViewSet,
@@ -28,6 +36,19 @@ api_router.register(r"card-date", CardDateViewSet, basename="card-date")
 
 urlpatterns = [
     path("", include(api_router.urls)),
+    re_path(r"^batch/$", CombatantBatchView.as_view(), name="batch"),
+    re_path(
+        r"^combatant-import/$",
+        CombatantImportView.as_view(),
+        name="combatant-import",
+    ),
+    re_path(r"^card-renewal/$", CardRenewalView.as_view(), name="card-renewal"),
+    re_path(r"^card-verify/$", CardVerifyView.as_view(), name="card-verify"),
+    re_path(r"^card-lookup/$", CardLookupView.as_view(), name="card-lookup"),
+    re_path(
+        r"^roster-snapshot/$", RosterSnapshotView.as_view(), name="roster-snapshot"
+    ),
+    re_path(r"^signing-key/$", SigningKeyView.as_view(), name="signing-key"),
     re_path(r"^resend-privacy/$", ResendPrivacyView.as_view(), name="resend-privacy"),
     re_path(
         r"^initiate-pin-reset/$",
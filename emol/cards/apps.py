@@ -5,3 +5,9 @@ from django.apps import AppConfig
 class CardsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "cards"
+
+    def ready(self):
+        from cards.utility import marshal_roster, roster_snapshot
+
+        marshal_roster.connect_signals()
+        roster_snapshot.connect_signals()
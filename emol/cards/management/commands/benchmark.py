@@ -0,0 +1,268 @@
+"""Time the hot paths against the current database and report JSON.
+
+Run against a database filled by seed_scale, on the commit you want to
+measure, and keep the JSON to compare with runs on other commits. Each path
+is timed warm (caches primed by an untimed call first) and cold (the cache
+and ContentType cache cleared before every call). Views go through the test
+Client and so the full middleware stack; everything else is called directly.
+
+The whole run happens in a transaction that is rolled back, so the
+benchmark user, its permissions, the feature switch it turns on and the
+PIN checks it makes leave nothing behind. Permissions are enforced for the
+run whatever NO_ENFORCE_PERMISSIONS says, and query budgets are logged
+rather than raised.
+"""
+
+import json
+import math
+import subprocess
+import time
+from io import StringIO
+
+from cards.models import Combatant, Discipline, Permission, UserPermission
+from cards.utility.scale_seed import SEED_EMAIL_DOMAIN, seed_pin
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from feature_switches.helpers import clear_cache, is_enabled
+from feature_switches.models import ACCESS_MODE_GLOBAL, FeatureSwitch
+from query_budget.recorder import recording
+from sso_user.models import SSOUser
+
+BENCHMARK_USER = f"benchmark@{SEED_EMAIL_DOMAIN}"
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+def summarize(timings, queries):
+    """Summarize one set of runs
+
+    Args:
+        timings: Seconds taken by each run
+        queries: Queries made by each run
+
+    Returns:
+        A dict of latency percentiles in ms and query counts
+    """
+    summary = {"runs": len(timings)}
+    for pct in PERCENTILES:
+        summary[f"p{pct}_ms"] = round(percentile(timings, pct) * 1000, 3)
+    summary["max_ms"] = round(max(timings) * 1000, 3)
+    summary["mean_ms"] = round(sum(timings) / len(timings) * 1000, 3)
+    summary["queries"] = percentile(queries, 50)
+    summary["max_queries"] = max(queries)
+    return summary
+
+
+def client_host():
+    """A host the test Client can send that ALLOWED_HOSTS accepts"""
+    hosts = [h for h in settings.ALLOWED_HOSTS if h != "*" and not h.startswith(".")]
+    return (hosts or ["localhost"])[0]
+
+
+def git_commit():
+    """The checked out commit, if this is a git checkout"""
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=settings.BASE_DIR,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+class Command(BaseCommand):
+    """Benchmark hot paths"""
+
+    help = "Time hot paths against the current database and report JSON"
+
+    PATHS = [
+        "combatant_card",
+        "combatant_list_api",
+        "combatant_detail",
+        "send_reminders",
+        "summarize_expiries",
+        "reminder_hygiene",
+        "is_enabled",
+        "user_has_permission",
+        "pin_check",
+    ]
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Timed warm runs per path (default 20)",
+        )
+        parser.add_argument(
+            "--cold-iterations",
+            type=int,
+            default=5,
+            help="Timed cold runs per path (default 5)",
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            choices=self.PATHS,
+            dest="paths",
+            help="Only benchmark this path; may be repeated",
+        )
+        parser.add_argument(
+            "--output",
+            help="Also write the report to this file",
+        )
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1 or options["cold_iterations"] < 0:
+            raise CommandError("--iterations must be positive")
+
+        with override_settings(NO_ENFORCE_PERMISSIONS=False, QUERY_BUDGET_RAISE=False):
+            with transaction.atomic():
+                report = self.run_benchmarks(options)
+                transaction.set_rollback(True)
+
+        output = json.dumps(report, indent=2)
+        self.stdout.write(output)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as stream:
+                stream.write(output)
+
+    def run_benchmarks(self, options):
+        self.prepare()
+        paths = {}
+        for name in options["paths"] or self.PATHS:
+            run = getattr(self, f"run_{name}")
+            paths[name] = {"warm": self.time_warm(run, options["iterations"])}
+            if options["cold_iterations"]:
+                paths[name]["cold"] = self.time_cold(run, options["cold_iterations"])
+
+        return {
+            "commit": git_commit(),
+            "database": connection.vendor,
+            "combatants": Combatant.objects.count(),
+            "paths": paths,
+        }
+
+    def prepare(self):
+        """Pick the combatants to benchmark with and set up a staff user"""
+        seeded = Combatant.objects.filter(
+            email__endswith=f"@{SEED_EMAIL_DOMAIN}",
+            accepted_privacy_policy=True,
+            waiver__isnull=False,
+            cards__isnull=False,
+        ).order_by("email")
+
+        self.card_holder = seeded.filter(pin_hash__isnull=True).first()
+        self.pin_holder = seeded.filter(
+            pin_hash__isnull=False, pin_failed_attempts=0
+        ).first()
+        if self.card_holder is None or self.pin_holder is None:
+            raise CommandError("No seeded combatants to use; run seed_scale first")
+        number = int(self.pin_holder.email[len("combatant") :].split("@")[0])
+        self.pin = seed_pin(number)
+
+        FeatureSwitch.objects.update_or_create(
+            name="pin_authentication", defaults={"access_mode": ACCESS_MODE_GLOBAL}
+        )
+        clear_cache("pin_authentication")
+
+        self.discipline = Discipline.objects.order_by("id").first()
+        self.user, _ = SSOUser.objects.get_or_create(email=BENCHMARK_USER)
+        for permission in Permission.DEFAULT_PERMISSIONS:
+            Permission.objects.get_or_create(
+                slug=permission["slug"], defaults={**permission, "is_default": True}
+            )
+        for permission in Permission.objects.all():
+            disciplines = (
+                [None] if permission.is_global else Discipline.objects.order_by("id")
+            )
+            for discipline in disciplines:
+                UserPermission.objects.get_or_create(
+                    user=self.user, permission=permission, discipline=discipline
+                )
+
+        self.anonymous_client = Client(HTTP_HOST=client_host())
+        self.staff_client = Client(HTTP_HOST=client_host())
+        self.staff_client.force_login(self.user)
+
+    def clear_caches(self):
+        """Start a cold run: empty caches and drop anonymous cookies"""
+        cache.clear()
+        ContentType.objects.clear_cache()
+        self.anonymous_client.cookies.clear()
+
+    def measure(self, run):
+        with recording() as recorder:
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+        return elapsed, recorder.count
+
+    def time_warm(self, run, iterations):
+        run()
+        results = [self.measure(run) for _ in range(iterations)]
+        return summarize(*zip(*results))
+
+    def time_cold(self, run, iterations):
+        results = []
+        for _ in range(iterations):
+            self.clear_caches()
+            results.append(self.measure(run))
+        return summarize(*zip(*results))
+
+    def get(self, client, url, status=200, **kwargs):
+        response = client.get(url, **kwargs)
+        if response.status_code != status:
+            raise CommandError(f"GET {url} returned {response.status_code}")
+        return response
+
+    def run_combatant_card(self):
+        self.get(
+            self.anonymous_client,
+            reverse("combatant-card", args=[self.card_holder.card_id]),
+        )
+
+    def run_combatant_list_api(self):
+        self.get(self.staff_client, reverse("combatant-list-list"))
+
+    def run_combatant_detail(self):
+        self.get(self.staff_client, reverse("combatant-detail"))
+
+    def run_send_reminders(self):
+        call_command("send_reminders", "--dry-run", stdout=StringIO())
+
+    def run_summarize_expiries(self):
+        call_command("summarize_expiries", stdout=StringIO())
+
+    def run_reminder_hygiene(self):
+        call_command("reminder_hygiene", stdout=StringIO())
+
+    def run_is_enabled(self):
+        is_enabled("pin_authentication")
+
+    def run_user_has_permission(self):
+        UserPermission.user_has_permission(self.user, "read_combatant_info")
+        UserPermission.user_has_permission(
+            self.user, "write_card_date", self.discipline
+        )
+
+    def run_pin_check(self):
+        url = reverse("pin-verify", args=[self.pin_holder.card_id])
+        response = self.anonymous_client.post(url, {"pin": self.pin})
+        if response.status_code != 302:
+            raise CommandError(f"POST {url} returned {response.status_code}")
@@ -0,0 +1,62 @@
+"""Report how much of the card_id namespace has been used.
+
+Allocation walks a shuffled enumeration of the namespace, so the allocator
+cursor is a hard limit: once it reaches the end of the namespace no more
+card IDs can be issued until CARD_ID_FOURTH_TERM is enabled.
+"""
+
+from cards.models import CardIdAllocator, Combatant
+from cards.utility.names import namespace_size
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """Report card_id namespace utilisation."""
+
+    help = "Report card ID namespace utilisation and warn before it runs out."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--warn-at",
+            type=float,
+            default=75.0,
+            help="Utilisation percentage at which to warn (default: 75)",
+        )
+
+    def handle(self, *args, **options):
+        warn_at = options["warn_at"]
+        terms = CardIdAllocator.current_terms()
+        fourth_term = terms == 4
+        size = namespace_size(fourth_term)
+
+        allocator = CardIdAllocator.objects.filter(terms=terms).first()
+        cursor = allocator.next_index if allocator else 0
+        issued = Combatant.objects.filter(card_id__isnull=False).count()
+
+        # Only the cursor counts against this namespace: issued card IDs
+        # include older three-term names that were never part of it
+        used = cursor
+        utilisation = 100.0 * used / size
+
+        self.stdout.write("Card ID namespace: %s terms, %s names" % (terms, size))
+        self.stdout.write("Allocator position: %s" % cursor)
+        self.stdout.write("Card IDs issued: %s" % issued)
+        self.stdout.write("Remaining: %s" % max(size - used, 0))
+
+        message = "Utilisation: %.1f%%" % utilisation
+        if utilisation < warn_at:
+            self.stdout.write(self.style.SUCCESS(message))
+            return
+
+        self.stdout.write(self.style.WARNING(message))
+        if fourth_term:
+            self.stdout.write(
+                self.style.WARNING("The four-term namespace is the largest available")
+            )
+        else:
+            self.stdout.write(
+                self.style.WARNING(
+                    "Enable CARD_ID_FOURTH_TERM to expand the namespace to %s names"
+                    % namespace_size(fourth_term=True)
+                )
+            )
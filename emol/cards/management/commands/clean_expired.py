@@ -1,8 +1,9 @@
 import logging
 from datetime import date, timedelta
 
-from cards.models import OneTimeCode
+from cards.models import OneTimeCode, RosterChange
 from cards.utility.time import DATE_FORMAT
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 
@@ -123,3 +124,15 @@ class Command(BaseCommand):
                 consumed_count,
                 old_count,
             )
+
+        # Roster changes older than the retention window; devices with an
+        # older snapshot get a full one instead of a delta
+        retention_days = getattr(settings, "ROSTER_CHANGE_RETENTION_DAYS", 90)
+        pruned = RosterChange.prune(now - timedelta(days=retention_days))
+        if pruned:
+            logger.info(
+                "Purge old RosterChanges (%s): Removed %s older than %s days",
+                today_str,
+                pruned,
+                retention_days,
+            )
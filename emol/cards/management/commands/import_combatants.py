@@ -0,0 +1,81 @@
+"""Import combatants from a CSV or JSON file.
+
+See cards.utility.combatant_import for the row format. Rows that fail
+validation are reported and skipped; the rest are imported in chunks.
+Privacy policy emails are queued for the send_privacy_emails command.
+"""
+
+import csv
+import json
+import os
+import sys
+
+from cards.utility.combatant_import import IMPORT_FORMATS, CombatantImporter, read_rows
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """Bulk import combatants."""
+
+    help = "Import combatants, waivers and cards from a CSV or JSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="Path to the file to import, or - for stdin")
+        parser.add_argument(
+            "--format",
+            choices=IMPORT_FORMATS,
+            help="File format (default: from the file extension)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate every row but import nothing",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="Rows per transaction (default: COMBATANT_IMPORT_CHUNK_SIZE)",
+        )
+        parser.add_argument(
+            "--report",
+            help="Write the full JSON report to this path",
+        )
+
+    def handle(self, *args, **options):
+        path = options["file"]
+        file_format = options["format"]
+        if file_format is None:
+            extension = os.path.splitext(path)[1].lstrip(".").lower()
+            file_format = "json" if extension in ("json", "jsonl") else extension
+        if file_format not in IMPORT_FORMATS:
+            raise CommandError("Use --format to specify one of %s" % IMPORT_FORMATS)
+
+        importer = CombatantImporter(
+            dry_run=options["dry_run"], chunk_size=options["chunk_size"]
+        )
+
+        try:
+            if path == "-":
+                report = importer.run(read_rows(sys.stdin, file_format))
+            else:
+                with open(path, "r", encoding="utf-8-sig", newline="") as stream:
+                    report = importer.run(read_rows(stream, file_format))
+        except (OSError, ValueError, csv.Error) as exc:
+            raise CommandError(str(exc)) from exc
+
+        for error in report["errors"]:
+            self.stdout.write(
+                self.style.ERROR("Row %s: %s" % (error["row"], error["errors"]))
+            )
+
+        if options["report"]:
+            with open(options["report"], "w", encoding="utf-8") as stream:
+                json.dump(report, stream, indent=2)
+
+        verb = "Would import" if report["dry_run"] else "Imported"
+        self.stdout.write(
+            self.style.SUCCESS(
+                "%s %s of %s rows (%s rejected)"
+                % (verb, report["imported"], report["rows"], len(report["errors"]))
+            )
+        )
@@ -0,0 +1,347 @@
+"""Load a running server with concurrent public and staff traffic.
+
+Unlike debug_request and test_throttle, which send a few requests in turn
+through the test Client, this drives a real server over HTTP from many
+threads or processes at once, so it shows how the app, the global throttle
+and the database cache behave under contention. Run it against a local
+server on a database filled by seed_scale; see cards.utility.load_test for
+the scenarios.
+
+Staff traffic uses a session logged in here as the --staff-email user, who
+is created if needed and given read_combatant_info for the run. The
+session, and the user and permission grant if they were made here, are
+removed when the run ends. PIN scenarios submit correct PINs, so they don't
+lock anyone out.
+
+Since it grants staff access and floods the target, it only runs with
+DEBUG on, or with an explicit --url and --confirm.
+"""
+
+import json
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import requests
+from cards.management.commands.benchmark import percentile
+from cards.models import Combatant, Permission, UserPermission
+from cards.utility.load_test import DEFAULT_MIX, Plan, parse_mix, run_worker
+from cards.utility.scale_seed import SEED_EMAIL_DOMAIN, seed_pin
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from sso_user.models import SSOUser
+
+# Upper bounds of the latency histogram buckets, in ms
+HISTOGRAM_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+# Number of seeded combatants to spread requests over
+TARGETS = 1000
+
+
+def histogram(timings):
+    """Count latencies into HISTOGRAM_BUCKETS_MS, with a final open bucket"""
+    counts = Counter()
+    for seconds in timings:
+        ms = seconds * 1000
+        bucket = next((f"<={b}" for b in HISTOGRAM_BUCKETS_MS if ms <= b), None)
+        counts[bucket or f">{HISTOGRAM_BUCKETS_MS[-1]}"] += 1
+    labels = [f"<={b}" for b in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]}"]
+    return {label: counts[label] for label in labels}
+
+
+def split_requests(total, workers):
+    """Share a request count between workers as evenly as possible"""
+    return [total // workers + (number < total % workers) for number in range(workers)]
+
+
+def summarize(results, elapsed):
+    """Throughput, latency and outcome rates for a list of results
+
+    Args:
+        results: (scenario, status, seconds) for every request
+        elapsed: Wall clock seconds the load ran for
+
+    Returns:
+        A dict with totals and a summary per scenario
+    """
+    if not results:
+        raise CommandError("No requests were made")
+
+    by_scenario = defaultdict(list)
+    for result in results:
+        by_scenario[result[0]].append(result)
+
+    def describe(rows):
+        timings = [seconds for _, _, seconds in rows]
+        statuses = Counter(status for _, status, _ in rows)
+        throttled = statuses[429]
+        errors = sum(
+            count
+            for status, count in statuses.items()
+            if status is None or (status >= 400 and status != 429)
+        )
+        return {
+            "requests": len(rows),
+            "throughput_rps": round(len(rows) / elapsed, 2),
+            "p50_ms": round(percentile(timings, 50) * 1000, 2),
+            "p90_ms": round(percentile(timings, 90) * 1000, 2),
+            "p99_ms": round(percentile(timings, 99) * 1000, 2),
+            "max_ms": round(max(timings) * 1000, 2),
+            "throttled_rate": round(throttled / len(rows), 4),
+            "error_rate": round(errors / len(rows), 4),
+            "statuses": {
+                str(status): count
+                for status, count in sorted(statuses.items(), key=str)
+            },
+            "histogram_ms": histogram(timings),
+        }
+
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "total": describe(results),
+        "scenarios": {
+            name: describe(rows) for name, rows in sorted(by_scenario.items())
+        },
+    }
+
+
+class Command(BaseCommand):
+    """Concurrent HTTP load test"""
+
+    help = "Load a running server with a concurrent mix of public and staff requests"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            help="Server to load (default BASE_URL)",
+        )
+        parser.add_argument(
+            "--confirm",
+            action="store_true",
+            help="Run with DEBUG off; needs an explicit --url",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Concurrent workers (default 8)",
+        )
+        parser.add_argument(
+            "--processes",
+            action="store_true",
+            help="Run workers as processes rather than threads",
+        )
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=30,
+            help="Seconds to run for (default 30)",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            help="Stop after this many requests in all, if sooner",
+        )
+        parser.add_argument(
+            "--mix",
+            default=",".join(
+                f"{name}={weight}" for name, weight in DEFAULT_MIX.items()
+            ),
+            help="Scenario weights (default %(default)s)",
+        )
+        parser.add_argument(
+            "--clients",
+            type=int,
+            default=200,
+            help="Simulated client addresses for the throttle; 0 for none "
+            "(default 200)",
+        )
+        parser.add_argument(
+            "--staff-email",
+            default=f"load-test@{SEED_EMAIL_DOMAIN}",
+            help="Staff user for API traffic (default %(default)s)",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed")
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the report as JSON",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not (options["url"] and options["confirm"]):
+            raise CommandError(
+                "DEBUG is off: pass the server to load with --url, and --confirm"
+            )
+        if options["workers"] < 1:
+            raise CommandError("--workers must be positive")
+        try:
+            mix = parse_mix(options["mix"])
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+
+        base_url = (options["url"] or settings.BASE_URL).rstrip("/")
+        try:
+            requests.get(base_url + "/", timeout=10)
+        except requests.RequestException as exc:
+            raise CommandError(f"Can't reach {base_url}: {exc}") from exc
+
+        shares = [None] * options["workers"]
+        if options["requests"]:
+            shares = split_requests(options["requests"], options["workers"])
+
+        client = Client()
+        created = self.grant_staff_access(client, options["staff_email"])
+        try:
+            plan = self.make_plan(options, base_url, mix, client)
+            executor_class = (
+                ProcessPoolExecutor if options["processes"] else ThreadPoolExecutor
+            )
+            start = time.perf_counter()
+            with executor_class(max_workers=options["workers"]) as executor:
+                futures = [
+                    executor.submit(run_worker, plan._replace(requests=share), number)
+                    for number, share in enumerate(shares)
+                ]
+                results = [result for future in futures for result in future.result()]
+            elapsed = time.perf_counter() - start
+        finally:
+            client.logout()
+            for instance in reversed(created):
+                instance.delete()
+
+        report = summarize(results, elapsed)
+        report["workers"] = options["workers"]
+        report["mode"] = "processes" if options["processes"] else "threads"
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.write_report(report)
+
+    def make_plan(self, options, base_url, mix, client):
+        seeded = Combatant.objects.filter(
+            email__endswith=f"@{SEED_EMAIL_DOMAIN}", accepted_privacy_policy=True
+        ).order_by("email")
+        card_holders = list(seeded.values_list("card_id", "uuid")[:TARGETS])
+        pin_holders = list(
+            seeded.filter(
+                pin_hash__isnull=False, pin_locked_until__isnull=True
+            ).values_list("card_id", "email")[:TARGETS]
+        )
+        if not card_holders or (mix.get("pin") and not pin_holders):
+            raise CommandError("No seeded combatants to use; run seed_scale first")
+
+        return Plan(
+            base_url=base_url,
+            mix=mix,
+            duration=options["duration"],
+            requests=None,
+            clients=options["clients"],
+            seed=options["seed"],
+            card_paths=[
+                reverse("combatant-card", args=[card_id]) for card_id, _ in card_holders
+            ],
+            pin_targets=[
+                (
+                    reverse("pin-verify", args=[card_id]),
+                    seed_pin(int(email[len("combatant") :].split("@")[0])),
+                )
+                for card_id, email in pin_holders
+            ],
+            request_path=reverse("request-card"),
+            staff_detail_paths=[
+                reverse("combatant-bundle-detail", args=[uuid])
+                for _, uuid in card_holders
+            ],
+            staff_list_path=reverse("combatant-list-list"),
+            session_cookie=(
+                settings.SESSION_COOKIE_NAME,
+                client.cookies[settings.SESSION_COOKIE_NAME].value,
+            ),
+            csrf_cookie=settings.CSRF_COOKIE_NAME,
+        )
+
+    def grant_staff_access(self, client, email):
+        """Log the client in as a staff user who can read combatant info
+
+        Returns:
+            The user and permission grant made for the run, to delete when
+            it ends
+        """
+        created = []
+        user, user_created = SSOUser.objects.get_or_create(email=email)
+        if user_created:
+            created.append(user)
+        permission = Permission.objects.filter(slug="read_combatant_info").first()
+        if permission is None:
+            permission = Permission.objects.create(
+                **Permission.DEFAULT_PERMISSIONS[0], is_default=True
+            )
+        grant, grant_created = UserPermission.objects.get_or_create(
+            user=user, permission=permission, discipline=None
+        )
+        if grant_created:
+            created.append(grant)
+        client.force_login(user)
+        return created
+
+    def write_report(self, report):
+        total = report["total"]
+        self.stdout.write(
+            "%s requests in %.1f s from %s %s: %.1f requests/s"
+            % (
+                total["requests"],
+                report["elapsed_s"],
+                report["workers"],
+                report["mode"],
+                total["throughput_rps"],
+            )
+        )
+
+        self.stdout.write(
+            "\n%-13s %8s %8s %8s %8s %8s %9s %7s"
+            % (
+                "scenario",
+                "requests",
+                "req/s",
+                "p50 ms",
+                "p90 ms",
+                "p99 ms",
+                "429",
+                "errors",
+            )
+        )
+        for name, scenario in [*report["scenarios"].items(), ("total", total)]:
+            self.stdout.write(
+                "%-13s %8s %8.1f %8.1f %8.1f %8.1f %8.1f%% %6.1f%%"
+                % (
+                    name,
+                    scenario["requests"],
+                    scenario["throughput_rps"],
+                    scenario["p50_ms"],
+                    scenario["p90_ms"],
+                    scenario["p99_ms"],
+                    scenario["throttled_rate"] * 100,
+                    scenario["error_rate"] * 100,
+                )
+            )
+
+        self.stdout.write("\nLatency histogram (all requests):")
+        width = max(total["histogram_ms"].values())
+        for bucket, count in total["histogram_ms"].items():
+            bar = "#" * round(40 * count / width) if width else ""
+            self.stdout.write("  %8s ms %7s %s" % (bucket, count, bar))
+
+        if total["error_rate"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    "\nStatuses: %s"
+                    % ", ".join(
+                        f"{status}: {count}"
+                        for status, count in total["statuses"].items()
+                    )
+                )
+            )
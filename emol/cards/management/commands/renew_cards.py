@@ -0,0 +1,132 @@
+"""Renew many combatants' cards in one discipline, e.g. after an event.
+
+Combatants can be given by UUID, card ID or email address, on the command
+line or one per line in a file. Emails match case-insensitively, and an
+email shared by several combatants renews all of them.
+"""
+
+from uuid import UUID
+
+from cards.models import Card, Combatant, Discipline
+from cards.utility.time import string_to_date
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+
+class Command(BaseCommand):
+    """Bulk renew cards."""
+
+    help = "Renew the cards of many combatants in one discipline."
+
+    def add_arguments(self, parser):
+        parser.add_argument("discipline", help="Discipline slug")
+        parser.add_argument(
+            "combatants",
+            nargs="*",
+            help="Combatant UUIDs, card IDs or email addresses",
+        )
+        parser.add_argument(
+            "--file",
+            help="Read combatants from this file, one per line",
+        )
+        parser.add_argument(
+            "--date",
+            help="New card date, YYYY-MM-DD (default: today)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Show what would be renewed, change nothing",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            discipline = Discipline.objects.get(slug=options["discipline"])
+        except Discipline.DoesNotExist as exc:
+            raise CommandError(
+                "Unknown discipline '%s'" % options["discipline"]
+            ) from exc
+
+        renew_date = None
+        if options["date"]:
+            try:
+                renew_date = string_to_date(options["date"])
+            except ValueError as exc:
+                raise CommandError("--date must be YYYY-MM-DD") from exc
+
+        identifiers = list(options["combatants"])
+        if options["file"]:
+            with open(options["file"], "r", encoding="utf-8") as stream:
+                identifiers.extend(line.strip() for line in stream if line.strip())
+        if not identifiers:
+            raise CommandError("No combatants given")
+
+        found = self.find_combatants(identifiers)
+        for identifier in identifiers:
+            matches = found.get(identifier)
+            if not matches:
+                self.stdout.write(self.style.WARNING("Not found: %s" % identifier))
+            elif len(matches) > 1:
+                self.stdout.write(
+                    "%s matches %s combatants" % (identifier, len(matches))
+                )
+
+        uuids = set().union(*found.values())
+        if options["dry_run"]:
+            count = Card.objects.filter(
+                discipline=discipline, combatant__uuid__in=uuids
+            ).count()
+            self.stdout.write(
+                self.style.SUCCESS("Would renew %s %s cards" % (count, discipline.name))
+            )
+            return
+
+        renewed = Card.bulk_renew(discipline, uuids, renew_date)
+        for identifier, matches in found.items():
+            for uuid in sorted(matches - renewed, key=str):
+                name = identifier if len(matches) == 1 else f"{identifier} ({uuid})"
+                self.stdout.write(
+                    self.style.WARNING("No %s card: %s" % (discipline.name, name))
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS("Renewed %s %s cards" % (len(renewed), discipline.name))
+        )
+
+    @staticmethod
+    def find_combatants(identifiers):
+        """Map each identifier that matches a combatant to their UUIDs
+
+        Returns:
+            A dict of identifier to the set of UUIDs of the combatants it
+            matches; identifiers matching no one are left out
+        """
+        by_uuid = {}
+        by_email = {}
+        for identifier in set(identifiers):
+            try:
+                by_uuid.setdefault(UUID(identifier), []).append(identifier)
+            except ValueError:
+                pass
+            by_email.setdefault(identifier.lower(), []).append(identifier)
+
+        found = {}
+        for uuid, card_id, email in (
+            Combatant.objects.alias(email_lower=Lower("email"))
+            .filter(
+                Q(uuid__in=by_uuid)
+                | Q(card_id__in=identifiers)
+                | Q(email_lower__in=by_email)
+            )
+            .values_list("uuid", "card_id", "email")
+        ):
+            keys = [
+                *by_uuid.get(uuid, []),
+                *by_email.get((email or "").lower(), []),
+            ]
+            if card_id in identifiers:
+                keys.append(card_id)
+            for key in keys:
+                found.setdefault(key, set()).add(uuid)
+        return found
@@ -0,0 +1,53 @@
+"""Fill the database with synthetic combatants at production scale.
+
+See cards.utility.scale_seed for what is generated. Run import_disciplines
+first. Meant for development and benchmarking databases only: the data is
+fake, and seeded combatants get real reminders and roster entries.
+"""
+
+import time
+
+from cards.utility.scale_seed import SEED_EMAIL_DOMAIN, ScaleSeeder
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """Seed synthetic combatants."""
+
+    help = "Generate N synthetic combatants with cards, waivers, PINs and reminders."
+
+    def add_arguments(self, parser):
+        parser.add_argument("count", type=int, help="Number of combatants to add")
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Random seed; the same seed generates the same data (default 0)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Combatants per transaction (default 1000)",
+        )
+
+    def handle(self, *args, **options):
+        if options["count"] < 1 or options["chunk_size"] < 1:
+            raise CommandError("count and --chunk-size must be positive")
+
+        seeder = ScaleSeeder(seed=options["seed"], chunk_size=options["chunk_size"])
+        start = time.perf_counter()
+        try:
+            counts = seeder.run(options["count"])
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        elapsed = time.perf_counter() - start
+
+        for name, count in counts.items():
+            self.stdout.write("  %-15s %s" % (name, count))
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Seeded %s combatants (@%s) in %.1f s"
+                % (counts["combatants"], SEED_EMAIL_DOMAIN, elapsed)
+            )
+        )
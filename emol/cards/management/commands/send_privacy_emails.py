@@ -0,0 +1,66 @@
+"""Send privacy policy emails queued by bulk imports."""
+
+import logging
+
+from cards.mail import send_privacy_policy
+from cards.models import Combatant
+from django.core.management.base import BaseCommand
+
+logger = logging.getLogger("cards")
+
+
+class Command(BaseCommand):
+    """Send queued privacy policy emails."""
+
+    help = "Send privacy policy emails queued by combatant imports."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            help="Send at most this many emails",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Show what would be sent, send nothing",
+        )
+
+    def handle(self, *args, **options):
+        # Anyone who accepted in the meantime doesn't need the email
+        Combatant.objects.filter(
+            privacy_email_queued=True, accepted_privacy_policy=True
+        ).update(privacy_email_queued=False)
+
+        queued = Combatant.objects.filter(privacy_email_queued=True).order_by("id")
+        if options["limit"]:
+            queued = queued[: options["limit"]]
+
+        sent = []
+        failed = 0
+        for combatant in queued.iterator():
+            if options["dry_run"]:
+                self.stdout.write("Would send privacy policy to %s" % combatant.email)
+                continue
+
+            try:
+                if send_privacy_policy(combatant):
+                    sent.append(combatant.id)
+                else:
+                    failed += 1
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error(
+                    "Failed to send privacy policy to %s: %s", combatant.email, exc
+                )
+                failed += 1
+
+        if sent:
+            Combatant.objects.filter(id__in=sent).update(privacy_email_queued=False)
+
+        message = "Sent %s privacy policy emails" % len(sent)
+        if failed:
+            self.stdout.write(
+                self.style.WARNING("%s, %s failed (left queued)" % (message, failed))
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
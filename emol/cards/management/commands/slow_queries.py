@@ -0,0 +1,76 @@
+"""Report the worst slow queries sampled by the running site.
+
+Samples are taken by query_budget.sampler and shared between workers
+through the cache. Offenders are grouped by SQL shape and the code that ran
+them, and listed by total time.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand
+from query_budget.sampler import aggregate, clear_samples, get_samples
+
+SQL_WIDTH = 160
+
+
+class Command(BaseCommand):
+    """Report sampled slow queries, worst first"""
+
+    help = "Report sampled slow queries, worst first"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=20,
+            help="Number of offenders to list (default 20)",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the report as JSON",
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Empty the sample buffer after reporting",
+        )
+
+    def handle(self, *args, **options):
+        samples = get_samples()
+        offenders = aggregate(samples)[: options["top"]]
+
+        if options["json"]:
+            self.stdout.write(
+                json.dumps({"samples": len(samples), "offenders": offenders}, indent=2)
+            )
+        elif not samples:
+            self.stdout.write("No slow queries sampled")
+        else:
+            self.write_report(samples, offenders)
+
+        if options["clear"]:
+            clear_samples()
+            self.stdout.write(self.style.SUCCESS("Cleared slow query samples"))
+
+    def write_report(self, samples, offenders):
+        self.stdout.write(
+            "%s slow queries sampled, worst %s by total time:"
+            % (len(samples), len(offenders))
+        )
+        for offender in offenders:
+            self.stdout.write(
+                "\n%5s x  total %9.1f ms  max %8.1f ms  %s"
+                % (
+                    offender["count"],
+                    offender["total_ms"],
+                    offender["max_ms"],
+                    offender["location"] or "(no frame in our code)",
+                )
+            )
+            if offender["views"]:
+                self.stdout.write("  views: %s" % ", ".join(offender["views"]))
+            sql = offender["sql"]
+            if len(sql) > SQL_WIDTH:
+                sql = sql[: SQL_WIDTH - 3] + "..."
+            self.stdout.write("  %s" % sql)
@@ -0,0 +1,193 @@
+"""Measure process startup: import time per module and time to first request.
+
+Startup is measured in a fresh interpreter run with -X importtime, using the
+current settings module. That process sets Django up, builds the WSGI
+application and serves one request through it. Use this to spot a change
+that drags a heavy library into every worker boot and management command.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Libraries that should only load when a code path needs them
+DEFERRED_MODULES = ["boto3", "botocore", "authlib", "cryptography", "markdown"]
+
+# rest_framework.compat imports markdown whenever it is installed, so it
+# arrives with the URLconf. It should still stay out of management commands,
+# which set Django up but never load the URLconf.
+URLCONF_MODULES = {"markdown"}
+
+# Run in the child interpreter; prints phase timings as JSON on the last line
+CHILD_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter()
+after_setup = [m for m in sys.argv[2:] if m in sys.modules]
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.test import Client
+application = get_wsgi_application()
+app = time.perf_counter()
+hosts = [h for h in settings.ALLOWED_HOSTS if h != "*" and not h.startswith(".")]
+client = Client(HTTP_HOST=(hosts or ["localhost"])[0], raise_request_exception=False)
+response = client.get(sys.argv[1])
+first = time.perf_counter()
+print(json.dumps({
+    "setup_ms": (setup - start) * 1000,
+    "application_ms": (app - setup) * 1000,
+    "first_request_ms": (first - app) * 1000,
+    "time_to_first_request_ms": (first - start) * 1000,
+    "status": response.status_code,
+    "loaded_after_setup": after_setup,
+    "loaded_after_request": [m for m in sys.argv[2:] if m in sys.modules],
+}))
+"""
+
+
+def parse_importtime(stderr):
+    """Parse -X importtime output
+
+    Returns:
+        A list of (module, self_us, cumulative_us), in import order
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:") :].split("|")
+            modules.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            # The header line
+            continue
+    return modules
+
+
+class Command(BaseCommand):
+    """Report import time per module and time to first request"""
+
+    help = "Report import time per module and time to first request"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default="/",
+            help="Path of the first request (default /)",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=20,
+            help="Number of modules and packages to list (default 20)",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the report as JSON",
+        )
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-X",
+                "importtime",
+                "-c",
+                CHILD_SCRIPT,
+                options["path"],
+                *DEFERRED_MODULES,
+            ],
+            capture_output=True,
+            text=True,
+            env=env,
+            cwd=settings.BASE_DIR.parent,
+            check=False,
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Startup failed:\n{result.stderr[-2000:]}")
+
+        report = self.build_report(result, options["top"])
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.write_report(report)
+
+    def build_report(self, result, top):
+        modules = parse_importtime(result.stderr)
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+
+        packages = defaultdict(int)
+        for name, self_us, _ in modules:
+            packages[name.split(".")[0]] += self_us
+
+        return {
+            **timings,
+            "import_ms": sum(self_us for _, self_us, _ in modules) / 1000,
+            "module_count": len(modules),
+            "modules": [
+                {"module": name, "self_ms": s / 1000, "cumulative_ms": c / 1000}
+                for name, s, c in sorted(modules, key=lambda m: m[2], reverse=True)[
+                    :top
+                ]
+            ],
+            "packages": [
+                {"package": name, "self_ms": us / 1000}
+                for name, us in sorted(
+                    packages.items(), key=lambda item: item[1], reverse=True
+                )[:top]
+            ],
+        }
+
+    def write_report(self, report):
+        self.stdout.write(
+            "Time to first request: %.1f ms (setup %.1f, application %.1f, "
+            "request %.1f; status %s)"
+            % (
+                report["time_to_first_request_ms"],
+                report["setup_ms"],
+                report["application_ms"],
+                report["first_request_ms"],
+                report["status"],
+            )
+        )
+        self.stdout.write(
+            "Imports: %s modules, %.1f ms"
+            % (report["module_count"], report["import_ms"])
+        )
+
+        self.stdout.write("\nSlowest modules (cumulative ms, self ms):")
+        for module in report["modules"]:
+            self.stdout.write(
+                "  %9.1f %9.1f  %s"
+                % (module["cumulative_ms"], module["self_ms"], module["module"])
+            )
+
+        self.stdout.write("\nSlowest packages (self ms):")
+        for package in report["packages"]:
+            self.stdout.write("  %9.1f  %s" % (package["self_ms"], package["package"]))
+
+        early = report["loaded_after_setup"] + [
+            module
+            for module in report["loaded_after_request"]
+            if module not in URLCONF_MODULES
+            and module not in report["loaded_after_setup"]
+        ]
+        if early:
+            self.stdout.write(
+                self.style.WARNING(
+                    "\nLoaded at startup but should be deferred: %s" % ", ".join(early)
+                )
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS("\nNo deferred libraries loaded at startup")
+            )
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:55
+
+import cards.utility.crypto
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cards", "0019_add_privacy_policy_draft_workflow"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CardIdAllocator",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("terms", models.PositiveSmallIntegerField(unique=True)),
+                (
+                    "seed",
+                    models.CharField(
+                        default=cards.utility.crypto.get_random_32, max_length=32
+                    ),
+                ),
+                ("next_index", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
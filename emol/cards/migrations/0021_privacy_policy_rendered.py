@@ -0,0 +1,53 @@
+# Generated by Django 4.2.30 on 2026-10-19 01:58
+
+import markdown as md
+from django.db import migrations, models
+
+
+def render_approved_policies(apps, schema_editor):
+    """Fill in version parts and rendered HTML for approved policies."""
+    PrivacyPolicy = apps.get_model("cards", "PrivacyPolicy")
+    for policy in PrivacyPolicy.objects.filter(approved=True, version__isnull=False):
+        try:
+            year, minor = policy.version.split(".")
+            policy.version_year, policy.version_minor = int(year), int(minor)
+        except ValueError:
+            pass
+        text = policy.text.replace("[DATE]", policy.created_at.strftime("%Y-%m-%d"))
+        policy.rendered_html = md.markdown(
+            text, extensions=["markdown.extensions.fenced_code"]
+        )
+        policy.save(update_fields=["version_year", "version_minor", "rendered_html"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cards", "0020_card_id_allocator"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="privacypolicy",
+            name="rendered_html",
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name="privacypolicy",
+            name="version_minor",
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="privacypolicy",
+            name="version_year",
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="privacypolicy",
+            index=models.Index(
+                fields=["approved", "-version_year", "-version_minor"],
+                name="privacy_policy_latest",
+            ),
+        ),
+        migrations.RunPython(render_approved_policies, migrations.RunPython.noop),
+    ]
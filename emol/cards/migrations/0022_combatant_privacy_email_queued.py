@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cards", "0021_privacy_policy_rendered"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="combatant",
+            name="privacy_email_queued",
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
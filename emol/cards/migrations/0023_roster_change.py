@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cards", "0022_combatant_privacy_email_queued"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RosterChange",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("card_id", models.CharField(max_length=255)),
+                ("created", models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:02
+
+from django.db import migrations, models
+from django.db.models import F, Max
+
+
+def number_existing_changes(apps, schema_editor):
+    """Keep the versions devices already hold: old rows are versioned by id"""
+    RosterChange = apps.get_model("cards", "RosterChange")
+    RosterVersion = apps.get_model("cards", "RosterVersion")
+    RosterChange.objects.update(version=F("id"))
+    newest = RosterChange.objects.aggregate(newest=Max("id"))["newest"] or 0
+    RosterVersion.objects.create(pk=1, version=newest)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cards", "0023_roster_change"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RosterVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="rosterchange",
+            name="version",
+            field=models.PositiveBigIntegerField(db_index=True, default=0),
+            preserve_default=False,
+        ),
+        migrations.RunPython(number_existing_changes, migrations.RunPython.noop),
+    ]
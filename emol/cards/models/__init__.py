@@ -1,5 +1,6 @@
 from cards.models.authorization import Authorization
 from cards.models.card import Card
+from cards.models.card_id_allocator import CardIdAllocator
 from cards.models.combatant import Combatant
 from cards.models.combatant_authorization import CombatantAuthorization
 from cards.models.combatant_warrant import CombatantWarrant
@@ -11,5 +12,6 @@ from cards.models.privacy_acceptance import PrivacyAcceptance
 from cards.models.privacy_policy import PrivacyPolicy
 from cards.models.region import Region
 from cards.models.reminder import Reminder
+from cards.models.roster_change import RosterChange, RosterVersion
 from cards.models.user_permission import UserPermission
 from cards.models.waiver import Waiver
@@ -32,7 +32,7 @@ from cards.models.reminder_mixin import ReminderMixin
 from cards.utility.named_tuples import NameSlugTuple
 from cards.utility.time import DATE_FORMAT, add_years, today
 from dirtyfields import DirtyFieldsMixin
-from django.db import models
+from django.db import models, transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
@@ -146,6 +146,47 @@ class Card(models.Model, DirtyFieldsMixin, ReminderMixin):
         self.date_issued = renew_date or today()
         self.save()
 
+    @classmethod
+    def bulk_renew(cls, discipline, combatant_uuids, renew_date=None):
+        """Renew many combatants' cards in one discipline at once
+
+        The card dates are changed with a single UPDATE and the reminders for
+        every renewed card are regenerated in one bulk pass. Combatants with
+        no card in the discipline are skipped.
+
+        Args:
+            discipline: The Discipline whose cards to renew
+            combatant_uuids: UUIDs of the combatants to renew
+            renew_date: The new date_issued, default today
+
+        Returns:
+            The UUIDs of the combatants whose cards were renewed
+        """
+        # pylint: disable=import-outside-toplevel
+        from cards.utility.marshal_roster import invalidate_roster
+        from cards.utility.roster_snapshot import record_card_changes
+
+        renew_date = renew_date or today()
+        with transaction.atomic():
+            cards = dict(
+                cls.objects.filter(
+                    discipline=discipline, combatant__uuid__in=combatant_uuids
+                ).values_list("id", "combatant__uuid")
+            )
+            if not cards:
+                return set()
+
+            cls.objects.filter(id__in=cards).update(date_issued=renew_date)
+            Reminder.bulk_create_or_update_reminders(
+                cls(id=card_id, date_issued=renew_date) for card_id in cards
+            )
+            # Bulk updates skip the post_save signals that usually do these
+            invalidate_roster()
+            record_card_changes(cards)
+
+        logger.info("Renewed %s %s cards to %s", len(cards), discipline, renew_date)
+        return set(cards.values())
+
     def has_authorization(self, authorization):
         """Does this card have a given authorization?"""
         try:
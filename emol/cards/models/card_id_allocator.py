@@ -0,0 +1,139 @@
+"""Allocation of card_ids from a shuffled enumeration of the name namespace."""
+
+import logging
+
+from cards.utility.crypto import get_random_32
+from cards.utility.names import name_at, namespace_size, shuffle_index
+from django.conf import settings
+from django.db import models, transaction
+
+logger = logging.getLogger("cards")
+
+# Card IDs generated at random before the allocator existed can occupy slots
+# in the enumeration. Give up rather than scan indefinitely if we hit a run.
+MAX_COLLISIONS = 1000
+
+
+class CardIdNamespaceExhausted(Exception):
+    """Every name in the card_id namespace has been handed out."""
+
+
+class CardIdAllocator(models.Model):
+    """Cursor into a shuffled enumeration of the card_id namespace.
+
+    Each namespace (three or four terms) has one row. The seed picks the
+    shuffle and next_index is how far through it we are, so allocating a
+    card_id is a locked read of this row, a name lookup and an increment,
+    however full the namespace is.
+    """
+
+    terms = models.PositiveSmallIntegerField(unique=True)
+    seed = models.CharField(max_length=32, default=get_random_32)
+    next_index = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.terms}-term card IDs: {self.next_index}/{self.size}"
+
+    @property
+    def fourth_term(self):
+        return self.terms == 4
+
+    @property
+    def size(self):
+        return namespace_size(self.fourth_term)
+
+    def name_for(self, index):
+        """Get the card_id at a position in this allocator's shuffle."""
+        return name_at(shuffle_index(index, self.size, self.seed), self.fourth_term)
+
+    @staticmethod
+    def current_terms():
+        """Number of terms new card_ids should have, from settings."""
+        return 4 if getattr(settings, "CARD_ID_FOURTH_TERM", False) else 3
+
+    @classmethod
+    def allocate(cls):
+        """Allocate a card_id that no combatant is using.
+
+        Returns:
+            The new card_id
+
+        Raises:
+            CardIdNamespaceExhausted: If there are no names left
+        """
+        # pylint: disable=import-outside-toplevel
+        from cards.models.combatant import Combatant
+
+        with transaction.atomic():
+            allocator, _ = cls.objects.select_for_update().get_or_create(
+                terms=cls.current_terms()
+            )
+            size = allocator.size
+
+            for _ in range(MAX_COLLISIONS):
+                if allocator.next_index >= size:
+                    logger.error("Card ID namespace exhausted: %s", allocator)
+                    raise CardIdNamespaceExhausted(str(allocator))
+
+                card_id = allocator.name_for(allocator.next_index)
+                allocator.next_index += 1
+                if not Combatant.objects.filter(card_id=card_id).exists():
+                    allocator.save(update_fields=["next_index"])
+                    return card_id
+
+            raise CardIdNamespaceExhausted(
+                f"{MAX_COLLISIONS} consecutive card ID collisions: {allocator}"
+            )
+
+    @classmethod
+    def allocate_many(cls, count, terms=None):
+        """Allocate a batch of card_ids that no combatant is using.
+
+        For bulk loads: the allocator row is locked once and collisions are
+        checked with one query per pass rather than one per name.
+
+        Args:
+            count: Number of card_ids to allocate
+            terms: Namespace to allocate from (default: current_terms())
+
+        Returns:
+            A list of count new card_ids
+
+        Raises:
+            CardIdNamespaceExhausted: If there aren't count names left; nothing
+                is allocated
+        """
+        # pylint: disable=import-outside-toplevel
+        from cards.models.combatant import Combatant
+
+        with transaction.atomic():
+            allocator, _ = cls.objects.select_for_update().get_or_create(
+                terms=terms or cls.current_terms()
+            )
+            size = allocator.size
+
+            card_ids = []
+            while len(card_ids) < count:
+                needed = count - len(card_ids)
+                if allocator.next_index + needed > size:
+                    logger.error(
+                        "Card ID namespace can't fit %s more: %s", needed, allocator
+                    )
+                    raise CardIdNamespaceExhausted(str(allocator))
+
+                candidates = [
+                    allocator.name_for(index)
+                    for index in range(
+                        allocator.next_index, allocator.next_index + needed
+                    )
+                ]
+                allocator.next_index += needed
+                taken = set(
+                    Combatant.objects.filter(card_id__in=candidates).values_list(
+                        "card_id", flat=True
+                    )
+                )
+                card_ids.extend(name for name in candidates if name not in taken)
+
+            allocator.save(update_fields=["next_index"])
+            return card_ids
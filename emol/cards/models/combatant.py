@@ -18,16 +18,25 @@ from uuid import uuid4
 if TYPE_CHECKING:
     from cards.models.one_time_code import OneTimeCode
 
+from asgiref.sync import sync_to_async
 from cards.mail import send_card_url, send_pin_lockout_notification, send_privacy_policy
+from cards.models.card_id_allocator import CardIdAllocator
 from cards.models.permissioned_db_fields import (
     PermissionedCharField,
     PermissionedDateField,
     PermissionedIntegerField,
 )
-from cards.utility.names import generate_name
+from cards.utility.pin_hasher import (
+    PinHasherBusy,
+    ahash_pin,
+    averify_pin,
+    hash_pin,
+    needs_rehash,
+    verify_pin,
+)
 from django.conf import settings
-from django.contrib.auth.hashers import check_password, make_password
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.dispatch import receiver
 from django.urls import reverse
 from django.utils import timezone
@@ -68,6 +77,9 @@ class Combatant(models.Model):
     accepted_privacy_policy = models.BooleanField(default=False)
     privacy_acceptance_code = models.CharField(max_length=32, unique=True, null=True)
 
+    # Set by bulk imports; the send_privacy_emails command sends and clears it
+    privacy_email_queued = models.BooleanField(default=False, db_index=True)
+
     # PIN authentication fields
     pin_hash = models.CharField(
         max_length=128,
@@ -294,11 +306,7 @@ class Combatant(models.Model):
         """
         self.accepted_privacy_policy = True
         self.privacy_acceptance_code = None
-        while True:
-            card_id = generate_name()
-            if not Combatant.objects.filter(card_id=card_id).exists():
-                self.card_id = card_id
-                break
+        self.card_id = CardIdAllocator.allocate()
 
         self.save()
         if send_email:
@@ -343,11 +351,12 @@ class Combatant(models.Model):
 
         Raises:
             ValueError: If PIN is not 4-6 numeric digits
+            PinHasherBusy: If the PIN hash pool is saturated
         """
         if not raw_pin or not re.match(r"^\d{4,6}$", raw_pin):
             raise ValueError("PIN must be 4-6 numeric digits")
 
-        self.pin_hash = make_password(raw_pin)
+        self.pin_hash = hash_pin(raw_pin)
         self.pin_failed_attempts = 0
         self.pin_locked_until = None
         self.save(update_fields=["pin_hash", "pin_failed_attempts", "pin_locked_until"])
@@ -359,12 +368,64 @@ class Combatant(models.Model):
         Handles lockout logic: increments failed attempts on failure,
         locks account after PIN_MAX_ATTEMPTS failures, clears attempts on success.
 
+        Lockout state changes are applied with conditional UPDATEs guarded on
+        pin_locked_until, so concurrent checks can't lose failed attempts or
+        lock the account twice. Only the request that actually locks the
+        account queues the lockout notification. A successful check only
+        writes when there are failed attempts to clear or a hash to upgrade.
+        No further SELECT is issued after this instance was loaded; the
+        in-memory lockout fields are updated on a best-effort basis for
+        display.
+
         Args:
             raw_pin: The plain text PIN to check
 
         Returns:
             True if PIN matches, False otherwise (including when locked out)
+
+        Raises:
+            PinHasherBusy: If the PIN hash pool is saturated
         """
+        if not self._can_check_pin():
+            return False
+
+        now = timezone.now()
+        if not verify_pin(raw_pin, self.pin_hash):
+            return self._pin_failed(now)
+
+        new_hash = None
+        if needs_rehash(self.pin_hash):
+            try:
+                new_hash = hash_pin(raw_pin)
+            except PinHasherBusy:
+                # Upgrade the hash on a later check instead
+                logger.info("Deferring PIN rehash for %s", self.email)
+        return self._pin_verified(now, new_hash)
+
+    async def acheck_pin(self, raw_pin: str) -> bool:
+        """Async check_pin, for async views.
+
+        The hashing is awaited on the PIN hash pool rather than run through
+        sync_to_async, so it doesn't hold up the thread that runs every
+        other request's sync code. Only the lockout UPDATEs go through
+        sync_to_async.
+        """
+        if not self._can_check_pin():
+            return False
+
+        now = timezone.now()
+        if not await averify_pin(raw_pin, self.pin_hash):
+            return await sync_to_async(self._pin_failed)(now)
+
+        new_hash = None
+        if needs_rehash(self.pin_hash):
+            try:
+                new_hash = await ahash_pin(raw_pin)
+            except PinHasherBusy:
+                logger.info("Deferring PIN rehash for %s", self.email)
+        return await sync_to_async(self._pin_verified)(now, new_hash)
+
+    def _can_check_pin(self) -> bool:
         if self.is_locked_out:
             logger.warning(
                 "PIN check attempted for locked out combatant %s", self.email
@@ -377,26 +438,57 @@ class Combatant(models.Model):
             )
             return False
 
-        if self.pin_hash is None:
+        return self.pin_hash is not None
+
+    def _not_locked(self, now):
+        return Combatant.objects.filter(pk=self.pk).filter(
+            models.Q(pin_locked_until__isnull=True)
+            | models.Q(pin_locked_until__lte=now)
+        )
+
+    def _pin_verified(self, now, new_hash) -> bool:
+        updates = {}
+        if new_hash:
+            updates["pin_hash"] = new_hash
+        if self.pin_failed_attempts > 0 or updates:
+            updates["pin_failed_attempts"] = 0
+
+        # Nothing to write in the common case, so no UPDATE either
+        if updates and not self._not_locked(now).update(**updates):
+            # Locked out by a concurrent failed attempt
             return False
 
-        if check_password(raw_pin, self.pin_hash):
-            if self.pin_failed_attempts > 0:
-                self.pin_failed_attempts = 0
-                self.save(update_fields=["pin_failed_attempts"])
-            return True
+        for field, value in updates.items():
+            setattr(self, field, value)
+        return True
+
+    def _pin_failed(self, now) -> bool:
+        not_locked = self._not_locked(now)
+        if not not_locked.update(pin_failed_attempts=F("pin_failed_attempts") + 1):
+            # Locked out by a concurrent failed attempt; don't count this one
+            return False
 
         self.pin_failed_attempts += 1
-        if self.pin_failed_attempts >= self.PIN_MAX_ATTEMPTS:
-            self.pin_locked_until = timezone.now() + self.PIN_LOCKOUT_DURATION
+        locked_until = now + self.PIN_LOCKOUT_DURATION
+        locked = not_locked.filter(
+            pin_failed_attempts__gte=self.PIN_MAX_ATTEMPTS
+        ).update(pin_locked_until=locked_until)
+
+        if locked:
+            self.pin_failed_attempts = max(
+                self.pin_failed_attempts, self.PIN_MAX_ATTEMPTS
+            )
+            self.pin_locked_until = locked_until
             logger.warning(
                 "Combatant %s locked out after %s failed PIN attempts",
                 self.email,
                 self.pin_failed_attempts,
             )
-            self._send_lockout_notification()
+            transaction.on_commit(self._send_lockout_notification)
+        elif self.pin_failed_attempts >= self.PIN_MAX_ATTEMPTS:
+            # A concurrent failed attempt applied the lockout
+            self.pin_locked_until = locked_until
 
-        self.save(update_fields=["pin_failed_attempts", "pin_locked_until"])
         return False
 
     def clear_lockout(self) -> None:
@@ -5,7 +5,7 @@ from datetime import datetime
 from urllib.parse import urljoin
 
 from cards.mail import send_card_url, send_privacy_policy
-from cards.utility.names import generate_name
+from cards.models.card_id_allocator import CardIdAllocator
 from django.conf import settings
 from django.db import models
 from django.urls import reverse
@@ -136,11 +136,7 @@ class PrivacyAcceptance(models.Model):
             logging.warning("Combatant %s already has a card ID", self.combatant)
             return
 
-        combatant_class = self.combatant.__class__
-        while True:
-            name = generate_name()
-            if not combatant_class.objects.filter(card_id=name).exists():
-                break
+        name = CardIdAllocator.allocate()
 
         logger.debug("Add card_id %s to combatant %s", name, self)
         self.combatant.card_id = name
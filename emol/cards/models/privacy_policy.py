@@ -2,7 +2,18 @@ import uuid
 from datetime import datetime
 
 from django.db import models
+from django.db.models import Max
 from django.forms import ValidationError
+from django.utils import timezone
+
+
+def parse_version(version):
+    """Split a YYYY.N version string into (year, minor), or (None, None)."""
+    try:
+        year, minor = version.split(".")
+        return (int(year), int(minor))
+    except (ValueError, AttributeError):
+        return (None, None)
 
 
 class PrivacyPolicy(models.Model):
@@ -11,6 +22,12 @@ class PrivacyPolicy(models.Model):
         constraints = [
             models.UniqueConstraint(fields=["version"], name="unique_version"),
         ]
+        indexes = [
+            models.Index(
+                fields=["approved", "-version_year", "-version_minor"],
+                name="privacy_policy_latest",
+            ),
+        ]
 
     text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
@@ -23,6 +40,12 @@ class PrivacyPolicy(models.Model):
     approved = models.BooleanField(default=False)
     draft_uuid = models.UUIDField(unique=True, null=True, blank=True)
 
+    # Set when a version is approved. Approved policies can't change, so the
+    # numeric version parts and the rendered text are computed just once.
+    version_year = models.PositiveIntegerField(null=True, editable=False)
+    version_minor = models.PositiveIntegerField(null=True, editable=False)
+    rendered_html = models.TextField(blank=True, editable=False)
+
     def __str__(self):
         if self.version:
             return f"<Privacy policy version {self.version}>"
@@ -31,19 +54,11 @@ class PrivacyPolicy(models.Model):
     @classmethod
     def latest_version(cls):
         """Get the latest approved policy version."""
-        approved = cls.objects.filter(approved=True, version__isnull=False)
-        if not approved.exists():
-            return None
-
-        def version_key(policy):
-            """Extract version components for sorting."""
-            try:
-                year, minor = policy.version.split(".")
-                return (int(year), int(minor))
-            except (ValueError, AttributeError):
-                return (0, 0)
-
-        return max(approved, key=version_key)
+        return (
+            cls.objects.filter(approved=True, version__isnull=False)
+            .order_by("-version_year", "-version_minor")
+            .first()
+        )
 
     @classmethod
     def latest_text(cls):
@@ -51,7 +66,27 @@ class PrivacyPolicy(models.Model):
         latest = cls.latest_version()
         if latest is None:
             return ""
-        return latest.text.replace("[DATE]", latest.created_at.strftime("%Y-%m-%d"))
+        return latest.display_text
+
+    @property
+    def display_text(self):
+        """The policy text with its [DATE] placeholder filled in."""
+        return self.text.replace("[DATE]", self.created_at.strftime("%Y-%m-%d"))
+
+    @property
+    def html(self):
+        """The policy rendered from markdown to HTML."""
+        if self.rendered_html:
+            return self.rendered_html
+        return self.render_html()
+
+    def render_html(self):
+        """Render the policy text from markdown to HTML."""
+        import markdown as md  # pylint: disable=import-outside-toplevel
+
+        return md.markdown(
+            self.display_text, extensions=["markdown.extensions.fenced_code"]
+        )
 
     @classmethod
     def get_draft_by_uuid(cls, draft_uuid):
@@ -67,22 +102,12 @@ class PrivacyPolicy(models.Model):
             return self.version
 
         year = datetime.now().year
-        existing_versions = PrivacyPolicy.objects.filter(
-            approved=True, version__startswith=f"{year}."
-        ).exclude(id=self.id if self.id else None)
-
-        if existing_versions.exists():
-            max_minor = 0
-            for existing in existing_versions:
-                try:
-                    if existing.version:
-                        minor = int(existing.version.split(".")[1])
-                        max_minor = max(max_minor, minor)
-                except (ValueError, IndexError):
-                    pass
-            return f"{year}.{max_minor + 1}"
-
-        return f"{year}.1"
+        max_minor = (
+            PrivacyPolicy.objects.filter(approved=True, version_year=year)
+            .exclude(id=self.id if self.id else None)
+            .aggregate(max_minor=Max("version_minor"))["max_minor"]
+        )
+        return f"{year}.{(max_minor or 0) + 1}"
 
     def approve(self):
         """Approve this draft policy and generate a version number."""
@@ -106,4 +131,10 @@ class PrivacyPolicy(models.Model):
         if not self.approved and not self.draft_uuid:
             self.draft_uuid = uuid.uuid4()
 
+        if self.approved and self.version:
+            self.version_year, self.version_minor = parse_version(self.version)
+            if self.created_at is None:
+                self.created_at = timezone.now()
+            self.rendered_html = self.render_html()
+
         super().save(*args, **kwargs)
@@ -1,4 +1,5 @@
 import logging
+from collections import defaultdict
 from datetime import timedelta
 
 from django.conf import settings
@@ -52,6 +53,38 @@ class Reminder(models.Model):
                 due_date=due_date,
             )
 
+    @classmethod
+    def bulk_create_or_update_reminders(cls, instances):
+        """Replace the reminders for many cards and/or waivers at once.
+
+        Equivalent to calling create_or_update_reminders for each instance,
+        but costs one delete and one insert per model rather than per
+        instance. Bypasses Reminder signals and save().
+        """
+        by_content_type = defaultdict(list)
+        for instance in instances:
+            content_type = ContentType.objects.get_for_model(instance)
+            by_content_type[content_type].append(instance)
+
+        for content_type, objects in by_content_type.items():
+            logger.info(
+                "Update reminders for %s %s objects", len(objects), content_type.model
+            )
+            cls.objects.filter(
+                content_type=content_type,
+                object_id__in=[instance.id for instance in objects],
+            ).delete()
+            cls.objects.bulk_create(
+                cls(
+                    content_type=content_type,
+                    object_id=instance.id,
+                    days_to_expiry=days,
+                    due_date=instance.expiration_date - timedelta(days=days),
+                )
+                for instance in objects
+                for days in settings.REMINDER_DAYS
+            )
+
     @property
     def should_send_email(self) -> bool:
         if self.content_object is None:
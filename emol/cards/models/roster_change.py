@@ -0,0 +1,96 @@
+"""Change log behind the versioned offline roster snapshot."""
+
+import logging
+
+from django.db import models, transaction
+from django.db.models import Max, Min
+
+logger = logging.getLogger("cards")
+
+
+class RosterVersion(models.Model):
+    """Counter that hands out roster snapshot versions.
+
+    There is one row. Logging a change locks it with SELECT ... FOR UPDATE
+    and increments it inside the writer's transaction, so the lock is held
+    until that transaction commits. A later writer waits for it and gets a
+    higher version, which makes versions follow commit order: once a device
+    has seen version N, nothing at or below N can still be committed.
+    RosterChange ids can't promise that, since they are allocated when a
+    row is inserted, not when it commits.
+    """
+
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"<RosterVersion {self.version}>"
+
+    @classmethod
+    def next(cls):
+        """Take the next version, locking the counter until commit.
+
+        Must be called inside a transaction.
+        """
+        counter, _ = cls.objects.select_for_update().get_or_create(pk=1)
+        counter.version += 1
+        counter.save(update_fields=["version"])
+        return counter.version
+
+
+class RosterChange(models.Model):
+    """A card_id whose roster snapshot entry may have changed.
+
+    Rows are append-only and carry the snapshot version they were logged
+    at (see RosterVersion): a device that holds version N needs fresh
+    entries for the card_ids logged after N. Old rows are pruned by the
+    clean_expired command; a device whose version predates the oldest row
+    gets a full snapshot instead.
+    """
+
+    card_id = models.CharField(max_length=255)
+    version = models.PositiveBigIntegerField(db_index=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"<RosterChange {self.version}: {self.card_id}>"
+
+    @classmethod
+    def record(cls, card_ids):
+        """Log a change for each card_id, ignoring blanks"""
+        card_ids = {card_id for card_id in card_ids if card_id}
+        if card_ids:
+            logger.debug("Roster change for %s card IDs", len(card_ids))
+            # No savepoint: if this fails the caller's transaction is lost anyway
+            with transaction.atomic(savepoint=False):
+                version = RosterVersion.next()
+                cls.objects.bulk_create(
+                    cls(card_id=card_id, version=version) for card_id in card_ids
+                )
+
+    @classmethod
+    def version_range(cls):
+        """The oldest and newest versions still in the log
+
+        Returns:
+            (oldest, newest), both 0 if the log is empty
+        """
+        versions = cls.objects.aggregate(oldest=Min("version"), newest=Max("version"))
+        return versions["oldest"] or 0, versions["newest"] or 0
+
+    @classmethod
+    def prune(cls, before):
+        """Delete changes logged before a datetime
+
+        Whole versions are deleted, and the newest version is always kept so
+        the version never goes backwards.
+
+        Returns:
+            The number of rows deleted
+        """
+        _, newest = cls.version_range()
+        keep_from = cls.objects.filter(created__gte=before).aggregate(
+            version=Min("version")
+        )["version"]
+        cutoff = min(keep_from or newest, newest)
+        count, _ = cls.objects.filter(version__lt=cutoff).delete()
+        return count
@@ -14,7 +14,24 @@ function downloadPDF() {
     });
 }
 
+function renderQRCode() {
+    // Signed payload for scanning at inspection; see cards.utility.card_payload
+    var element = document.getElementById('card-qr');
+    if (!element || typeof QRCode === 'undefined') {
+        return;
+    }
+
+    new QRCode(element, {
+        text: element.dataset.payload,
+        width: 160,
+        height: 160,
+        correctLevel: QRCode.CorrectLevel.M
+    });
+}
+
 document.addEventListener('DOMContentLoaded', function () {
+    renderQRCode();
+
     var printButton = document.getElementById('print-button');
     printButton.addEventListener('click', function () {
         printCard();
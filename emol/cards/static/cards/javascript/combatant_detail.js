@@ -28,31 +28,7 @@ function form_loaded() {
             });
         });
 
-    // If can update card info
-    $(".card-date").datepicker({ format: "yyyy-mm-dd", autoclose: true })
-        .on('changeDate', function (event) {
-            var discipline = $(this).data("discipline"),
-                uuid = $("#uuid").val(),
-                url = '/api/card-date/' + uuid + "/",
-                data = {
-                    date_issued: $(this).val(),
-                    uuid: uuid,
-                    discipline_slug: discipline,
-                };
-
-            $.ajax({
-                url: url,
-                method: 'PUT',
-                data: JSON.stringify(data),
-                dataType: 'json',
-                contentType: 'application/json; charset=UTF-8',
-                headers: { "X-CSRFToken": csrf_token() },
-                success: function (response, status, xhr) {
-                    toastr.success("Card date updated");
-                },
-                error: function (xhr, status, error) {
-                    toastr.error("Error updating card date: " + error);
-                },
-            });
-        });
+    // Card dates are saved with the rest of the card changes (see
+    // combatant_list.js)
+    $(".card-date").datepicker({ format: "yyyy-mm-dd", autoclose: true });
 };
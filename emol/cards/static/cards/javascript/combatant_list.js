@@ -1,6 +1,13 @@
 (function ($) {
     "use strict";
 
+    /*
+     * Unsaved card changes on the discipline tabs, as batch operations
+     * keyed by the id of the checkbox or date field they came from.
+     * Save sends them all to /api/batch/ in one request.
+     */
+    var card_changes = {};
+
     function csrf_token() {
         return $("[name=csrfmiddlewaretoken]").val();
     }
@@ -8,9 +15,9 @@
     /*
      * Logic to determine whether the save button should be shown
      * on the combatant detail form or not.
-     * Since authorizations and marshal status changes via AJAX call
-     * as they are checked and unchecked, the Save button is of no use
-     * on the discipline tabs, so we want to hide the Save button there
+     * The Info tab saves the combatant's details; the discipline tabs
+     * save the card changes made on them, so the Save button shows on
+     * the discipline tabs only when there are changes to save
      *
      * Also disable discipline tabs if there is no combatant UUID
      * (i.e. a new combatant has not yet been saved)
@@ -23,15 +30,31 @@
         } else {
             $("a.discipline-tab-link").addClass("disabled");
         }
-        
-        // Only show save button on the Info tab
-        if ($("#info-tab").hasClass("active")) {
+
+        if ($("#info-tab").hasClass("active") || has_card_changes()) {
             $(".btn-save").removeClass("hidden").show();
         } else {
             $(".btn-save").addClass("hidden").hide();
         }
     }
 
+    function has_card_changes() {
+        return Object.keys(card_changes).length > 0;
+    }
+
+    /*
+     * Save whatever the tab that is showing edits
+     */
+    function save_clicked() {
+        if ($("#info-tab").hasClass("active")) {
+            submit_combatant_info(function () {
+                save_button();
+            });
+        } else {
+            submit_card_changes();
+        }
+    }
+
     function combatant_url(uuid) {
         var url = "/api/combatant/";
         if (uuid) {
@@ -40,6 +63,10 @@
         return url;
     }
 
+    function combatant_bundle_url(uuid) {
+        return "/api/combatant-bundle/" + uuid + "/";
+    }
+
     function waiver_url(uuid) {
         var url = "/api/waiver/";
         if (uuid) {
@@ -49,20 +76,18 @@
     }
 
     function load_combatant(uuid) {
+        card_changes = {};
+
         $("#edit-form").load("/combatant-detail", function () {
             var $combatant_detail = $("#combatant-detail");
 
             // Ensure the save button click event is properly bound
-            $combatant_detail.find(".btn-save").on("click", function () {
-                // Submit the form that is showing
-                if ($("#info-tab").hasClass("active")) {
-                    submit_combatant_info(function () {
-                        save_button();
-                    });
-                }
-            });
+            $combatant_detail.find(".btn-save").on("click", save_clicked);
 
             $combatant_detail.find(".btn-close").click(function () {
+                if (has_card_changes() && !confirm("Discard unsaved card changes?")) {
+                    return;
+                }
                 $combatant_detail.modal("hide");
                 $("#combatant-list").DataTable().ajax.reload(false);
             });
@@ -70,27 +95,19 @@
                 $combatant_detail.remove();
             });
 
+            if (!uuid) {
+                show_combatant(null);
+                return;
+            }
+
+            // One request for the combatant, waiver and cards
             $.ajax({
-                url: combatant_url(uuid),
+                url: combatant_bundle_url(uuid),
                 method: "GET",
                 success: function (data, status, jqXHR) {
-                    populate(data, null);
-                    $("#edit-combatant-form").validate({ ignore: "" });
-                    $("#combatant-title").text(data.sca_name || data.legal_name);
-                    $(".datepicker").datepicker({
-                        format: "yyyy-mm-dd",
-                        autoclose: true,
-                        todayHighlight: true,
-                        clearBtn: true
-                    }).on('changeDate', function(e) {
-                        // Trigger validation when date changes
-                        $(this).valid();
-                    });
-                    $combatant_detail.modal("show");
-                    fetch_combatant_cards();
-                    fetch_waiver_date();
-                    form_loaded();
-                    save_button();
+                    show_combatant(data.combatant);
+                    populate_waiver(data.waiver);
+                    populate_cards(data.cards);
                 },
                 error: function (jqXHR, status, error) {
                     toastr.error("Error loading combatant: " + error);
@@ -99,6 +116,70 @@
         });
     }
 
+    function show_combatant(combatant) {
+        var $combatant_detail = $("#combatant-detail");
+
+        if (combatant) {
+            populate(combatant, null);
+            $("#combatant-title").text(combatant.sca_name || combatant.legal_name);
+        }
+        $("#edit-combatant-form").validate({ ignore: "" });
+        $(".datepicker").datepicker({
+            format: "yyyy-mm-dd",
+            autoclose: true,
+            todayHighlight: true,
+            clearBtn: true
+        }).on('changeDate', function(e) {
+            // Trigger validation when date changes
+            $(this).valid();
+        });
+        $combatant_detail.modal("show");
+        form_loaded();
+        save_button();
+    }
+
+    function populate_waiver(waiver) {
+        $("#date_signed").val("");
+        $("#expiration_date").val("");
+
+        if (waiver && waiver.date_signed) {
+            populate(waiver, null);
+            $("#waiver-date-form").validate({ ignore: "" });
+        }
+    }
+
+    function populate_cards(cards) {
+        $(".combatant-authorization").attr("selected", null);
+
+        cards.forEach((card) => {
+            var discipline = card.discipline.slug;
+            var discipline_selector = "[data-discipline=" + discipline + "]";
+            $('[name=date_issued_' + discipline + ']').val(card.date_issued);
+            $('[name=card_uuid_' + discipline + ']').val(card.uuid);
+
+            card.authorizations.forEach((auth) => {
+                var authorization_selector = "[data-authorization=" + auth.slug + "]",
+                    $checkbox = $(
+                        ".combatant-authorization" +
+                        discipline_selector +
+                        authorization_selector
+                    );
+                $checkbox.attr("data-uuid", auth.uuid);
+                $checkbox.attr("checked", "");
+            });
+            card.warrants.forEach((warrant) => {
+                var marshal_selector = "[data-marshal=" + warrant.slug + "]",
+                    $checkbox = $(
+                        ".combatant-marshal" +
+                        discipline_selector +
+                        marshal_selector
+                    );
+                $checkbox.attr("data-uuid", warrant.uuid);
+                $checkbox.attr("checked", "");
+            });
+        });
+    }
+
     function fetch_waiver_date() {
         var uuid = $("#uuid").val();
 
@@ -131,54 +212,6 @@
         });
     }
 
-    function fetch_combatant_cards() {
-        // Get the combatant's cards, if any
-        var uuid = $("#uuid").val();
-
-        if (!uuid) {
-            return;
-        }
-
-        $.ajax({
-            url: "/api/combatant-cards/" + uuid + "/",
-            method: "GET",
-            success: function (data, status, jqXHR) {
-                $(".combatant-authorization").attr("selected", null);
-
-                data.forEach((card) => {
-                    var discipline = card.discipline.slug;
-                    var discipline_selector = "[data-discipline=" + discipline + "]";
-                    $('[name=date_issued_' + discipline + ']').val(card.date_issued);
-                    $('[name=card_uuid_' + discipline + ']').val(card.uuid);
-
-                    card.authorizations.forEach((auth) => {
-                        var authorization_selector = "[data-authorization=" + auth.slug + "]",
-                            $checkbox = $(
-                                ".combatant-authorization" +
-                                discipline_selector +
-                                authorization_selector
-                            );
-                        $checkbox.attr("data-uuid", auth.uuid);
-                        $checkbox.attr("checked", "");
-                    });
-                    card.warrants.forEach((warrant) => {
-                        var marshal_selector = "[data-marshal=" + warrant.slug + "]",
-                            $checkbox = $(
-                                ".combatant-marshal" +
-                                discipline_selector +
-                                marshal_selector
-                            );
-                        $checkbox.attr("data-uuid", warrant.uuid);
-                        $checkbox.attr("checked", "");
-                    });
-                });
-            },
-            error: function (jqXHR, status, error) {
-                toastr.error("Error fetching combatant cards: " + error);
-            }
-        });
-    }
-
     /**
      * Clean a phone number string, removing non-digit characters
      * @param phone {string} The phone number string
@@ -294,72 +327,105 @@
 
     /**
      * Option click handler for authorization and warrant checkboxes.
-     * Performs an AJAX update to the combatant's card to add/remove the
-     * authorization or warrant
+     * Notes the change to send when the card is saved; checking a box
+     * back to how it was saved drops the change again
      *
      * @param $checkbox {jQuery} The (un)checked checkbox
      */
     function auth_warrant_clicked($checkbox) {
-        var url = "/api/" + $checkbox.data("endpoint") + "/" + $checkbox.data("discipline") + "/",
+        var id = $checkbox.attr("id"),
+            kind = $checkbox.hasClass("combatant-marshal") ? "warrant" : "authorization",
+            field = kind === "warrant" ? "marshal" : "authorization",
             is_checked = $checkbox.is(":checked"),
-            thing = $checkbox.data("authorization") || $checkbox.data("marshal");
+            was_saved = Boolean($checkbox.data("uuid"));
 
-        // If checked, we'll POST a new combatant authorization or warrant
-        // if unchecked, DELETE by combatant authorization or warrant UUID
-        if (is_checked) {
-            var data = {
+        if (is_checked === was_saved) {
+            delete card_changes[id];
+        } else {
+            card_changes[id] = {
+                op: (is_checked ? "add_" : "remove_") + kind,
                 combatant_uuid: $("#uuid").val(),
                 discipline: $checkbox.data("discipline"),
-                // Only one of these two will show up in the 
-                // payload depending on what was clicked
-                authorization: $checkbox.data("authorization"),
-                marshal: $checkbox.data("marshal"),
             };
-            $.ajax({
-                method: "POST",
-                url: url,
-                dataType: "json",
-                contentType: "application/json; charset=UTF-8",
-                data: JSON.stringify(data),
-                headers: { "X-CSRFToken": csrf_token() },
-                success: function (response) {
-                    $checkbox.data("uuid", response.uuid);
-                    toastr.success("Added " + thing);
-                },
-                error: function (xhr, status, error) {
-                    toastr.error("Error adding " + thing + ": " + error);
-                    $checkbox.prop("checked", false);
-                }
-            });
+            card_changes[id][field] = $checkbox.data(field);
+        }
+        save_button();
+    }
+
+    /**
+     * Card date change handler; the new date is sent when the card is saved
+     *
+     * @param $input {jQuery} The card date field
+     */
+    function card_date_changed($input) {
+        if (!$input.val()) {
+            delete card_changes[$input.attr("id")];
         } else {
-            url += $checkbox.data("uuid") + "/";
+            card_changes[$input.attr("id")] = {
+                op: "set_card_date",
+                combatant_uuid: $("#uuid").val(),
+                discipline: $input.data("discipline"),
+                date_issued: $input.val(),
+            };
+        }
+        save_button();
+    }
 
-            $.ajax({
-                method: "DELETE",
-                url: url,
-                headers: { "X-CSRFToken": csrf_token() },
-                success: function (response) {
-                    $checkbox.removeData("uuid");
-                    toastr.success("Removed " + thing);
-                },
-                error: function (xhr, status, error) {
-                    toastr.error("Error removing " + thing + ": " + error);
-                    $checkbox.prop("checked", true);
-                }
-            });
+    /**
+     * Send every unsaved card change in one batch request. The batch is
+     * applied all or nothing, so on an error the changes stay pending.
+     */
+    function submit_card_changes() {
+        var ids = Object.keys(card_changes),
+            $submitButton = $(".btn-save");
+
+        if (!ids.length || $submitButton.prop("disabled")) {
+            return;
         }
+
+        $submitButton.prop("disabled", true);
+        $submitButton.html('<i class="fa fa-spinner fa-spin"></i> Saving...');
+
+        $.ajax({
+            method: "POST",
+            url: "/api/batch/",
+            dataType: "json",
+            contentType: "application/json; charset=UTF-8",
+            data: JSON.stringify({
+                operations: ids.map(function (id) { return card_changes[id]; })
+            }),
+            headers: { "X-CSRFToken": csrf_token() },
+            success: function (response) {
+                // Results come back in the order the operations were sent
+                ids.forEach(function (id, index) {
+                    var op = card_changes[id].op,
+                        $element = $(document.getElementById(id));
+
+                    if (op.indexOf("add_") === 0) {
+                        $element.data("uuid", response.results[index].uuid);
+                    } else if (op.indexOf("remove_") === 0) {
+                        $element.data("uuid", "");
+                    }
+                });
+                card_changes = {};
+                toastr.success("Card changes saved");
+            },
+            error: function (xhr, status, error) {
+                var detail = xhr.responseJSON && xhr.responseJSON.detail;
+                toastr.error("Error saving card changes: " + (detail || error));
+            },
+            complete: function () {
+                $submitButton.prop("disabled", false);
+                $submitButton.html("Save");
+                save_button();
+            }
+        });
     }
 
     // Add a dedicated function to initialize form buttons and events
     function initializeFormEvents() {
         // Ensure the save button is properly bound
-        $(".btn-save").off("click").on("click", function() {
-            if ($("#info-tab").hasClass("active")) {
-                submit_combatant_info(function() {
-                    save_button();
-                });
-            }
-        });
+        $(".btn-save").off("click").on("click", save_clicked);
         
         // Make sure the save button visibility is set correctly
         save_button();
@@ -678,6 +744,11 @@
         }
     );
 
+    // Change the date on a card
+    $(document).on("changeDate", ".card-date", function () {
+        card_date_changed($(this));
+    });
+
     // Update the save button when the tab is changed
     $(document).on("shown.bs.tab", "a[data-toggle='tab']", function (e) {
         save_button();
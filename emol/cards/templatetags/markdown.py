@@ -1,4 +1,3 @@
-import markdown as md
 from django import template
 from django.template.defaultfilters import stringfilter
 
@@ -8,4 +7,6 @@ register = template.Library()
 @register.filter()
 @stringfilter
 def markdown(value):
+    import markdown as md  # pylint: disable=import-outside-toplevel
+
     return md.markdown(value, extensions=["markdown.extensions.fenced_code"])
@@ -9,16 +9,22 @@ from cards.models import (
     Card,
     Combatant,
     CombatantAuthorization,
+    CombatantWarrant,
     Discipline,
     Marshal,
     OneTimeCode,
     Permission,
     Region,
+    Reminder,
     UserPermission,
     Waiver,
 )
 from cards.utility.time import today
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from feature_switches.models import (
     ACCESS_MODE_DISABLED,
@@ -142,6 +148,368 @@ class CardAPITestCase(TestCase):
         self.assertEqual(response.data[0]["discipline"]["name"], "Test Combat")
 
 
+class CombatantBundleAPITestCase(TestCase):
+    """Tests for the combatant detail bundle API."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.client = APIClient()
+        self.user = SSOUser.objects.create_superuser(email="admin@example.com")
+        self.combatant = Combatant.objects.create(
+            sca_name="Test Fighter",
+            legal_name="Test Legal",
+            email="test@example.com",
+            accepted_privacy_policy=True,
+        )
+        self.url = reverse(
+            "combatant-bundle-detail", kwargs={"uuid": self.combatant.uuid}
+        )
+
+    def add_card(self, name):
+        discipline = Discipline.objects.create(name=name, slug=name.lower())
+        authorization = Authorization.objects.create(
+            name=f"{name} Auth", slug=f"{name.lower()}-auth", discipline=discipline
+        )
+        marshal = Marshal.objects.create(
+            name=f"{name} Marshal",
+            slug=f"{name.lower()}-marshal",
+            discipline=discipline,
+        )
+        card = Card.objects.create(
+            combatant=self.combatant, discipline=discipline, date_issued=today()
+        )
+        CombatantAuthorization.objects.create(card=card, authorization=authorization)
+        CombatantWarrant.objects.create(card=card, marshal=marshal)
+
+    def test_bundle_contents(self):
+        """Bundle includes combatant, waiver and cards."""
+        Waiver.objects.create(combatant=self.combatant, date_signed=today())
+        self.add_card("Rapier")
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["combatant"]["sca_name"], "Test Fighter")
+        self.assertEqual(response.data["waiver"]["date_signed"], str(today()))
+        card = response.data["cards"][0]
+        self.assertEqual(card["discipline"]["slug"], "rapier")
+        self.assertEqual(card["authorizations"][0]["slug"], "rapier-auth")
+        self.assertEqual(card["warrants"][0]["slug"], "rapier-marshal")
+
+    def test_bundle_without_waiver(self):
+        """Bundle has a null waiver when none is on file."""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url)
+        self.assertIsNone(response.data["waiver"])
+        self.assertEqual(response.data["cards"], [])
+
+    def test_bundle_query_count_is_fixed(self):
+        """Query count doesn't grow with the number of cards."""
+        self.client.force_authenticate(user=self.user)
+        self.add_card("Rapier")
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+
+        self.add_card("Armoured")
+        self.add_card("Archery")
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data["cards"]), 3)
+
+    def test_bundle_etag(self):
+        """A matching ETag gets a 304 until the bundle changes."""
+        self.client.force_authenticate(user=self.user)
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.add_card("Rapier")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(NO_ENFORCE_PERMISSIONS=False)
+    def test_bundle_requires_permission(self):
+        """Users without read_combatant_info are refused."""
+        user = SSOUser.objects.create_user(email="user@example.com")
+        self.client.force_authenticate(user=user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class CombatantBatchAPITestCase(TestCase):
+    """Tests for the batch card edit API."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.client = APIClient()
+        self.user = SSOUser.objects.create_superuser(email="admin@example.com")
+        self.client.force_authenticate(user=self.user)
+        self.combatant = Combatant.objects.create(
+            sca_name="Test Fighter",
+            legal_name="Test Legal",
+            email="test@example.com",
+            accepted_privacy_policy=True,
+        )
+        self.uuid = str(self.combatant.uuid)
+        self.rapier = Discipline.objects.create(name="Rapier", slug="rapier")
+        for slug in ("heavy-rapier", "cut-and-thrust"):
+            Authorization.objects.create(name=slug, slug=slug, discipline=self.rapier)
+        Marshal.objects.create(
+            name="Rapier Marshal", slug="rapier-marshal", discipline=self.rapier
+        )
+        self.url = reverse("batch")
+
+    def post(self, *operations):
+        return self.client.post(
+            self.url, {"operations": list(operations)}, format="json"
+        )
+
+    def test_full_card_edit(self):
+        """One batch creates the card, auths, warrant and waiver."""
+        date_issued = today() - timedelta(days=30)
+        response = self.post(
+            {
+                "op": "add_authorization",
+                "combatant_uuid": self.uuid,
+                "discipline": "rapier",
+                "authorization": "heavy-rapier",
+            },
+            {
+                "op": "add_authorization",
+                "combatant_uuid": self.uuid,
+                "discipline": "rapier",
+                "authorization": "cut-and-thrust",
+            },
+            {
+                "op": "add_warrant",
+                "combatant_uuid": self.uuid,
+                "discipline": "rapier",
+                "marshal": "rapier-marshal",
+            },
+            {
+                "op": "set_card_date",
+                "combatant_uuid": self.uuid,
+                "discipline": "rapier",
+                "date_issued": str(date_issued),
+            },
+            {
+                "op": "set_waiver_date",
+                "combatant_uuid": self.uuid,
+                "date_signed": str(today()),
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual(len(results), 5)
+        card = Card.objects.get(combatant=self.combatant)
+        self.assertEqual(card.date_issued, date_issued)
+        self.assertEqual(card.authorizations.count(), 2)
+        self.assertEqual(
+            str(CombatantWarrant.objects.get(card=card).uuid), results[2]["uuid"]
+        )
+        self.assertEqual(self.combatant.waiver.date_signed, today())
+        self.assertEqual(Reminder.objects.count(), 2 * len(settings.REMINDER_DAYS))
+        self.assertEqual(
+            set(
+                Reminder.objects.filter(
+                    content_type__model="card", object_id=card.id
+                ).values_list("due_date", flat=True)
+            ),
+            {
+                card.expiration_date - timedelta(days=days)
+                for days in settings.REMINDER_DAYS
+            },
+        )
+
+    def test_query_count_independent_of_operations(self):
+        """Adding more auths to a batch doesn't add queries."""
+        op = {
+            "op": "add_authorization",
+            "combatant_uuid": self.uuid,
+            "discipline": "rapier",
+            "authorization": "heavy-rapier",
+        }
+        with CaptureQueriesContext(connection) as one:
+            self.post(op)
+        Card.objects.all().delete()
+
+        with CaptureQueriesContext(connection) as two:
+            self.post(op, dict(op, authorization="cut-and-thrust"))
+        self.assertEqual(len(one), len(two))
+
+    def test_remove_last_relation_deletes_card(self):
+        """Removing everything from a card deletes it and its reminders."""
+        card = Card.objects.create(
+            combatant=self.combatant, discipline=self.rapier, date_issued=today()
+        )
+        CombatantAuthorization.objects.create(
+            card=card, authorization=Authorization.objects.get(slug="heavy-rapier")
+        )
+        self.assertTrue(Reminder.objects.filter(object_id=card.id).exists())
+
+        response = self.post(
+            {
+                "op": "remove_authorization",
+                "combatant_uuid": self.uuid,
+                "discipline": "rapier",
+                "authorization": "heavy-rapier",
+            }
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Card.objects.exists())
+        self.assertFalse(Reminder.objects.exists())
+
+    def test_add_and_remove_leaves_no_new_card(self):
+        """Adding and removing on a new card in one batch drops the card."""
+        operation = {
+            "combatant_uuid": self.uuid,
+            "discipline": "rapier",
+            "authorization": "heavy-rapier",
+        }
+
+        response = self.post(
+            {"op": "add_authorization", **operation},
+            {"op": "remove_authorization", **operation},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Card.objects.exists())
+        self.assertFalse(Reminder.objects.exists())
+
+    def test_invalid_operation(self):
+        """Missing fields are a 400."""
+        response = self.post(
+            {"op": "add_warrant", "combatant_uuid": self.uuid, "discipline": "rapier"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_authorization_changes_nothing(self):
+        """An unknown reference fails the whole batch."""
+        response = self.post(
+            {
+                "op": "add_authorization",
+                "combatant_uuid": self.uuid,
+                "discipline": "rapier",
+                "authorization": "heavy-rapier",
+            },
+            {
+                "op": "add_authorization",
+                "combatant_uuid": self.uuid,
+                "discipline": "rapier",
+                "authorization": "longsword",
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Card.objects.exists())
+
+    @override_settings(NO_ENFORCE_PERMISSIONS=False)
+    def test_permission_denied_changes_nothing(self):
+        """A batch needing any permission the user lacks is refused."""
+        user = SSOUser.objects.create_user(email="user@example.com")
+        permission, _ = Permission.objects.get_or_create(
+            slug="write_authorizations",
+            defaults={"name": "Write authorizations", "is_global": False},
+        )
+        UserPermission.objects.create(
+            user=user, permission=permission, discipline=self.rapier
+        )
+        self.client.force_authenticate(user=user)
+
+        response = self.post(
+            {
+                "op": "add_authorization",
+                "combatant_uuid": self.uuid,
+                "discipline": "rapier",
+                "authorization": "heavy-rapier",
+            },
+            {
+                "op": "add_warrant",
+                "combatant_uuid": self.uuid,
+                "discipline": "rapier",
+                "marshal": "rapier-marshal",
+            },
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertIn("write_marshal (rapier)", response.data["detail"])
+        self.assertFalse(Card.objects.exists())
+
+
+class CombatantImportAPITestCase(TestCase):
+    """Tests for the combatant import API."""
+
+    CSV = (
+        "email,legal_name,phone,address1,city,postal_code,discipline,card_date\n"
+        "one@example.com,One,555,1 Main,Town,A1A 1A1,rapier,2026-01-01\n"
+        "two@example.com,Two,555,1 Main,Town,A1A 1A1,archery,2026-01-01\n"
+    )
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.client = APIClient()
+        self.user = SSOUser.objects.create_superuser(email="admin@example.com")
+        self.rapier = Discipline.objects.create(name="Rapier", slug="rapier")
+        Discipline.objects.create(name="Archery", slug="archery")
+        self.url = reverse("combatant-import")
+
+    def upload(self, **data):
+        upload = SimpleUploadedFile("combatants.csv", self.CSV.encode())
+        return self.client.post(self.url, {"file": upload, **data})
+
+    def test_import(self):
+        """Valid rows are imported and the report is returned."""
+        self.client.force_authenticate(user=self.user)
+        response = self.upload()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["imported"], 2)
+        self.assertEqual(Card.objects.count(), 2)
+
+    def test_dry_run(self):
+        """A dry run reports without importing."""
+        self.client.force_authenticate(user=self.user)
+        response = self.upload(dry_run=True)
+
+        self.assertEqual(response.data["imported"], 2)
+        self.assertFalse(Combatant.objects.exists())
+
+    @override_settings(NO_ENFORCE_PERMISSIONS=False)
+    def test_import_limited_to_permitted_disciplines(self):
+        """Cards are only imported for disciplines with can_import."""
+        user = SSOUser.objects.create_user(email="user@example.com")
+        write, _ = Permission.objects.get_or_create(
+            slug="write_combatant_info",
+            defaults={"name": "Write combatant info", "is_global": True},
+        )
+        can_import, _ = Permission.objects.get_or_create(
+            slug="can_import",
+            defaults={"name": "Can import combatants", "is_global": False},
+        )
+        UserPermission.objects.create(user=user, permission=write)
+        UserPermission.objects.create(
+            user=user, permission=can_import, discipline=self.rapier
+        )
+        self.client.force_authenticate(user=user)
+
+        response = self.upload()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["imported"], 1)
+        self.assertEqual(response.data["errors"][0]["row"], 2)
+
+    @override_settings(NO_ENFORCE_PERMISSIONS=False)
+    def test_import_requires_permission(self):
+        """Users without can_import are refused."""
+        user = SSOUser.objects.create_user(email="user@example.com")
+        self.client.force_authenticate(user=user)
+        response = self.upload()
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
 class CardDateAPITestCase(TestCase):
     """Tests for the card date update API."""
 
@@ -200,6 +568,63 @@ class CardDateAPITestCase(TestCase):
         self.assertEqual(card.date_issued, new_date)
 
 
+class CardRenewalAPITestCase(TestCase):
+    """Tests for the bulk card renewal API."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.client = APIClient()
+        self.user = SSOUser.objects.create_superuser(email="admin@example.com")
+        self.discipline = Discipline.objects.create(
+            name="Test Combat", slug="test-combat"
+        )
+        self.combatant = Combatant.objects.create(
+            sca_name="Test Fighter",
+            legal_name="Test Legal",
+            email="test@example.com",
+            accepted_privacy_policy=True,
+        )
+        self.card = Card.objects.create(
+            combatant=self.combatant,
+            discipline=self.discipline,
+            date_issued=today() - timedelta(days=100),
+        )
+
+    def test_renewal(self):
+        """Cards are renewed and combatants without one are reported."""
+        self.client.force_authenticate(user=self.user)
+        missing = str(uuid.uuid4())
+        response = self.client.post(
+            reverse("card-renewal"),
+            {
+                "discipline_slug": "test-combat",
+                "combatant_uuids": [str(self.combatant.uuid), missing],
+                "date_issued": str(today() - timedelta(days=1)),
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"renewed": 1, "not_found": [missing]})
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.date_issued, today() - timedelta(days=1))
+
+    @override_settings(NO_ENFORCE_PERMISSIONS=False)
+    def test_renewal_requires_permission(self):
+        """Users without write_card_date for the discipline are refused."""
+        user = SSOUser.objects.create_user(email="user@example.com")
+        self.client.force_authenticate(user=user)
+        response = self.client.post(
+            reverse("card-renewal"),
+            {
+                "discipline_slug": "test-combat",
+                "combatant_uuids": [str(self.combatant.uuid)],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
 class WaiverAPITestCase(TestCase):
     """Tests for the waiver API."""
 
@@ -0,0 +1,226 @@
+"""Tests for signed card QR payloads and the card-verify API."""
+
+import json
+
+from cards.api.card_verify import MAX_LOOKUPS
+from cards.models import (
+    Authorization,
+    Card,
+    Combatant,
+    CombatantAuthorization,
+    CombatantWarrant,
+    Discipline,
+    Marshal,
+    Waiver,
+)
+from cards.utility import card_payload, signing
+from cards.utility.card_payload import PayloadError, make_payload, read_payload
+from cards.utility.time import add_years, today
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from sso_user.models import SSOUser
+
+
+class CardPayloadTestCase(TestCase):
+    """Tests for cards.utility.card_payload and the card-verify API."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse("card-verify")
+
+        self.rapier = Discipline.objects.create(name="Rapier", slug="rapier")
+        self.armoured = Discipline.objects.create(
+            name="Armoured Combat", slug="armoured-combat"
+        )
+        self.combatant = Combatant.objects.create(
+            sca_name="Alys",
+            legal_name="Alys Legal",
+            email="alys@example.com",
+            card_id="alys-card",
+            accepted_privacy_policy=True,
+        )
+        Waiver.objects.create(combatant=self.combatant, date_signed=today())
+        self.card = Card.objects.create(
+            combatant=self.combatant, discipline=self.rapier, date_issued=today()
+        )
+        Card.objects.create(
+            combatant=self.combatant,
+            discipline=self.armoured,
+            date_issued=add_years(today(), -3),
+        )
+        cache.clear()
+
+    def verify(self, payload):
+        return self.client.get(self.url, {"payload": payload})
+
+    def test_payload_round_trip(self):
+        printed = read_payload(make_payload("alys-card"))
+
+        self.assertEqual(printed["card_id"], "alys-card")
+        self.assertEqual(printed["sca_name"], "Alys")
+        self.assertEqual(printed["signed"], today().isoformat())
+        self.assertEqual(
+            printed["disciplines"],
+            [
+                {
+                    "slug": "armoured-combat",
+                    "expiry": add_years(today(), -1).isoformat(),
+                },
+                {"slug": "rapier", "expiry": add_years(today(), 2).isoformat()},
+            ],
+        )
+        self.assertNotIn("Legal", make_payload("alys-card"))
+        self.assertIsNone(make_payload("no-such-card"))
+
+    def test_tampered_payload(self):
+        payload = make_payload("alys-card")
+        prefix, encoded, signature = payload.split(".")
+        body = json.loads(signing.b64decode(encoded))
+        body["d"][0][1] = "2099-01-01"
+        forged = ".".join(
+            [prefix, signing.b64encode(json.dumps(body).encode()), signature]
+        )
+
+        for bad in (forged, "EMOL1.abc", "EMOL9.abc.def", "junk"):
+            with self.assertRaises(PayloadError):
+                read_payload(bad)
+
+        response = self.verify(forged)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_verify(self):
+        response = self.verify(make_payload("alys-card"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["valid"])
+        self.assertEqual(
+            [
+                (discipline["slug"], discipline["valid"])
+                for discipline in response.data["disciplines"]
+            ],
+            [("armoured-combat", False), ("rapier", True)],
+        )
+        self.assertEqual(response.data["printed"]["card_id"], "alys-card")
+
+    def test_verify_uses_one_query_then_cache(self):
+        payload = make_payload("alys-card")
+        cache.clear()
+
+        def card_queries():
+            with CaptureQueriesContext(connection) as queries:
+                self.verify(payload)
+            return [query for query in queries if "cards_" in query["sql"]]
+
+        self.assertEqual(len(card_queries()), 1)
+        self.assertEqual(card_queries(), [])
+
+    def test_change_drops_cached_status(self):
+        payload = make_payload("alys-card")
+        self.assertTrue(card_payload.card_status("alys-card")["valid"])
+
+        self.card.date_issued = add_years(today(), -3)
+        self.card.save()
+
+        response = self.verify(payload)
+        self.assertFalse(response.data["valid"])
+
+    def test_verify_deleted_card(self):
+        payload = make_payload("alys-card")
+        self.combatant.delete()
+
+        response = self.verify(payload)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data["printed"]["sca_name"], "Alys")
+
+    def test_card_page_includes_payload(self):
+        response = self.client.get(reverse("combatant-card", args=["alys-card"]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        read_payload(response.context["card_payload"])
+        self.assertContains(response, 'id="card-qr"')
+
+
+class CardLookupAPITestCase(TestCase):
+    """Tests for the batch card-lookup API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = SSOUser.objects.create_user(email="marshal@example.com")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("card-lookup")
+
+        self.rapier = Discipline.objects.create(name="Rapier", slug="rapier")
+        self.authorization = Authorization.objects.create(
+            name="Heavy Rapier", slug="heavy-rapier", discipline=self.rapier
+        )
+        self.marshal = Marshal.objects.create(
+            name="Rapier Marshal", slug="rapier-marshal", discipline=self.rapier
+        )
+        self.add_combatant(1)
+
+    def add_combatant(self, number, waiver=True):
+        combatant = Combatant.objects.create(
+            sca_name=f"Fighter {number}",
+            legal_name=f"Legal {number}",
+            email=f"fighter{number}@example.com",
+            card_id=f"card-{number}",
+            accepted_privacy_policy=True,
+        )
+        if waiver:
+            Waiver.objects.create(combatant=combatant, date_signed=today())
+        card = Card.objects.create(
+            combatant=combatant, discipline=self.rapier, date_issued=today()
+        )
+        CombatantAuthorization.objects.create(
+            card=card, authorization=self.authorization
+        )
+        CombatantWarrant.objects.create(card=card, marshal=self.marshal)
+        return combatant
+
+    def lookup(self, cards):
+        return self.client.post(self.url, {"cards": cards}, format="json")
+
+    def test_lookup(self):
+        self.add_combatant(2, waiver=False)
+
+        response = self.lookup(
+            ["card-1", make_payload("card-2"), "no-such-card", "EMOL1.bad.payload"]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first, second, unknown, bad = response.data["results"]
+        self.assertTrue(first["valid"])
+        self.assertEqual(first["disciplines"][0]["authorizations"], ["heavy-rapier"])
+        self.assertEqual(first["disciplines"][0]["warrants"], ["rapier-marshal"])
+        self.assertEqual(second["card_id"], "card-2")
+        self.assertFalse(second["valid"])
+        self.assertIsNone(second["waiver_expiry"])
+        self.assertEqual(unknown, {"found": False, "card_id": "no-such-card"})
+        self.assertFalse(bad["found"])
+        self.assertIn("error", bad)
+
+    def test_query_count_independent_of_cards(self):
+        def count(cards):
+            with CaptureQueriesContext(connection) as queries:
+                self.lookup(cards)
+            return len(queries)
+
+        few = count(["card-1"])
+        for number in range(2, 12):
+            self.add_combatant(number)
+        self.assertEqual(count([f"card-{n}" for n in range(1, 12)]), few)
+
+    def test_too_many_cards(self):
+        response = self.lookup(["card-1"] * (MAX_LOOKUPS + 1))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(user=None)
+        response = self.lookup(["card-1"])
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
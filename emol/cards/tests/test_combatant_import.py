@@ -0,0 +1,169 @@
+"""Tests for bulk combatant import."""
+
+import io
+import json
+from unittest.mock import patch
+
+from cards.models import (
+    Authorization,
+    Card,
+    Combatant,
+    Discipline,
+    Marshal,
+    Region,
+    Reminder,
+    Waiver,
+)
+from cards.utility.combatant_import import CombatantImporter, read_rows
+from cards.utility.time import today
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+CSV_HEADER = (
+    "email,sca_name,legal_name,phone,address1,address2,city,province,"
+    "postal_code,waiver_date,discipline,card_date,authorizations,warrants\n"
+)
+
+
+def csv_row(number, **overrides):
+    values = {
+        "email": f"fighter{number}@example.com",
+        "sca_name": f"Fighter {number}",
+        "legal_name": f"Legal {number}",
+        "phone": "555-1234",
+        "address1": "1 Main St",
+        "address2": "",
+        "city": "Toronto",
+        "province": "ON",
+        "postal_code": "M1M 1M1",
+        "waiver_date": str(today()),
+        "discipline": "rapier",
+        "card_date": str(today()),
+        "authorizations": "heavy-rapier;cut-and-thrust",
+        "warrants": "rapier-marshal",
+    }
+    values.update(overrides)
+    return ",".join(values.values()) + "\n"
+
+
+class CombatantImportTestCase(TestCase):
+    """Tests for CombatantImporter and read_rows."""
+
+    def setUp(self):
+        Region.objects.get_or_create(
+            code="ON", defaults={"name": "Ontario", "active": True}
+        )
+        self.rapier = Discipline.objects.create(name="Rapier", slug="rapier")
+        for slug in ("heavy-rapier", "cut-and-thrust"):
+            Authorization.objects.create(name=slug, slug=slug, discipline=self.rapier)
+        Marshal.objects.create(
+            name="Rapier Marshal", slug="rapier-marshal", discipline=self.rapier
+        )
+
+    def import_csv(self, *rows, **kwargs):
+        stream = io.StringIO(CSV_HEADER + "".join(rows))
+        return CombatantImporter(**kwargs).run(read_rows(stream, "csv"))
+
+    @patch("cards.models.combatant.send_privacy_policy")
+    def test_csv_import(self, mock_send):
+        report = self.import_csv(csv_row(1), csv_row(2))
+
+        self.assertEqual(report["imported"], 2)
+        self.assertEqual(report["errors"], [])
+        combatant = Combatant.objects.get(email="fighter1@example.com")
+        self.assertTrue(combatant.privacy_email_queued)
+        self.assertIsNotNone(combatant.privacy_acceptance_code)
+        self.assertEqual(combatant.waiver.date_signed, today())
+        card = Card.objects.get(combatant=combatant)
+        self.assertEqual(card.authorizations.count(), 2)
+        self.assertEqual(card.warrants.get().slug, "rapier-marshal")
+        self.assertEqual(Reminder.objects.count(), 4 * len(settings.REMINDER_DAYS))
+        mock_send.assert_not_called()
+
+    def test_json_lines_import(self):
+        rows = [
+            {
+                "email": "fighter@example.com",
+                "legal_name": "Legal",
+                "phone": "555-1234",
+                "address1": "1 Main St",
+                "city": "Toronto",
+                "province": "ON",
+                "postal_code": "M1M 1M1",
+                "cards": [
+                    {
+                        "discipline": "rapier",
+                        "date_issued": str(today()),
+                        "authorizations": ["heavy-rapier"],
+                    }
+                ],
+            },
+            "not an object",
+        ]
+        stream = io.StringIO("\n".join(json.dumps(row) for row in rows) + "\n{broken\n")
+
+        report = CombatantImporter().run(read_rows(stream, "json"))
+
+        self.assertEqual(report["imported"], 1)
+        self.assertEqual([error["row"] for error in report["errors"]], [2, 3])
+        self.assertFalse(Waiver.objects.exists())
+        self.assertEqual(Card.objects.get().authorizations.get().slug, "heavy-rapier")
+
+    def test_per_row_errors(self):
+        report = self.import_csv(
+            csv_row(1),
+            csv_row(2, province="XX"),
+            csv_row(3, authorizations="longsword"),
+        )
+
+        self.assertEqual(report["rows"], 3)
+        self.assertEqual(report["imported"], 1)
+        errors = {error["row"]: error["errors"] for error in report["errors"]}
+        self.assertEqual(sorted(errors), [2, 3])
+        self.assertIn("non_field_errors", errors[2])
+        self.assertIn("longsword", str(errors[3]["cards"]))
+
+    def test_shared_email(self):
+        """Combatants may share an email, in the file or with existing ones."""
+        Combatant.objects.create(
+            sca_name="Existing", legal_name="Existing", email="FIGHTER1@example.com"
+        )
+
+        report = self.import_csv(csv_row(1), csv_row(1, sca_name="Other Fighter"))
+
+        self.assertEqual(report["imported"], 2)
+        self.assertEqual(report["errors"], [])
+        self.assertEqual(
+            Combatant.objects.filter(email__iexact="fighter1@example.com").count(), 3
+        )
+
+    def test_dry_run_writes_nothing(self):
+        report = self.import_csv(csv_row(1), csv_row(2), dry_run=True)
+
+        self.assertTrue(report["dry_run"])
+        self.assertEqual(report["imported"], 2)
+        self.assertEqual(
+            Combatant.objects.filter(email__startswith="fighter").count(), 0
+        )
+
+    def test_disallowed_discipline(self):
+        report = self.import_csv(csv_row(1), allowed_disciplines=[])
+
+        self.assertEqual(report["imported"], 0)
+        self.assertIn("may not import", str(report["errors"][0]["errors"]["cards"]))
+
+    def test_query_count_is_per_chunk(self):
+        """Queries grow with chunks, not rows."""
+
+        def count(rows):
+            with CaptureQueriesContext(connection) as queries:
+                self.import_csv(*rows, chunk_size=100)
+            Combatant.objects.all().delete()
+            return len(queries)
+
+        self.assertEqual(
+            count([csv_row(n) for n in range(2)]),
+            count([csv_row(n) for n in range(20)]),
+        )
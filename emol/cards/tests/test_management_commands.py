@@ -1,26 +1,46 @@
+import json
+import os
+import shutil
+import tempfile
 from datetime import timedelta
 from io import StringIO
 from unittest.mock import patch
 
+from cards.management.commands.benchmark import BENCHMARK_USER
+from cards.management.commands.benchmark import Command as BenchmarkCommand
+from cards.management.commands.benchmark import percentile
 from cards.management.commands.clean_expired import Command as CleanExpiredCommand
+from cards.management.commands.load_test import split_requests, summarize
 from cards.management.commands.send_reminders import Command as SendRemindersCommand
+from cards.management.commands.startup_profile import parse_importtime
 from cards.management.commands.summarize_expiries import (
     Command as SummarizeExpiriesCommand,
 )
 from cards.models import (
     Authorization,
     Card,
+    CardIdAllocator,
     Combatant,
     Discipline,
+    Marshal,
     OneTimeCode,
     Reminder,
+    UserPermission,
     Waiver,
 )
+from cards.utility.load_test import parse_mix
+from cards.utility.names import namespace_size
+from cards.utility.scale_seed import SEED_EMAIL_DOMAIN, seed_pin
 from cards.utility.time import today, utc_tomorrow
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
-from django.core.management import call_command
-from django.test import TestCase, override_settings
+from django.contrib.sessions.models import Session
+from django.core.management import CommandError, call_command
+from django.test import LiveServerTestCase, TestCase, override_settings
 from django.utils import timezone
+from feature_switches.models import FeatureSwitch
+from query_budget import sampler
+from sso_user.models import SSOUser
 
 
 class CleanExpiredCommandTestCase(TestCase):
@@ -692,3 +712,489 @@ class PINMigrationCommandTestCase(TestCase):
 
         output = out.getvalue()
         self.assertNotIn("test2@example.com", output)
+
+
+class CardIdCapacityCommandTestCase(TestCase):
+    """Test the card_id_capacity management command."""
+
+    def test_reports_utilisation(self):
+        CardIdAllocator.objects.create(terms=3, next_index=100)
+
+        out = StringIO()
+        call_command("card_id_capacity", stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("Allocator position: 100", output)
+        self.assertIn("Utilisation: 0.5%", output)
+        self.assertNotIn("CARD_ID_FOURTH_TERM", output)
+
+    def test_warns_near_exhaustion(self):
+        CardIdAllocator.objects.create(terms=3, next_index=18000)
+
+        out = StringIO()
+        call_command("card_id_capacity", "--warn-at", "90", stdout=out)
+
+        self.assertIn("Enable CARD_ID_FOURTH_TERM", out.getvalue())
+
+    def test_other_namespace_not_counted(self):
+        for number in range(3):
+            Combatant.objects.create(
+                sca_name=f"Fighter {number}",
+                legal_name=f"Legal {number}",
+                email=f"fighter{number}@example.com",
+            )
+        CardIdAllocator.objects.create(terms=4, next_index=0)
+
+        out = StringIO()
+        with override_settings(CARD_ID_FOURTH_TERM=True):
+            call_command("card_id_capacity", stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("Card IDs issued: 3", output)
+        self.assertIn("Remaining: %s" % namespace_size(fourth_term=True), output)
+
+
+class ImportCombatantsCommandTestCase(TestCase):
+    """Test the import_combatants management command."""
+
+    def setUp(self):
+        Discipline.objects.create(name="Rapier", slug="rapier")
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "combatants.csv")
+        with open(self.path, "w", encoding="utf-8") as stream:
+            stream.write(
+                "email,legal_name,phone,address1,city,postal_code,discipline,"
+                "card_date\n"
+                "one@example.com,One,555,1 Main,Town,A1A 1A1,rapier,2026-01-01\n"
+                "two@example.com,Two,555,1 Main,Town,A1A 1A1,archery,2026-01-01\n"
+            )
+
+    def test_import(self):
+        out = StringIO()
+        call_command("import_combatants", self.path, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("Row 2:", output)
+        self.assertIn("Imported 1 of 2 rows (1 rejected)", output)
+        self.assertTrue(Card.objects.filter(combatant__email="one@example.com"))
+
+    def test_dry_run(self):
+        out = StringIO()
+        call_command("import_combatants", self.path, "--dry-run", stdout=out)
+
+        self.assertIn("Would import 1 of 2 rows", out.getvalue())
+        self.assertFalse(Combatant.objects.exists())
+
+
+class SeedScaleCommandTestCase(TestCase):
+    """Test the seed_scale management command."""
+
+    def setUp(self):
+        for name in ("Rapier", "Armoured Combat"):
+            discipline = Discipline.objects.create(name=name)
+            Authorization.objects.create(
+                name=f"{name} Primary", discipline=discipline, is_primary=True
+            )
+            Authorization.objects.create(name=f"{name} Extra", discipline=discipline)
+            Marshal.objects.create(name=f"{name} Marshal", discipline=discipline)
+
+    def snapshot(self):
+        return list(
+            Combatant.objects.order_by("email", "cards__discipline__name").values_list(
+                "email",
+                "sca_name",
+                "dob",
+                "cards__discipline__name",
+                "cards__date_issued",
+            )
+        )
+
+    def test_seed(self):
+        out = StringIO()
+        call_command("seed_scale", "60", "--chunk-size", "25", stdout=out)
+
+        self.assertIn("Seeded 60 combatants", out.getvalue())
+        self.assertEqual(Combatant.objects.count(), 60)
+        self.assertTrue(Card.objects.exists())
+        self.assertTrue(Waiver.objects.exists())
+        self.assertEqual(
+            Reminder.objects.count(),
+            (Card.objects.count() + Waiver.objects.count())
+            * len(settings.REMINDER_DAYS),
+        )
+        self.assertEqual(
+            Combatant.objects.exclude(card_id="").count(),
+            Combatant.objects.filter(accepted_privacy_policy=True).count(),
+        )
+        combatant = Combatant.objects.filter(pin_hash__isnull=False).first()
+        number = int(combatant.email[len("combatant") :].split("@")[0])
+        self.assertTrue(combatant.check_pin(seed_pin(number)))
+
+    def test_deterministic(self):
+        call_command("seed_scale", "30", "--seed", "7", stdout=StringIO())
+        first = self.snapshot()
+
+        Combatant.objects.all().delete()
+        call_command(
+            "seed_scale", "30", "--seed", "7", "--chunk-size", "7", stdout=StringIO()
+        )
+        self.assertEqual(self.snapshot(), first)
+
+    def test_appends(self):
+        call_command("seed_scale", "10", stdout=StringIO())
+        call_command("seed_scale", "5", stdout=StringIO())
+
+        self.assertTrue(Combatant.objects.filter(email__startswith="combatant000014"))
+        self.assertEqual(Combatant.objects.count(), 15)
+
+
+class BenchmarkCommandTestCase(TestCase):
+    """Test the benchmark management command."""
+
+    def setUp(self):
+        discipline = Discipline.objects.create(name="Rapier")
+        Authorization.objects.create(
+            name="Rapier Primary", discipline=discipline, is_primary=True
+        )
+        call_command("seed_scale", "40", stdout=StringIO())
+
+    def test_percentile(self):
+        values = [5, 1, 4, 2, 3]
+        self.assertEqual(percentile(values, 50), 3)
+        self.assertEqual(percentile(values, 99), 5)
+        self.assertEqual(percentile([7], 90), 7)
+
+    def test_report(self):
+        out = StringIO()
+        call_command(
+            "benchmark", "--iterations", "2", "--cold-iterations", "1", stdout=out
+        )
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["combatants"], 40)
+        self.assertEqual(set(report["paths"]), set(BenchmarkCommand.PATHS))
+        card = report["paths"]["combatant_card"]
+        self.assertEqual(card["warm"]["runs"], 2)
+        self.assertEqual(card["cold"]["runs"], 1)
+        self.assertGreater(card["cold"]["queries"], 0)
+        self.assertGreaterEqual(card["cold"]["queries"], card["warm"]["queries"])
+
+    def test_leaves_nothing_behind(self):
+        call_command(
+            "benchmark",
+            "--path",
+            "pin_check",
+            "--path",
+            "user_has_permission",
+            "--cold-iterations",
+            "0",
+            stdout=StringIO(),
+        )
+
+        self.assertFalse(SSOUser.objects.filter(email=BENCHMARK_USER).exists())
+        self.assertFalse(
+            FeatureSwitch.objects.filter(name="pin_authentication").exists()
+        )
+
+    def test_requires_seed(self):
+        Combatant.objects.all().delete()
+        with self.assertRaises(CommandError):
+            call_command("benchmark", stdout=StringIO())
+
+
+class LoadTestCommandTestCase(LiveServerTestCase):
+    """Test the load_test management command."""
+
+    def setUp(self):
+        discipline = Discipline.objects.create(name="Rapier")
+        Authorization.objects.create(
+            name="Rapier Primary", discipline=discipline, is_primary=True
+        )
+        call_command("seed_scale", "20", stdout=StringIO())
+
+    def test_parse_mix(self):
+        self.assertEqual(parse_mix("card=3, pin=1"), {"card": 3, "pin": 1})
+        with self.assertRaises(ValueError):
+            parse_mix("card=1,bogus=2")
+        with self.assertRaises(ValueError):
+            parse_mix("card=0")
+
+    def test_summarize(self):
+        report = summarize(
+            [("card", 200, 0.004), ("card", 429, 0.02), ("pin", None, 6.0)], 2
+        )
+
+        self.assertEqual(report["total"]["requests"], 3)
+        self.assertEqual(report["total"]["throughput_rps"], 1.5)
+        card = report["scenarios"]["card"]
+        self.assertEqual(card["throttled_rate"], 0.5)
+        self.assertEqual(card["error_rate"], 0)
+        self.assertEqual(card["histogram_ms"]["<=5"], 1)
+        self.assertEqual(card["histogram_ms"]["<=25"], 1)
+        self.assertEqual(report["scenarios"]["pin"]["histogram_ms"][">5000"], 1)
+        self.assertEqual(report["scenarios"]["pin"]["error_rate"], 1)
+
+    def test_split_requests(self):
+        self.assertEqual(split_requests(10, 4), [3, 3, 2, 2])
+        self.assertEqual(split_requests(2, 3), [1, 1, 0])
+
+    def test_load(self):
+        out = StringIO()
+        call_command(
+            "load_test",
+            "--url",
+            self.live_server_url,
+            "--confirm",
+            "--requests",
+            "21",
+            "--workers",
+            "4",
+            "--json",
+            stdout=out,
+        )
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["total"]["requests"], 21)
+        self.assertEqual(report["total"]["error_rate"], 0)
+
+        # The staff session and user made for the run are gone
+        self.assertFalse(Session.objects.exists())
+        self.assertFalse(
+            SSOUser.objects.filter(email__endswith=f"@{SEED_EMAIL_DOMAIN}").exists()
+        )
+
+    def test_existing_staff_user_kept(self):
+        user = SSOUser.objects.create(email="staff@example.com")
+        call_command(
+            "load_test",
+            "--url",
+            self.live_server_url,
+            "--confirm",
+            "--requests",
+            "1",
+            "--workers",
+            "1",
+            "--staff-email",
+            user.email,
+            stdout=StringIO(),
+        )
+
+        self.assertTrue(SSOUser.objects.filter(pk=user.pk).exists())
+        self.assertFalse(UserPermission.objects.filter(user=user).exists())
+
+    def test_requires_confirmation(self):
+        with self.assertRaises(CommandError):
+            call_command("load_test", "--url", self.live_server_url, stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command("load_test", "--confirm", stdout=StringIO())
+
+    def test_unreachable(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                "load_test",
+                "--url",
+                "http://localhost:1",
+                "--confirm",
+                stdout=StringIO(),
+            )
+
+
+class SendPrivacyEmailsCommandTestCase(TestCase):
+    """Test the send_privacy_emails management command."""
+
+    @patch("cards.management.commands.send_privacy_emails.send_privacy_policy")
+    def test_sends_queued_emails(self, mock_send):
+        mock_send.return_value = True
+        Combatant.objects.bulk_create(
+            [
+                Combatant(
+                    sca_name="Queued",
+                    legal_name="Queued",
+                    email="queued@example.com",
+                    privacy_email_queued=True,
+                ),
+                Combatant(
+                    sca_name="Accepted",
+                    legal_name="Accepted",
+                    email="accepted@example.com",
+                    accepted_privacy_policy=True,
+                    privacy_email_queued=True,
+                ),
+            ]
+        )
+
+        out = StringIO()
+        call_command("send_privacy_emails", stdout=out)
+
+        self.assertIn("Sent 1 privacy policy emails", out.getvalue())
+        self.assertEqual(mock_send.call_args[0][0].email, "queued@example.com")
+        self.assertFalse(Combatant.objects.filter(privacy_email_queued=True).exists())
+
+    @patch("cards.management.commands.send_privacy_emails.send_privacy_policy")
+    def test_failed_emails_stay_queued(self, mock_send):
+        mock_send.return_value = False
+        Combatant.objects.bulk_create(
+            [
+                Combatant(
+                    sca_name="Queued",
+                    legal_name="Queued",
+                    email="queued@example.com",
+                    privacy_email_queued=True,
+                )
+            ]
+        )
+
+        out = StringIO()
+        call_command("send_privacy_emails", stdout=out)
+
+        self.assertIn("1 failed", out.getvalue())
+        self.assertTrue(Combatant.objects.get().privacy_email_queued)
+
+
+class RenewCardsCommandTestCase(TestCase):
+    """Test the renew_cards management command."""
+
+    def setUp(self):
+        self.discipline = Discipline.objects.create(name="Rapier", slug="rapier")
+        self.combatant = Combatant.objects.create(
+            sca_name="Test Fighter",
+            legal_name="Test Legal",
+            email="test@example.com",
+            card_id="red-lion-argent",
+        )
+        self.card = Card.objects.create(
+            combatant=self.combatant,
+            discipline=self.discipline,
+            date_issued=today() - timedelta(days=100),
+        )
+
+    def test_renew_by_card_id_and_email(self):
+        out = StringIO()
+        call_command(
+            "renew_cards",
+            "rapier",
+            "red-lion-argent",
+            "nobody@example.com",
+            "--date",
+            str(today()),
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn("Not found: nobody@example.com", output)
+        self.assertIn("Renewed 1 Rapier cards", output)
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.date_issued, today())
+
+    def test_shared_email_renews_everyone(self):
+        other = Combatant.objects.create(
+            sca_name="Other Fighter", legal_name="Other Legal", email="test@example.com"
+        )
+        other_card = Card.objects.create(
+            combatant=other,
+            discipline=self.discipline,
+            date_issued=today() - timedelta(days=100),
+        )
+        out = StringIO()
+        call_command(
+            "renew_cards",
+            "rapier",
+            "TEST@example.com",
+            "--date",
+            str(today()),
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn("TEST@example.com matches 2 combatants", output)
+        self.assertIn("Renewed 2 Rapier cards", output)
+        for card in (self.card, other_card):
+            card.refresh_from_db()
+            self.assertEqual(card.date_issued, today())
+
+    def test_uppercase_uuid(self):
+        out = StringIO()
+        call_command(
+            "renew_cards",
+            "rapier",
+            str(self.combatant.uuid).upper(),
+            "--date",
+            str(today()),
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertNotIn("Not found", output)
+        self.assertIn("Renewed 1 Rapier cards", output)
+
+    def test_dry_run(self):
+        out = StringIO()
+        call_command(
+            "renew_cards", "rapier", "test@example.com", "--dry-run", stdout=out
+        )
+
+        self.assertIn("Would renew 1 Rapier cards", out.getvalue())
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.date_issued, today() - timedelta(days=100))
+
+
+class StartupProfileCommandTestCase(TestCase):
+    """Test cases for the startup_profile management command."""
+
+    def test_parse_importtime(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   django.utils\n"
+            "import time:        30 |        150 | django\n"
+            "some other output\n"
+        )
+        self.assertEqual(
+            parse_importtime(stderr),
+            [("django.utils", 120, 120), ("django", 30, 150)],
+        )
+
+    def test_report(self):
+        out = StringIO()
+        call_command("startup_profile", "--path", "/robots.txt", "--json", stdout=out)
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["status"], 200)
+        self.assertGreater(report["module_count"], 0)
+        self.assertGreater(report["time_to_first_request_ms"], report["setup_ms"])
+        self.assertEqual(report["loaded_after_setup"], [])
+        self.assertEqual(len(report["modules"]), 20)
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=200)
+class SlowQueriesCommandTestCase(TestCase):
+    """Test the slow_queries command"""
+
+    def tearDown(self):
+        sampler.clear_samples()
+
+    def test_report(self):
+        for duration in (0.3, 0.5):
+            sampler.sample(
+                "SELECT * FROM cards_card WHERE id = %s", duration, request=None
+            )
+        sampler.flush()
+
+        out = StringIO()
+        call_command("slow_queries", stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("2 slow queries sampled", output)
+        self.assertIn("total     800.0 ms", output)
+        self.assertIn("SELECT * FROM cards_card WHERE id = ?", output)
+        self.assertIn("test_management_commands.py", output)
+
+    def test_clear(self):
+        sampler.sample("SELECT 1", 0.3)
+        sampler.flush()
+
+        call_command("slow_queries", "--clear", stdout=StringIO())
+
+        out = StringIO()
+        call_command("slow_queries", stdout=out)
+        self.assertIn("No slow queries sampled", out.getvalue())
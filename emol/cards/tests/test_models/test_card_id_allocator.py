@@ -0,0 +1,98 @@
+"""Tests for card_id allocation."""
+
+from unittest.mock import patch
+
+from cards.models.card_id_allocator import CardIdAllocator, CardIdNamespaceExhausted
+from cards.models.combatant import Combatant
+from cards.utility.names import FOURTH_TERMS, name_at, namespace_size, shuffle_index
+from django.test import SimpleTestCase, TestCase, override_settings
+
+
+class NamespaceEnumerationTestCase(SimpleTestCase):
+    """Tests for enumerating and shuffling the name namespace."""
+
+    def test_name_at_covers_namespace(self):
+        size = namespace_size()
+        names = {name_at(index) for index in range(size)}
+        self.assertEqual(len(names), size)
+
+    def test_fourth_term_names(self):
+        self.assertTrue(name_at(0, fourth_term=True).endswith(f"-{FOURTH_TERMS[0]}"))
+        self.assertGreater(namespace_size(fourth_term=True), namespace_size())
+
+    def test_name_at_out_of_range(self):
+        with self.assertRaises(IndexError):
+            name_at(namespace_size())
+
+    def test_shuffle_is_a_permutation(self):
+        for size in (1, 2, 7, 1000, 1025):
+            shuffled = [shuffle_index(index, size, "key") for index in range(size)]
+            self.assertEqual(sorted(shuffled), list(range(size)))
+
+    def test_shuffle_depends_on_key(self):
+        first = [shuffle_index(index, 1000, "one") for index in range(20)]
+        second = [shuffle_index(index, 1000, "two") for index in range(20)]
+        self.assertNotEqual(first, second)
+
+
+class CardIdAllocatorTestCase(TestCase):
+    """Tests for CardIdAllocator."""
+
+    def test_allocations_are_unique(self):
+        card_ids = {CardIdAllocator.allocate() for _ in range(200)}
+        self.assertEqual(len(card_ids), 200)
+        self.assertEqual(CardIdAllocator.objects.get(terms=3).next_index, 200)
+
+    def test_skips_card_ids_already_in_use(self):
+        allocator = CardIdAllocator.objects.create(terms=3)
+        Combatant.objects.create(
+            sca_name="Legacy", legal_name="Legacy", card_id=allocator.name_for(0)
+        )
+
+        card_id = CardIdAllocator.allocate()
+
+        self.assertEqual(card_id, allocator.name_for(1))
+
+    @override_settings(CARD_ID_FOURTH_TERM=True)
+    def test_fourth_term(self):
+        card_id = CardIdAllocator.allocate()
+        self.assertIn(card_id.rsplit("-", 1)[1], FOURTH_TERMS)
+        self.assertTrue(CardIdAllocator.objects.filter(terms=4).exists())
+
+    def test_exhausted(self):
+        CardIdAllocator.objects.create(terms=3, next_index=namespace_size())
+        with self.assertRaises(CardIdNamespaceExhausted):
+            CardIdAllocator.allocate()
+
+    def test_allocate_many(self):
+        allocator = CardIdAllocator.objects.create(terms=3)
+        Combatant.objects.create(
+            sca_name="Legacy", legal_name="Legacy", card_id=allocator.name_for(2)
+        )
+
+        card_ids = CardIdAllocator.allocate_many(5)
+
+        self.assertEqual(
+            card_ids, [allocator.name_for(index) for index in (0, 1, 3, 4, 5)]
+        )
+        self.assertEqual(CardIdAllocator.objects.get(terms=3).next_index, 6)
+
+    def test_allocate_many_exhausted_allocates_nothing(self):
+        CardIdAllocator.objects.create(terms=3, next_index=namespace_size() - 2)
+        with self.assertRaises(CardIdNamespaceExhausted):
+            CardIdAllocator.allocate_many(3)
+
+        self.assertEqual(
+            CardIdAllocator.objects.get(terms=3).next_index, namespace_size() - 2
+        )
+
+    @patch("cards.models.combatant.send_card_url")
+    def test_accept_privacy_policy_allocates_card_id(self, mock_send):
+        combatant = Combatant.objects.create(
+            sca_name="Test Fighter", legal_name="Test Legal"
+        )
+
+        combatant.accept_privacy_policy()
+
+        combatant.refresh_from_db()
+        self.assertEqual(combatant.card_id, CardIdAllocator.objects.get().name_for(0))
@@ -5,6 +5,8 @@ from cards.models.authorization import Authorization
 from cards.models.combatant import Combatant
 from cards.models.discipline import Discipline
 from cards.models.one_time_code import OneTimeCode
+from cards.utility.pin_hasher import PinHasher
+from django.contrib.auth.hashers import make_password
 from django.db.utils import IntegrityError
 from django.test import TestCase, override_settings
 from django.utils import timezone
@@ -200,16 +202,83 @@ class CombatantPINTestCase(TestCase):
         self.assertIsNone(self.combatant.pin_hash)
         self.assertEqual(self.combatant.pin_failed_attempts, 0)
 
+    def test_set_pin_uses_pin_hasher(self):
+        """Test that new PINs are hashed with the PIN-specific hasher."""
+        self.combatant.set_pin("1234")
+        self.assertTrue(self.combatant.pin_hash.startswith(f"{PinHasher.algorithm}$"))
+
+    def test_check_pin_upgrades_legacy_hash(self):
+        """Test that a PIN hashed with Django's default hasher still verifies."""
+        self.combatant.pin_hash = make_password("1234")
+        self.combatant.save()
+
+        self.assertTrue(self.combatant.check_pin("1234"))
+
+        self.combatant.refresh_from_db()
+        self.assertTrue(self.combatant.pin_hash.startswith(f"{PinHasher.algorithm}$"))
+        self.assertTrue(self.combatant.check_pin("1234"))
+
     @patch("cards.models.combatant.send_pin_lockout_notification")
     def test_lockout_sends_notification(self, mock_send):
         """Test that lockout triggers email notification."""
         self.combatant.set_pin("1234")
 
-        for _ in range(Combatant.PIN_MAX_ATTEMPTS):
-            self.combatant.check_pin("wrong")
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(Combatant.PIN_MAX_ATTEMPTS):
+                self.combatant.check_pin("wrong")
 
         mock_send.assert_called_once_with(self.combatant)
 
+    def test_concurrent_failures_are_all_counted(self):
+        """Test that failures from stale copies of the row aren't lost."""
+        self.combatant.set_pin("1234")
+        first = Combatant.objects.get(pk=self.combatant.pk)
+        second = Combatant.objects.get(pk=self.combatant.pk)
+
+        first.check_pin("0000")
+        second.check_pin("0000")
+
+        self.combatant.refresh_from_db()
+        self.assertEqual(self.combatant.pin_failed_attempts, 2)
+
+    @patch("cards.models.combatant.send_pin_lockout_notification")
+    def test_concurrent_lockout_notifies_once(self, mock_send):
+        """Test that racing failures past the limit lock and notify only once."""
+        self.combatant.set_pin("1234")
+        Combatant.objects.filter(pk=self.combatant.pk).update(
+            pin_failed_attempts=Combatant.PIN_MAX_ATTEMPTS - 1
+        )
+        first = Combatant.objects.get(pk=self.combatant.pk)
+        second = Combatant.objects.get(pk=self.combatant.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertFalse(first.check_pin("0000"))
+            self.assertFalse(second.check_pin("0000"))
+
+        mock_send.assert_called_once()
+        self.combatant.refresh_from_db()
+        self.assertTrue(self.combatant.is_locked_out)
+        self.assertEqual(self.combatant.pin_failed_attempts, Combatant.PIN_MAX_ATTEMPTS)
+
+    def test_correct_pin_rejected_after_concurrent_lockout(self):
+        """Test that a stale unlocked copy can't verify once the row is locked."""
+        self.combatant.set_pin("1234")
+        self.combatant.check_pin("0000")
+        stale = Combatant.objects.get(pk=self.combatant.pk)
+        Combatant.objects.filter(pk=self.combatant.pk).update(
+            pin_locked_until=timezone.now() + timedelta(minutes=10)
+        )
+
+        self.assertFalse(stale.check_pin("1234"))
+
+    def test_successful_check_without_attempts_writes_nothing(self):
+        """Test that a correct PIN with no failed attempts issues no UPDATE."""
+        self.combatant.set_pin("1234")
+        combatant = Combatant.objects.get(pk=self.combatant.pk)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(combatant.check_pin("1234"))
+
     @override_settings(BASE_URL="http://test.example.com")
     def test_initiate_pin_reset(self):
         """Test initiating PIN reset creates OneTimeCode and clears PIN."""
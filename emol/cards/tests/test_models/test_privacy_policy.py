@@ -127,6 +127,34 @@ class PrivacyPolicyModelTestCase(TestCase):
         latest = PrivacyPolicy.latest_version()
         self.assertEqual(latest.version, f"{self.year}.5")
 
+    def test_latest_version_orders_minor_numerically(self):
+        """latest_version treats YYYY.10 as newer than YYYY.9."""
+        for minor in (9, 10):
+            PrivacyPolicy.objects.create(
+                text=f"Minor {minor}",
+                version=f"{self.year}.{minor}",
+                approved=True,
+                changelog="",
+            )
+        with self.assertNumQueries(1):
+            latest = PrivacyPolicy.latest_version()
+        self.assertEqual(latest.version, f"{self.year}.10")
+
+    def test_approve_stores_rendered_html(self):
+        """approve renders the policy text once and stores it."""
+        draft = PrivacyPolicy.objects.create(
+            text="# Heading\n\nDated [DATE]", approved=False, changelog=""
+        )
+        self.assertEqual(draft.rendered_html, "")
+
+        draft.approve()
+        draft.refresh_from_db()
+
+        self.assertIn("<h1>Heading</h1>", draft.rendered_html)
+        self.assertNotIn("[DATE]", draft.rendered_html)
+        self.assertEqual(draft.html, draft.rendered_html)
+        self.assertEqual((draft.version_year, draft.version_minor), (self.year, 1))
+
     def test_latest_version_ignores_drafts(self):
         """latest_version ignores draft policies."""
         PrivacyPolicy.objects.create(text="Draft", approved=False, changelog="")
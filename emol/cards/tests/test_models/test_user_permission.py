@@ -188,3 +188,35 @@ class UserPermissionTestCase(TestCase):
         self.assertFalse(
             UserPermission.user_has_permission(self.user, self.permission.name, None)
         )
+
+    @override_settings(NO_ENFORCE_PERMISSIONS=False)
+    def test_user_discipline_permissions_matches_user_has_permission(self):
+        """Batched discipline permissions agree with user_has_permission"""
+        other_discipline = Discipline.objects.create(name="Other Discipline")
+        disciplines = [self.discipline, other_discipline]
+        slugs = [self.permission.slug, self.global_permission.slug]
+        UserPermission.objects.create(
+            user=self.user, permission=self.permission, discipline=self.discipline
+        )
+        UserPermission.objects.create(
+            user=self.user, permission=self.global_permission, discipline=None
+        )
+
+        with self.assertNumQueries(1):
+            granted = UserPermission.user_discipline_permissions(
+                self.user, slugs, disciplines
+            )
+
+        for discipline in disciplines:
+            for slug in slugs:
+                self.assertEqual(
+                    granted[discipline.id][slug],
+                    UserPermission.user_has_permission(self.user, slug, discipline),
+                )
+        self.assertFalse(granted[other_discipline.id][self.permission.slug])
+
+    def test_user_discipline_permissions_anonymous_user(self):
+        granted = UserPermission.user_discipline_permissions(
+            AnonymousUser(), [self.permission.slug], [self.discipline]
+        )
+        self.assertEqual(granted, {self.discipline.id: {self.permission.slug: False}})
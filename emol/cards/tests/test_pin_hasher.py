@@ -0,0 +1,89 @@
+"""Tests for the bounded PIN hash pool."""
+
+import asyncio
+import threading
+
+from asgiref.sync import sync_to_async
+from cards.utility.pin_hasher import (
+    PinHasherBusy,
+    PinHashPool,
+    hash_pin,
+    needs_rehash,
+    verify_pin,
+)
+from django.test import SimpleTestCase, override_settings
+
+
+class PinHashPoolTestCase(SimpleTestCase):
+    """Tests for PinHashPool capacity limits."""
+
+    def test_run_returns_result(self):
+        pool = PinHashPool(workers=1, queue_depth=0, timeout=5)
+        self.assertEqual(pool.run(lambda a, b: a + b, 2, 3), 5)
+
+    def test_rejects_when_saturated(self):
+        """A job beyond workers + queue depth is refused, not queued."""
+        pool = PinHashPool(workers=1, queue_depth=0, timeout=5)
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        worker = threading.Thread(target=pool.run, args=(block,))
+        worker.start()
+        started.wait(5)
+        try:
+            with self.assertRaises(PinHasherBusy):
+                pool.run(lambda: None)
+        finally:
+            release.set()
+            worker.join()
+
+        # Capacity comes back once the blocking job finishes
+        self.assertIsNone(pool.run(lambda: None))
+
+    def test_timeout_raises_busy(self):
+        pool = PinHashPool(workers=1, queue_depth=0, timeout=0.01)
+        release = threading.Event()
+        try:
+            with self.assertRaises(PinHasherBusy):
+                pool.run(release.wait, 5)
+        finally:
+            release.set()
+
+    async def test_arun_leaves_sync_thread_free(self):
+        """Awaiting a job doesn't hold the thread sync_to_async calls share."""
+        pool = PinHashPool(workers=1, queue_depth=0, timeout=5)
+        release = threading.Event()
+        job = asyncio.ensure_future(pool.arun(lambda: release.wait(5)))
+
+        # Would wait out the job if it were running on the shared thread
+        await asyncio.wait_for(sync_to_async(release.set)(), 1)
+
+        self.assertTrue(await job)
+
+    async def test_arun_timeout_raises_busy(self):
+        pool = PinHashPool(workers=1, queue_depth=0, timeout=0.01)
+        release = threading.Event()
+        try:
+            with self.assertRaises(PinHasherBusy):
+                await pool.arun(release.wait, 5)
+        finally:
+            release.set()
+
+
+class PinHashFunctionsTestCase(SimpleTestCase):
+    """Tests for the module-level hash helpers."""
+
+    def test_hash_and_verify(self):
+        encoded = hash_pin("1234")
+        self.assertTrue(verify_pin("1234", encoded))
+        self.assertFalse(verify_pin("4321", encoded))
+        self.assertFalse(needs_rehash(encoded))
+
+    def test_needs_rehash_when_iterations_change(self):
+        encoded = hash_pin("1234")
+        with override_settings(PIN_HASH_ITERATIONS=1000):
+            self.assertTrue(needs_rehash(encoded))
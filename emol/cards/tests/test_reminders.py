@@ -259,6 +259,71 @@ class CardReminderSignalTestCase(TestCase):
         self.assertEqual(old_reminder_ids, new_reminder_ids)
 
 
+class CardBulkRenewTestCase(TestCase):
+    """Tests for Card.bulk_renew."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.discipline = Discipline.objects.create(
+            name="Test Combat", slug="test-combat"
+        )
+        self.old_date = today() - timedelta(days=400)
+        self.combatants = []
+        for number in range(3):
+            combatant = Combatant.objects.create(
+                sca_name=f"Fighter {number}",
+                legal_name=f"Legal {number}",
+                email=f"fighter{number}@example.com",
+                card_id=f"card-{number}",
+            )
+            Card.objects.create(
+                combatant=combatant,
+                discipline=self.discipline,
+                date_issued=self.old_date,
+            )
+            self.combatants.append(combatant)
+
+    @override_settings(REMINDER_DAYS=[60, 30, 14, 0])
+    def test_bulk_renew_updates_dates_and_reminders(self):
+        """Renewed cards get the new date and regenerated reminders."""
+        uuids = [combatant.uuid for combatant in self.combatants[:2]]
+
+        with self.assertNumQueries(12):
+            renewed = Card.bulk_renew(self.discipline, uuids)
+
+        self.assertEqual(renewed, set(uuids))
+        card_type = ContentType.objects.get_for_model(Card)
+        for combatant in self.combatants[:2]:
+            card = combatant.cards.get()
+            self.assertEqual(card.date_issued, today())
+            due_dates = Reminder.objects.filter(
+                content_type=card_type, object_id=card.id
+            ).values_list("due_date", flat=True)
+            self.assertEqual(
+                sorted(due_dates),
+                sorted(
+                    card.expiration_date - timedelta(days=days)
+                    for days in [60, 30, 14, 0]
+                ),
+            )
+
+        untouched = self.combatants[2].cards.get()
+        self.assertEqual(untouched.date_issued, self.old_date)
+
+    def test_bulk_renew_query_count_independent_of_cards(self):
+        """Renewing more cards doesn't take more queries."""
+        with self.assertNumQueries(12):
+            Card.bulk_renew(
+                self.discipline, [combatant.uuid for combatant in self.combatants]
+            )
+
+    def test_bulk_renew_skips_combatants_without_cards(self):
+        """Combatants with no card in the discipline are skipped."""
+        other = Discipline.objects.create(name="Other", slug="other")
+        renewed = Card.bulk_renew(other, [self.combatants[0].uuid])
+        self.assertEqual(renewed, set())
+
+
 class WaiverReminderSignalTestCase(TestCase):
     """Tests for Waiver post_save signal creating reminders."""
 
@@ -0,0 +1,274 @@
+"""Tests for the signed offline roster snapshot."""
+
+import json
+import threading
+from datetime import timedelta
+from unittest.mock import patch
+
+from cards.models import (
+    Authorization,
+    Card,
+    Combatant,
+    CombatantAuthorization,
+    CombatantWarrant,
+    Discipline,
+    Marshal,
+    RosterChange,
+    RosterVersion,
+    Waiver,
+)
+from cards.utility import signing
+from cards.utility.roster_snapshot import get_snapshot
+from cards.utility.time import add_years, today
+from django.db import connection, transaction
+from django.test import (
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+    skipUnlessDBFeature,
+)
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from sso_user.models import SSOUser
+
+
+class SigningTestCase(TestCase):
+    """Tests for cards.utility.signing."""
+
+    def test_sign_and_verify(self):
+        signature = signing.sign(b"payload")
+        self.assertTrue(signing.verify(b"payload", signature))
+        self.assertFalse(signing.verify(b"tampered", signature))
+        self.assertFalse(signing.verify(b"payload", "not-a-signature"))
+
+    def test_configured_key(self):
+        derived = signing.public_key()
+        with override_settings(CARD_SIGNING_KEY=signing.b64encode(b"k" * 32)):
+            self.assertNotEqual(signing.public_key(), derived)
+            signature = signing.sign(b"payload")
+        self.assertFalse(signing.verify(b"payload", signature))
+
+
+class RosterSnapshotAPITestCase(TestCase):
+    """Tests for the roster snapshot API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = SSOUser.objects.create_user(email="marshal@example.com")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("roster-snapshot")
+
+        self.rapier = Discipline.objects.create(name="Rapier", slug="rapier")
+        self.authorization = Authorization.objects.create(
+            name="Heavy Rapier", slug="heavy-rapier", discipline=self.rapier
+        )
+        self.marshal = Marshal.objects.create(
+            name="Rapier Marshal", slug="rapier-marshal", discipline=self.rapier
+        )
+        self.alys = self.add_combatant("Alys", "alys-card")
+        Waiver.objects.create(combatant=self.alys, date_signed=today())
+
+    def add_combatant(self, name, card_id, date_issued=None):
+        combatant = Combatant.objects.create(
+            sca_name=name,
+            legal_name=f"{name} Legal",
+            email=f"{name.lower()}@example.com",
+            card_id=card_id,
+            accepted_privacy_policy=True,
+        )
+        card = Card.objects.create(
+            combatant=combatant,
+            discipline=self.rapier,
+            date_issued=date_issued or today(),
+        )
+        CombatantAuthorization.objects.create(
+            card=card, authorization=self.authorization
+        )
+        return combatant
+
+    def get_snapshot(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        envelope = json.loads(response.content)
+        self.assertTrue(
+            signing.verify(envelope["snapshot"].encode(), envelope["signature"])
+        )
+        self.assertEqual(envelope["kid"], signing.key_id())
+        return response, json.loads(envelope["snapshot"])
+
+    def test_full_snapshot(self):
+        self.add_combatant("Bran", "bran-card", add_years(today(), -3))
+
+        response, snapshot = self.get_snapshot()
+
+        self.assertEqual(response["X-Roster-Version"], str(snapshot["version"]))
+        self.assertIsNone(snapshot["since"])
+        self.assertEqual(
+            snapshot["combatants"],
+            [
+                [
+                    "alys-card",
+                    "Alys",
+                    add_years(today(), 7).isoformat(),
+                    [
+                        [
+                            "rapier",
+                            add_years(today(), 2).isoformat(),
+                            ["heavy-rapier"],
+                            [],
+                        ]
+                    ],
+                ]
+            ],
+        )
+        self.assertEqual(
+            snapshot["disciplines"]["rapier"]["authorizations"],
+            {"heavy-rapier": "Heavy Rapier"},
+        )
+        self.assertNotIn("Alys Legal", response.content.decode())
+
+    def test_delta(self):
+        _, first = self.get_snapshot()
+        bran = self.add_combatant("Bran", "bran-card")
+        CombatantWarrant.objects.create(
+            card=self.alys.cards.get(), marshal=self.marshal
+        )
+        bran.delete()
+
+        _, delta = self.get_snapshot(since=first["version"])
+
+        self.assertEqual(delta["since"], first["version"])
+        self.assertGreater(delta["version"], first["version"])
+        self.assertEqual([entry[0] for entry in delta["combatants"]], ["alys-card"])
+        self.assertEqual(delta["combatants"][0][3][0][3], ["rapier-marshal"])
+        self.assertEqual(delta["removed"], ["bran-card"])
+
+        _, empty = self.get_snapshot(since=delta["version"])
+        self.assertEqual(empty["combatants"], [])
+        self.assertEqual(empty["removed"], [])
+
+    def test_pruned_since_gets_full_snapshot(self):
+        _, first = self.get_snapshot()
+        self.add_combatant("Bran", "bran-card")
+        self.add_combatant("Cora", "cora-card")
+        RosterChange.prune(timezone.now() + timedelta(days=1))
+
+        _, snapshot = self.get_snapshot(since=first["version"])
+
+        self.assertIsNone(snapshot["since"])
+        self.assertEqual(len(snapshot["combatants"]), 3)
+
+    def test_delta_follows_version_not_id(self):
+        """A change committed later is sent even if its row id is lower."""
+        _, first = self.get_snapshot()
+        version = first["version"]
+        RosterChange.objects.create(card_id="late-card", version=version + 2)
+        RosterChange.objects.create(card_id="early-card", version=version + 1)
+
+        _, delta = self.get_snapshot(since=version + 1)
+
+        self.assertEqual(delta["removed"], ["late-card"])
+
+    def test_etag(self):
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.add_combatant("Bran", "bran-card")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_etag_changes_with_day(self):
+        """A cached ETag isn't honoured once the snapshot's day has passed."""
+        etag = self.client.get(self.url)["ETag"]
+
+        tomorrow = today() + timedelta(days=1)
+        with patch("cards.api.roster_snapshot.today", return_value=tomorrow):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_full_snapshot_query_count_independent_of_roster(self):
+        """Building a full snapshot takes a fixed number of queries."""
+        self.add_combatant("Bran", "bran-card")
+
+        def count():
+            with self.assertNumQueries(14):
+                self.client.get(self.url)
+
+        count()
+        self.add_combatant("Cora", "cora-card")
+        self.add_combatant("Dain", "dain-card")
+        count()
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_signing_key(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get(reverse("signing-key"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            signing.b64decode(response.data["public_key"]), signing.public_key()
+        )
+        self.assertEqual(response.data["kid"], signing.key_id())
+
+
+class RosterVersionConcurrencyTestCase(TransactionTestCase):
+    """Tests for roster versions under concurrent writers."""
+
+    def setUp(self):
+        RosterVersion.objects.get_or_create(pk=1)
+
+    def changes_since(self, since):
+        _, envelope = get_snapshot(since=since)
+        return json.loads(json.loads(envelope)["snapshot"])["removed"]
+
+    @skipUnlessDBFeature("has_select_for_update")
+    def test_versions_follow_commit_order(self):
+        """A device never skips a change that commits after it synced."""
+        first_logged = threading.Event()
+        finish_first = threading.Event()
+
+        def first_writer():
+            try:
+                with transaction.atomic():
+                    RosterChange.record(["first-card"])
+                    first_logged.set()
+                    finish_first.wait(10)
+            finally:
+                connection.close()
+
+        def second_writer():
+            try:
+                RosterChange.record(["second-card"])
+            finally:
+                connection.close()
+
+        first = threading.Thread(target=first_writer)
+        first.start()
+        self.assertTrue(first_logged.wait(10))
+        second = threading.Thread(target=second_writer)
+        second.start()
+
+        # The second writer waits for the first to commit, so a device
+        # syncing now sees neither change
+        second.join(0.5)
+        self.assertTrue(second.is_alive())
+        synced, _ = get_snapshot()
+
+        finish_first.set()
+        first.join(10)
+        second.join(10)
+
+        self.assertEqual(
+            sorted(self.changes_since(synced)), ["first-card", "second-card"]
+        )
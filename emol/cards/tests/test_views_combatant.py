@@ -0,0 +1,74 @@
+"""Tests for combatant administration views."""
+
+from cards.models import Authorization, Discipline, Marshal, Permission, UserPermission
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from sso_user.models import SSOUser
+
+
+class CombatantDetailViewTestCase(TestCase):
+    """Test the combatant_detail form view"""
+
+    def setUp(self):
+        self.user = SSOUser.objects.create_user(email="mol@example.com")
+        self.client.force_login(self.user)
+        self.add_discipline("Rapier")
+
+    def add_discipline(self, name):
+        discipline = Discipline.objects.create(name=name, slug=name.lower())
+        Authorization.objects.create(
+            name=f"{name} Auth", slug=f"{name.lower()}-auth", discipline=discipline
+        )
+        Marshal.objects.create(
+            name=f"{name} Marshal",
+            slug=f"{name.lower()}-marshal",
+            discipline=discipline,
+        )
+        return discipline
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("combatant-detail"))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_independent_of_disciplines(self):
+        """Adding disciplines doesn't add queries"""
+        baseline = self.count_queries()
+
+        self.add_discipline("Armoured")
+        self.add_discipline("Archery")
+
+        self.assertEqual(self.count_queries(), baseline)
+
+    def test_renders_authorizations_and_marshals(self):
+        response = self.client.get(reverse("combatant-detail"))
+        self.assertContains(response, "Rapier Auth")
+        self.assertContains(response, "Rapier Marshal")
+
+    @override_settings(NO_ENFORCE_PERMISSIONS=False)
+    def test_write_permissions_per_discipline(self):
+        """Only disciplines the user can write to have enabled checkboxes"""
+        armoured = self.add_discipline("Armoured")
+        read, _ = Permission.objects.get_or_create(
+            slug="read_combatant_info",
+            defaults={"name": "Read combatant info", "is_global": True},
+        )
+        write, _ = Permission.objects.get_or_create(
+            slug="write_authorizations",
+            defaults={"name": "Write authorizations", "is_global": False},
+        )
+        UserPermission.objects.create(user=self.user, permission=read)
+        UserPermission.objects.create(
+            user=self.user, permission=write, discipline=armoured
+        )
+
+        response = self.client.get(reverse("combatant-detail"))
+
+        content = response.content.decode()
+        armoured_auth = content[content.index('id="armoured-armoured-auth"') :]
+        rapier_auth = content[content.index('id="rapier-rapier-auth"') :]
+        self.assertNotIn("disabled", armoured_auth[: armoured_auth.index(">")])
+        self.assertIn("disabled", rapier_auth[: rapier_auth.index(">")])
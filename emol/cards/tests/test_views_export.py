@@ -0,0 +1,145 @@
+"""Tests for the streaming roster exports."""
+
+import csv
+import io
+import json
+from datetime import timedelta
+
+from cards.models import (
+    Authorization,
+    Card,
+    Combatant,
+    CombatantAuthorization,
+    CombatantWarrant,
+    Discipline,
+    Marshal,
+    Permission,
+    UserPermission,
+)
+from cards.utility.time import add_years, today
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from sso_user.models import SSOUser
+
+
+class RosterExportTestCase(TestCase):
+    """Test the roster and warrant roster exports"""
+
+    def setUp(self):
+        self.user = SSOUser.objects.create_user(email="mol@example.com")
+        self.client.force_login(self.user)
+        self.rapier = Discipline.objects.create(name="Rapier", slug="rapier")
+        self.archery = Discipline.objects.create(name="Archery", slug="archery")
+        self.add_card("Alys", self.rapier, today())
+        self.add_card("Bran", self.rapier, add_years(today(), -3))
+        self.add_card("Cora", self.archery, today() - timedelta(days=30))
+
+    def add_card(self, name, discipline, date_issued):
+        combatant = Combatant.objects.create(
+            sca_name=name,
+            legal_name=f"{name} Legal",
+            email=f"{name.lower()}@example.com",
+            accepted_privacy_policy=True,
+        )
+        card = Card.objects.create(
+            combatant=combatant, discipline=discipline, date_issued=date_issued
+        )
+        authorization, _ = Authorization.objects.get_or_create(
+            name=f"{discipline.name} Auth",
+            slug=f"{discipline.slug}-auth",
+            discipline=discipline,
+        )
+        marshal, _ = Marshal.objects.get_or_create(
+            name=f"{discipline.name} Marshal",
+            slug=f"{discipline.slug}-marshal",
+            discipline=discipline,
+        )
+        CombatantAuthorization.objects.create(card=card, authorization=authorization)
+        CombatantWarrant.objects.create(card=card, marshal=marshal)
+
+    def get_csv(self, name, **params):
+        response = self.client.get(reverse(name, args=["csv"]), params)
+        self.assertEqual(response.status_code, 200)
+        content = b"".join(response.streaming_content).decode()
+        return list(csv.DictReader(io.StringIO(content)))
+
+    def test_roster_csv(self):
+        rows = self.get_csv("roster-export")
+
+        self.assertEqual([row["sca_name"] for row in rows], ["Cora", "Alys", "Bran"])
+        self.assertEqual(rows[1]["legal_name"], "Alys Legal")
+        self.assertEqual(rows[1]["authorizations"], "Rapier Auth")
+        self.assertEqual(rows[2]["valid"], "False")
+
+    def test_warrant_roster_json(self):
+        response = self.client.get(
+            reverse("warrant-roster-export", args=["json"]), {"valid": "true"}
+        )
+
+        self.assertTrue(response.streaming)
+        self.assertIn("attachment", response["Content-Disposition"])
+        rows = json.loads(b"".join(response.streaming_content))
+        self.assertEqual([row["sca_name"] for row in rows], ["Cora", "Alys"])
+        self.assertEqual(rows[1]["marshal"], "Rapier Marshal")
+        self.assertEqual(rows[1]["expiration_date"], str(add_years(today(), 2)))
+
+    def test_warrant_roster_omits_legal_name(self):
+        self.add_card("Dai", self.archery, today())
+        Combatant.objects.filter(sca_name="Dai").update(sca_name=None)
+
+        rows = self.get_csv("warrant-roster-export")
+
+        self.assertNotIn("Dai Legal", [row["sca_name"] for row in rows])
+        self.assertIn("", [row["sca_name"] for row in rows])
+
+    def test_filters(self):
+        rows = self.get_csv("roster-export", discipline="rapier", valid="false")
+        self.assertEqual([row["sca_name"] for row in rows], ["Bran"])
+
+        window_end = add_years(today(), 2) - timedelta(days=1)
+        rows = self.get_csv(
+            "warrant-roster-export",
+            expires_from=str(add_years(today(), -1) + timedelta(days=1)),
+            expires_to=str(window_end),
+        )
+        self.assertEqual([row["sca_name"] for row in rows], ["Cora"])
+
+    def test_bad_filter(self):
+        response = self.client.get(
+            reverse("roster-export", args=["csv"]), {"expires_to": "soon"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_query_count_independent_of_rows(self):
+        def count():
+            with self.assertNumQueries(5):
+                rows = self.get_csv("roster-export")
+            return len(rows)
+
+        self.assertEqual(count(), 3)
+        for number in range(5):
+            self.add_card(f"Extra{number}", self.rapier, today())
+        self.assertEqual(count(), 8)
+
+    @override_settings(NO_ENFORCE_PERMISSIONS=False)
+    def test_limited_to_permitted_disciplines(self):
+        permission, _ = Permission.objects.get_or_create(
+            slug="warrant_roster",
+            defaults={"name": "Can generate warrant roster", "is_global": False},
+        )
+        UserPermission.objects.create(
+            user=self.user, permission=permission, discipline=self.archery
+        )
+
+        rows = self.get_csv("warrant-roster-export")
+        self.assertEqual([row["sca_name"] for row in rows], ["Cora"])
+
+        response = self.client.get(
+            reverse("warrant-roster-export", args=["csv"]), {"discipline": "rapier"}
+        )
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(NO_ENFORCE_PERMISSIONS=False)
+    def test_roster_requires_combatant_info(self):
+        response = self.client.get(reverse("roster-export", args=["csv"]))
+        self.assertEqual(response.status_code, 401)
@@ -9,6 +9,7 @@ from cards.models import (
     Marshal,
     OneTimeCode,
 )
+from cards.utility.time import add_years, today
 from django.test import TestCase
 from django.urls import reverse
 
@@ -40,6 +41,12 @@ class HomeViewsTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Enter your email address")
 
+    async def test_request_card_get_under_asgi(self):
+        """Test the async view renders through the ASGI handler"""
+        response = await self.async_client.get(reverse("request-card"))
+
+        self.assertContains(response, "Enter your email address")
+
     @patch("cards.views.home.send_card_url")
     def test_request_card_post_existing_combatant_with_privacy(
         self, mock_send_card_url
@@ -217,7 +224,7 @@ class MarshalListViewTestCase(TestCase):
         self.card = Card.objects.create(
             combatant=self.combatant,
             discipline=self.discipline,
-            date_issued="2024-01-01",
+            date_issued=today(),
         )
 
         self.warrant = CombatantWarrant.objects.create(
@@ -242,3 +249,59 @@ class MarshalListViewTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Test Discipline")
         # Should still show discipline but no marshals
+
+    def test_marshal_list_excludes_expired_cards(self):
+        """Test that warrants on expired cards aren't listed"""
+        self.card.date_issued = add_years(today(), -2)
+        self.card.save()
+
+        response = self.client.get(reverse("marshal-list"))
+
+        self.assertNotContains(response, "Test Marshal")
+
+    async def test_marshal_list_under_asgi(self):
+        """Test the async view serves the roster through the ASGI handler"""
+        response = await self.async_client.get(reverse("marshal-list"))
+
+        self.assertContains(response, "Test Marshal")
+        self.assertIn("ETag", response.headers)
+
+    def test_marshal_list_conditional_get(self):
+        """Test that a matching ETag gets a 304"""
+        response = self.client.get(reverse("marshal-list"))
+        etag = response.headers["ETag"]
+        self.assertIn("Last-Modified", response.headers)
+
+        response = self.client.get(reverse("marshal-list"), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_marshal_list_served_from_cache(self):
+        """Test that repeat requests don't rebuild the roster"""
+        self.client.get(reverse("marshal-list"))
+
+        with patch("cards.utility.marshal_roster.build_roster") as mock_build:
+            response = self.client.get(reverse("marshal-list"))
+
+        mock_build.assert_not_called()
+        self.assertContains(response, "Test Marshal")
+
+    def test_marshal_list_invalidated_by_warrant_change(self):
+        """Test that removing a warrant drops the cached roster"""
+        self.client.get(reverse("marshal-list"))
+
+        self.card.warrants.remove(self.marshal)
+        response = self.client.get(reverse("marshal-list"))
+
+        self.assertNotContains(response, "Test Marshal")
+
+    def test_marshal_list_invalidated_by_sca_name_change(self):
+        """Test that renaming a marshal's combatant drops the cached roster"""
+        etag = self.client.get(reverse("marshal-list")).headers["ETag"]
+
+        self.combatant.sca_name = "Renamed Marshal"
+        self.combatant.save()
+        response = self.client.get(reverse("marshal-list"), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Renamed Marshal")
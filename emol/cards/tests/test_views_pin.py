@@ -1,10 +1,15 @@
 """Tests for PIN views."""
 
 from datetime import timedelta
+from unittest.mock import patch
 
+from asgiref.sync import sync_to_async
 from cards.models import Combatant, OneTimeCode, Waiver
+from cards.utility.card_access import grant_card_access
+from cards.utility.pin_hasher import PinHasherBusy
 from cards.utility.time import today
-from django.test import TestCase
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from feature_switches.models import (
@@ -245,15 +250,47 @@ class PINVerifyViewTestCase(TestCase):
             fetch_redirect_response=False,
         )
 
-    def test_post_correct_pin_sets_session(self):
-        """Test POST with correct PIN sets session verification."""
-        self.client.post(
+    async def test_post_correct_pin_under_asgi(self):
+        """Test the async view verifies a PIN through the ASGI handler."""
+        response = await self.async_client.post(
+            reverse("pin-verify", args=["test-card-123"]),
+            {"pin": "1234"},
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("card_access_test-card-123", response.cookies)
+
+    def test_method_not_allowed(self):
+        """Test methods other than GET and POST are refused."""
+        response = self.client.put(reverse("pin-verify", args=["test-card-123"]))
+
+        self.assertEqual(response.status_code, 405)
+
+    def test_post_correct_pin_sets_access_cookie(self):
+        """Test POST with correct PIN sets a signed card access cookie."""
+        response = self.client.post(
             reverse("pin-verify", args=["test-card-123"]),
             {"pin": "1234"},
         )
 
-        session = self.client.session
-        self.assertTrue(session.get("pin_verified_test-card-123"))
+        cookie = response.cookies["card_access_test-card-123"]
+        self.assertEqual(
+            cookie["path"], reverse("combatant-card", args=["test-card-123"])
+        )
+        self.assertTrue(cookie["httponly"])
+        self.assertNotIn("pin_verified_test-card-123", self.client.session)
+
+    @patch("cards.utility.pin_hasher.PinHashPool.submit", side_effect=PinHasherBusy)
+    def test_post_when_hash_pool_busy_returns_429(self, _mock_submit):
+        """Test POST returns 429 when the PIN hash pool is saturated."""
+        response = self.client.post(
+            reverse("pin-verify", args=["test-card-123"]),
+            {"pin": "1234"},
+        )
+
+        self.assertEqual(response.status_code, 429)
+        self.combatant.refresh_from_db()
+        self.assertEqual(self.combatant.pin_failed_attempts, 0)
 
     def test_post_incorrect_pin_shows_error(self):
         """Test POST with incorrect PIN shows error."""
@@ -362,15 +399,94 @@ class CombatantCardWithPINTestCase(TestCase):
         """Test that card is accessible after PIN verification."""
         self.combatant.set_pin("1234")
 
-        session = self.client.session
-        session["pin_verified_protected-card"] = True
-        session.save()
-
+        self.client.post(
+            reverse("pin-verify", args=["protected-card"]), {"pin": "1234"}
+        )
         response = self.client.get(reverse("combatant-card", args=["protected-card"]))
 
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Test Fighter")
 
+    async def test_card_served_under_asgi(self):
+        """Test that the card renders through the async request path."""
+        response = await self.async_client.get(
+            reverse("combatant-card", args=["protected-card"])
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Test Fighter")
+
+    async def test_card_accessible_after_asgi_verification(self):
+        """Test that an async PIN check opens the card for the same client."""
+        await sync_to_async(self.combatant.set_pin)("1234")
+
+        verify = await self.async_client.post(
+            reverse("pin-verify", args=["protected-card"]), {"pin": "1234"}
+        )
+        self.async_client.cookies.update(verify.cookies)
+        response = await self.async_client.get(
+            reverse("combatant-card", args=["protected-card"])
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Test Fighter")
+
+    def test_access_cookie_for_other_card_rejected(self):
+        """Test that a cookie signed for one card doesn't open another."""
+        self.combatant.set_pin("1234")
+        request = RequestFactory().get("/")
+        response = HttpResponse()
+        other = Combatant(card_id="some-other-card", pin_hash=self.combatant.pin_hash)
+        grant_card_access(request, response, other)
+        self.client.cookies["card_access_protected-card"] = response.cookies[
+            "card_access_some-other-card"
+        ].value
+
+        response = self.client.get(reverse("combatant-card", args=["protected-card"]))
+
+        self.assertRedirects(
+            response,
+            reverse("pin-verify", args=["protected-card"]),
+            fetch_redirect_response=False,
+        )
+
+    def test_access_cookie_revoked_by_pin_change(self):
+        """Test that changing the PIN revokes cookies already issued."""
+        self.combatant.set_pin("1234")
+        self.client.post(
+            reverse("pin-verify", args=["protected-card"]), {"pin": "1234"}
+        )
+
+        self.combatant.set_pin("5678")
+        response = self.client.get(reverse("combatant-card", args=["protected-card"]))
+
+        self.assertRedirects(
+            response,
+            reverse("pin-verify", args=["protected-card"]),
+            fetch_redirect_response=False,
+        )
+
+    def test_tampered_access_cookie_rejected(self):
+        """Test that an unsigned or tampered cookie is ignored."""
+        self.combatant.set_pin("1234")
+        self.client.cookies["card_access_protected-card"] = "protected-card"
+
+        response = self.client.get(reverse("combatant-card", args=["protected-card"]))
+
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(CARD_ACCESS_MAX_AGE=-1)
+    def test_expired_access_cookie_rejected(self):
+        """Test that a cookie older than CARD_ACCESS_MAX_AGE is ignored."""
+        self.combatant.set_pin("1234")
+        self.client.post(
+            reverse("pin-verify", args=["protected-card"]), {"pin": "1234"}
+        )
+
+        response = self.client.get(reverse("combatant-card", args=["protected-card"]))
+
+        self.assertEqual(response.status_code, 302)
+
     def test_feature_disabled_card_accessible(self):
         """Test that card is accessible when feature is disabled."""
         self.combatant.set_pin("1234")
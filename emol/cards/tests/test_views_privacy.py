@@ -42,6 +42,25 @@ class PrivacyPolicyViewTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Test Privacy Policy")
 
+    def test_privacy_policy_conditional_get(self):
+        """Anonymous GET carries a strong ETag that revalidates to a 304."""
+        response = self.client.get(reverse("privacy-policy"))
+        etag = response.headers["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+        self.assertIn("no-cache", response.headers["Cache-Control"])
+        self.assertNotIn("max-age=", response.headers["Cache-Control"])
+
+        response = self.client.get(
+            reverse("privacy-policy"), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_privacy_policy_with_code_not_cached(self):
+        """The acceptance form isn't given validators."""
+        code = self.combatant.privacy_acceptance_code
+        response = self.client.get(reverse("privacy-policy", kwargs={"code": code}))
+        self.assertNotIn("ETag", response.headers)
+
     def test_privacy_policy_get_with_invalid_code(self):
         """GET request with invalid code returns 404."""
         response = self.client.get(
@@ -338,10 +357,27 @@ class PrivacyPolicyDraftWorkflowTestCase(TestCase):
             reverse("view-version", kwargs={"version": f"{year}.5"})
         )
         self.assertEqual(response.status_code, 200)
+        self.assertIn("max-age=", response.headers["Cache-Control"])
         self.assertContains(response, "Version Policy")
         self.assertContains(response, f"{year}.5")
         self.assertContains(response, "Version changelog")
 
+    def test_view_version_etag_changes_with_latest(self):
+        """A version's ETag changes once a newer version is approved."""
+        year = datetime.now().year
+        url = reverse("view-version", kwargs={"version": f"{year}.1"})
+        etag = self.client.get(url).headers["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        PrivacyPolicy.objects.create(
+            text="# Newer", version=f"{year}.2", approved=True, changelog=""
+        )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "not the latest")
+
     def test_view_version_not_found(self):
         """Viewing non-existent version returns 404."""
         response = self.client.get(
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 from cards.api.urls import urlpatterns as api_urlpatterns
-from cards.views import combatant, home, pin, privacy, self_serve_update
+from cards.views import combatant, export, home, pin, privacy, self_serve_update
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib.admin import site
@@ -62,6 +62,16 @@ urlpatterns = [
         name="pin-reset",
     ),
     path("pin/verify/<str:card_id>", pin.pin_verify, name="pin-verify"),
+    re_path(
+        r"^export/roster\.(?P<file_format>csv|json)$",
+        export.roster_export,
+        name="roster-export",
+    ),
+    re_path(
+        r"^export/warrant-roster\.(?P<file_format>csv|json)$",
+        export.warrant_roster_export,
+        name="warrant-roster-export",
+    ),
     path("api/", include(api_urlpatterns)),  # type: ignore[arg-type]
 ]
 
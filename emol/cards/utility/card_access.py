@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""Signed, stateless card access tokens.
+
+Once a combatant verifies their PIN, we hand them a signed cookie scoped to
+their card URL instead of writing a flag into the session. The card view
+checks the signature and age of the cookie, so viewing a PIN-protected card
+never touches the session table.
+
+The cookie is signed with django.core.signing (via set_signed_cookie) using
+a salt specific to card access. Its value is the card_id it grants, so a
+cookie for one card can't be replayed against another, and a digest of the
+combatant's PIN hash, so setting, changing or resetting the PIN revokes
+every cookie already issued.
+
+Settings:
+    CARD_ACCESS_MAX_AGE: Seconds a PIN verification remains valid
+"""
+
+from django.conf import settings
+from django.urls import reverse
+from django.utils.crypto import salted_hmac
+
+COOKIE_PREFIX = "card_access_"
+SIGNING_SALT = "cards.card_access"
+DEFAULT_MAX_AGE = 60 * 60 * 24 * 14
+
+
+def _cookie_name(card_id):
+    return f"{COOKIE_PREFIX}{card_id}"
+
+
+def _max_age():
+    return getattr(settings, "CARD_ACCESS_MAX_AGE", DEFAULT_MAX_AGE)
+
+
+def _cookie_value(combatant):
+    # A digest rather than part of the hash itself, since signed cookie
+    # values are readable by the client
+    pin_digest = salted_hmac(SIGNING_SALT, combatant.pin_hash or "").hexdigest()
+    return f"{combatant.card_id}:{pin_digest[:16]}"
+
+
+def grant_card_access(request, response, combatant):
+    """Attach a signed card access cookie to a response.
+
+    Args:
+        request: The request that verified the PIN
+        response: The response to set the cookie on
+        combatant: The combatant whose card the cookie grants access to
+    """
+    card_id = combatant.card_id
+    response.set_signed_cookie(
+        _cookie_name(card_id),
+        _cookie_value(combatant),
+        salt=SIGNING_SALT,
+        max_age=_max_age(),
+        path=reverse("combatant-card", args=[card_id]),
+        secure=request.is_secure(),
+        httponly=True,
+        samesite="Lax",
+    )
+
+
+def has_card_access(request, combatant):
+    """Check a request for a valid card access cookie for a combatant's card.
+
+    Args:
+        request: The incoming request
+        combatant: The combatant whose card is being viewed
+
+    Returns:
+        True if the request carries an unexpired, correctly signed cookie
+        for this card_id, issued since the PIN was last set
+    """
+    value = request.get_signed_cookie(
+        _cookie_name(combatant.card_id),
+        default=None,
+        salt=SIGNING_SALT,
+        max_age=_max_age(),
+    )
+    return value == _cookie_value(combatant)
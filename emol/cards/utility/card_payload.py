@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""Signed card payloads for the QR code on a combatant's card.
+
+A payload is a short token a marshal can scan at inspection:
+
+    EMOL1.<base64 JSON>.<signature>
+
+The JSON holds the card_id, SCA name, waiver expiry and each card's
+discipline and expiry as they were when the card page was rendered, plus the
+date it was signed. The signature (see cards.utility.signing) covers
+everything before the last dot, so a device holding the public key can check
+a scanned card with no network connection. Online, the card-verify API
+returns the current status instead of what was printed.
+
+Current status is one indexed query on card_id, cached for the day and
+dropped whenever the roster change log records the card_id. lookup_cards
+checks many cards at once, with their authorizations and warrants, in a
+fixed number of queries.
+
+Settings:
+    CARD_VERIFY_CACHE_TIMEOUT: Seconds to keep a card's status in the cache
+"""
+
+import json
+import logging
+
+from cards.models import Card, Combatant, Waiver
+from cards.utility import signing
+from cards.utility.time import add_years, string_to_date, today
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+
+logger = logging.getLogger("cards")
+
+PREFIX = "EMOL1"
+CACHE_KEY = "card_verify:{card_id}:{day}"
+
+# Cards are valid for this many years from date_issued (see Card.expiration_date)
+CARD_YEARS = 2
+
+
+class PayloadError(ValueError):
+    """A payload is malformed or its signature doesn't verify"""
+
+
+def _cache_key(card_id):
+    return CACHE_KEY.format(card_id=card_id, day=today().isoformat())
+
+
+def card_status(card_id):
+    """Current validity of a combatant's cards
+
+    Returns:
+        A dict of card_id, sca_name, waiver_expiry, valid and disciplines
+        (each with slug, name, expiry and valid), or None if no combatant has
+        this card_id
+    """
+    key = _cache_key(card_id)
+    status = cache.get(key)
+    if status is not None:
+        return status
+
+    rows = list(
+        Combatant.objects.filter(card_id=card_id)
+        .order_by("cards__discipline__slug")
+        .values_list(
+            "sca_name",
+            "waiver__date_signed",
+            "cards__discipline__slug",
+            "cards__discipline__name",
+            "cards__date_issued",
+        )
+    )
+    if not rows:
+        return None
+
+    sca_name, waiver_signed = rows[0][:2]
+    status = _status(
+        card_id,
+        sca_name,
+        waiver_signed,
+        [
+            {"slug": slug, "name": name, "date_issued": date_issued}
+            for _, _, slug, name, date_issued in rows
+            if slug is not None
+        ],
+    )
+    cache.set(key, status, getattr(settings, "CARD_VERIFY_CACHE_TIMEOUT", 60 * 60))
+    return status
+
+
+def lookup_cards(card_ids):
+    """Current validity, authorizations and warrants for many card_ids
+
+    Combatants, cards, authorizations and warrants are each read once,
+    however many card_ids are asked for.
+
+    Returns:
+        A dict of card_id to status as for card_status, with each discipline
+        also listing its authorization and marshal slugs. Unknown card_ids
+        are left out.
+    """
+    combatants = (
+        Combatant.objects.filter(card_id__in=set(card_ids))
+        .exclude(card_id="")
+        .select_related("waiver")
+        .prefetch_related(
+            Prefetch(
+                "cards",
+                queryset=Card.objects.select_related("discipline")
+                .prefetch_related("authorizations", "warrants")
+                .order_by("discipline__slug"),
+            )
+        )
+    )
+
+    statuses = {}
+    for combatant in combatants:
+        waiver = getattr(combatant, "waiver", None)
+        statuses[combatant.card_id] = _status(
+            combatant.card_id,
+            combatant.sca_name,
+            waiver.date_signed if waiver else None,
+            [
+                {
+                    "slug": card.discipline.slug,
+                    "name": card.discipline.name,
+                    "date_issued": card.date_issued,
+                    "authorizations": sorted(
+                        authorization.slug
+                        for authorization in card.authorizations.all()
+                    ),
+                    "warrants": sorted(marshal.slug for marshal in card.warrants.all()),
+                }
+                for card in combatant.cards.all()
+            ],
+        )
+    return statuses
+
+
+def _status(card_id, sca_name, waiver_signed, cards):
+    """Build a card status
+
+    Args:
+        cards: Dicts with each card's slug, name and date_issued, plus any
+            extra keys to pass through
+    """
+    current = today()
+    waiver_expiry = (
+        add_years(waiver_signed, Waiver.WAIVER_VALIDITY_YEARS)
+        if waiver_signed
+        else None
+    )
+    waiver_valid = waiver_expiry is not None and waiver_expiry > current
+
+    disciplines = []
+    for card in cards:
+        date_issued = card.pop("date_issued")
+        expiry = add_years(date_issued, CARD_YEARS)
+        disciplines.append(
+            {
+                **card,
+                "expiry": expiry.isoformat(),
+                "valid": waiver_valid and expiry > current,
+            }
+        )
+
+    return {
+        "card_id": card_id,
+        "sca_name": sca_name or "",
+        "waiver_expiry": waiver_expiry.isoformat() if waiver_expiry else None,
+        "valid": any(discipline["valid"] for discipline in disciplines),
+        "disciplines": disciplines,
+    }
+
+
+def invalidate(card_ids):
+    """Drop cached status for some card_ids, now and again on commit"""
+    keys = [_cache_key(card_id) for card_id in card_ids if card_id]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def make_payload(card_id):
+    """Build the signed QR payload for a card_id
+
+    Returns:
+        The payload string, or None if no combatant has this card_id
+    """
+    status = card_status(card_id)
+    if status is None:
+        return None
+
+    body = {
+        "c": status["card_id"],
+        "n": status["sca_name"],
+        "w": status["waiver_expiry"],
+        "d": [
+            [discipline["slug"], discipline["expiry"]]
+            for discipline in status["disciplines"]
+        ],
+        "s": today().isoformat(),
+    }
+    encoded = signing.b64encode(json.dumps(body, separators=(",", ":")).encode("utf-8"))
+    signed = f"{PREFIX}.{encoded}"
+    return f"{signed}.{signing.sign(signed.encode('ascii'))}"
+
+
+def read_payload(payload):
+    """Check a payload's signature and decode it
+
+    Returns:
+        A dict of card_id, sca_name, waiver_expiry, signed (the date it was
+        signed) and disciplines (each with slug and expiry), as printed
+
+    Raises:
+        PayloadError: If the payload is malformed or the signature is invalid
+    """
+    try:
+        signed, signature = payload.strip().rsplit(".", 1)
+        prefix, encoded = signed.split(".")
+    except ValueError as exc:
+        raise PayloadError("Malformed card payload") from exc
+
+    if prefix != PREFIX:
+        raise PayloadError("Unknown card payload version")
+    if not signing.verify(signed.encode("ascii", "replace"), signature):
+        raise PayloadError("Card payload signature is invalid")
+
+    try:
+        body = json.loads(signing.b64decode(encoded))
+        return {
+            "card_id": body["c"],
+            "sca_name": body["n"],
+            "waiver_expiry": body["w"],
+            "signed": string_to_date(body["s"]).isoformat(),
+            "disciplines": [
+                {"slug": slug, "expiry": expiry} for slug, expiry in body["d"]
+            ],
+        }
+    except (ValueError, KeyError, TypeError) as exc:
+        raise PayloadError("Malformed card payload") from exc
@@ -0,0 +1,388 @@
+"""Bulk import of combatants from CSV or JSON.
+
+Rows are read one at a time, validated with the same rules as the combatant
+API, and written in chunks: combatants, waivers, cards, authorizations and
+warrants are each inserted with a single bulk_create per chunk, and reminders
+are generated in bulk. Privacy policy emails are queued for the
+send_privacy_emails command rather than sent inline.
+
+A row is a combatant's CombatantSerializer fields plus, optionally:
+
+    waiver_date: Date the combatant's waiver was signed
+    cards: A list of {discipline, date_issued, authorizations, warrants},
+        where the last two are lists of slugs
+
+CSV files can't nest, so a CSV row carries at most one card, in the columns
+discipline, card_date, authorizations and warrants (the last two separated
+by semicolons).
+
+JSON input is either a single array of rows or one row object per line
+(JSON Lines). Only JSON Lines is read incrementally.
+"""
+
+import csv
+import json
+import logging
+from itertools import chain
+
+from cards.api.combatant import CombatantSerializer
+from cards.models import (
+    Authorization,
+    Card,
+    Combatant,
+    CombatantAuthorization,
+    CombatantWarrant,
+    Discipline,
+    Marshal,
+    Region,
+    Reminder,
+    Waiver,
+)
+from cards.utility.marshal_roster import invalidate_roster
+from django.conf import settings
+from django.db import transaction
+from django.utils.crypto import get_random_string
+from rest_framework import serializers
+
+logger = logging.getLogger("cards")
+
+IMPORT_FORMATS = ["csv", "json"]
+
+# CSV columns describing a row's single card
+CSV_CARD_COLUMNS = ["discipline", "card_date", "authorizations", "warrants"]
+
+
+class ImportCardSerializer(serializers.Serializer):
+    """Serializer for a card in an imported row"""
+
+    discipline = serializers.SlugField()
+    date_issued = serializers.DateField()
+    authorizations = serializers.ListField(
+        child=serializers.SlugField(), required=False, default=list
+    )
+    warrants = serializers.ListField(
+        child=serializers.SlugField(), required=False, default=list
+    )
+
+    def validate(self, attrs):
+        """Check slugs against the disciplines the importer may write to"""
+        disciplines = self.context["disciplines"]
+        slug = attrs["discipline"]
+        if slug not in disciplines:
+            raise serializers.ValidationError(f"Unknown discipline '{slug}'")
+        if slug not in self.context["allowed_disciplines"]:
+            raise serializers.ValidationError(
+                f"You may not import cards for discipline '{slug}'"
+            )
+
+        for field, lookup in [
+            ("authorizations", self.context["authorizations"]),
+            ("warrants", self.context["marshals"]),
+        ]:
+            unknown = [name for name in attrs[field] if (slug, name) not in lookup]
+            if unknown:
+                raise serializers.ValidationError(
+                    f"Unknown {field} for '{slug}': {', '.join(unknown)}"
+                )
+
+        return attrs
+
+    def create(self, validated_data):
+        raise NotImplementedError("This serializer is read-only")
+
+    def update(self, instance, validated_data):
+        raise NotImplementedError("This serializer is read-only")
+
+
+class ImportRowSerializer(CombatantSerializer):
+    """Serializer for one imported row: a combatant and their cards"""
+
+    waiver_date = serializers.DateField(required=False, allow_null=True)
+    cards = ImportCardSerializer(many=True, required=False)
+
+    class Meta(CombatantSerializer.Meta):
+        fields = [
+            field for field in CombatantSerializer.Meta.fields if field != "uuid"
+        ] + ["waiver_date", "cards"]
+
+    def validate_cards(self, value):
+        disciplines = [card["discipline"] for card in value]
+        if len(disciplines) != len(set(disciplines)):
+            raise serializers.ValidationError("Only one card per discipline")
+        return value
+
+    def to_internal_value(self, data):
+        if "waiver_date" in data and not data["waiver_date"]:
+            data["waiver_date"] = None
+        return super().to_internal_value(data)
+
+
+def csv_card(row):
+    """Move a CSV row's card columns into a cards list"""
+    card = {column: row.pop(column, None) for column in CSV_CARD_COLUMNS}
+    if not card["discipline"]:
+        return row
+
+    row["cards"] = [
+        {
+            "discipline": card["discipline"],
+            "date_issued": card["card_date"],
+            "authorizations": [
+                name.strip()
+                for name in (card["authorizations"] or "").split(";")
+                if name.strip()
+            ],
+            "warrants": [
+                name.strip()
+                for name in (card["warrants"] or "").split(";")
+                if name.strip()
+            ],
+        }
+    ]
+    return row
+
+
+def read_rows(stream, file_format):
+    """Yield rows from a text stream
+
+    A JSON Lines row that can't be parsed is yielded as the ValueError
+    describing it, so it can be reported against its row number.
+
+    Args:
+        stream: A text file-like object
+        file_format: One of IMPORT_FORMATS
+
+    Raises:
+        ValueError: For an unknown format or a malformed JSON array
+    """
+    if file_format == "csv":
+        for row in csv.DictReader(stream):
+            yield csv_card(
+                {
+                    key.strip(): (value or "").strip()
+                    for key, value in row.items()
+                    if key
+                }
+            )
+        return
+
+    if file_format != "json":
+        raise ValueError(f"Unknown import format '{file_format}'")
+
+    first_line = stream.readline()
+    if first_line.lstrip().startswith("["):
+        rows = json.loads(first_line + stream.read())
+        if not isinstance(rows, list):
+            raise ValueError("Expected a JSON array of rows")
+        yield from rows
+        return
+
+    for line in chain([first_line], stream):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as exc:
+            yield exc
+
+
+class CombatantImporter:
+    """Validate and write imported rows in chunks
+
+    Args:
+        allowed_disciplines: Slugs of disciplines cards may be imported for,
+            or None for all of them
+        dry_run: Validate only; write nothing
+        chunk_size: Rows per transaction, defaulting to
+            settings.COMBATANT_IMPORT_CHUNK_SIZE
+    """
+
+    def __init__(self, allowed_disciplines=None, dry_run=False, chunk_size=None):
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size or getattr(
+            settings, "COMBATANT_IMPORT_CHUNK_SIZE", 500
+        )
+
+        disciplines = {
+            discipline.slug: discipline for discipline in Discipline.objects.all()
+        }
+        self.context = {
+            "region_codes": list(
+                Region.objects.filter(active=True).values_list("code", flat=True)
+            ),
+            "disciplines": disciplines,
+            "allowed_disciplines": (
+                set(disciplines)
+                if allowed_disciplines is None
+                else set(allowed_disciplines)
+            ),
+            "authorizations": {
+                (authorization.discipline.slug, authorization.slug): authorization
+                for authorization in Authorization.objects.select_related("discipline")
+            },
+            "marshals": {
+                (marshal.discipline.slug, marshal.slug): marshal
+                for marshal in Marshal.objects.select_related("discipline")
+            },
+        }
+
+        self.rows = 0
+        self.imported = 0
+        self.errors = []
+
+    def run(self, rows):
+        """Import rows from an iterable
+
+        Returns:
+            The report; see report()
+        """
+        chunk = []
+        for row_number, row in enumerate(rows, start=1):
+            self.rows += 1
+            data = self.validate(row_number, row)
+            if data is None:
+                continue
+
+            chunk.append((row_number, data))
+            if len(chunk) >= self.chunk_size:
+                self.flush(chunk)
+                chunk = []
+
+        if chunk:
+            self.flush(chunk)
+
+        return self.report()
+
+    def report(self):
+        """Summarize the import
+
+        Returns:
+            A dict of the row count, how many were (or in a dry run, would
+            be) imported, and a list of {row, errors} for rejected rows
+        """
+        return {
+            "dry_run": self.dry_run,
+            "rows": self.rows,
+            "imported": self.imported,
+            "errors": self.errors,
+        }
+
+    def reject(self, row_number, errors):
+        self.errors.append({"row": row_number, "errors": errors})
+
+    def validate(self, row_number, row):
+        """Validate one row, recording any errors
+
+        Returns:
+            The validated data, or None if the row was rejected
+        """
+        if isinstance(row, ValueError):
+            self.reject(row_number, {"non_field_errors": [f"Invalid JSON: {row}"]})
+            return None
+        if not isinstance(row, dict):
+            self.reject(row_number, {"non_field_errors": ["Expected an object"]})
+            return None
+
+        serializer = ImportRowSerializer(data=row, context=self.context)
+        if not serializer.is_valid():
+            self.reject(row_number, serializer.errors)
+            return None
+
+        return serializer.validated_data
+
+    def flush(self, chunk):
+        """Write a chunk of validated rows"""
+        rows = [data for _, data in chunk]
+        if not self.dry_run:
+            with transaction.atomic():
+                self.write(rows)
+
+        self.imported += len(rows)
+
+    def write(self, rows):
+        """Bulk insert validated rows. Call inside a transaction."""
+        logger.info("Importing %s combatants", len(rows))
+
+        combatants = []
+        for data in rows:
+            fields = {
+                key: value
+                for key, value in data.items()
+                if key not in ("waiver_date", "cards")
+            }
+            combatants.append(
+                Combatant(
+                    privacy_acceptance_code=get_random_string(length=16),
+                    privacy_email_queued=True,
+                    **fields,
+                )
+            )
+        Combatant.objects.bulk_create(combatants)
+
+        # MySQL doesn't return primary keys from bulk_create, so look the new
+        # rows up by uuid.
+        ids = dict(
+            Combatant.objects.filter(
+                uuid__in=[combatant.uuid for combatant in combatants]
+            ).values_list("uuid", "id")
+        )
+        combatant_ids = [ids[combatant.uuid] for combatant in combatants]
+
+        waivers = [
+            Waiver(combatant_id=combatant_id, date_signed=data["waiver_date"])
+            for combatant_id, data in zip(combatant_ids, rows)
+            if data.get("waiver_date")
+        ]
+        Waiver.objects.bulk_create(waivers)
+
+        disciplines = self.context["disciplines"]
+        cards = [
+            Card(
+                combatant_id=combatant_id,
+                discipline=disciplines[card["discipline"]],
+                date_issued=card["date_issued"],
+            )
+            for combatant_id, data in zip(combatant_ids, rows)
+            for card in data.get("cards", [])
+        ]
+        Card.objects.bulk_create(cards)
+        card_ids = dict(
+            Card.objects.filter(uuid__in=[card.uuid for card in cards]).values_list(
+                "uuid", "id"
+            )
+        )
+
+        authorizations = []
+        warrants = []
+        for card, card_data in zip(
+            cards, (card for data in rows for card in data.get("cards", []))
+        ):
+            card.id = card_ids[card.uuid]
+            slug = card_data["discipline"]
+            authorizations.extend(
+                CombatantAuthorization(
+                    card_id=card.id,
+                    authorization=self.context["authorizations"][(slug, name)],
+                )
+                for name in card_data["authorizations"]
+            )
+            warrants.extend(
+                CombatantWarrant(
+                    card_id=card.id, marshal=self.context["marshals"][(slug, name)]
+                )
+                for name in card_data["warrants"]
+            )
+        CombatantAuthorization.objects.bulk_create(authorizations)
+        CombatantWarrant.objects.bulk_create(warrants)
+
+        Reminder.bulk_create_or_update_reminders(
+            cards
+            + list(
+                Waiver.objects.filter(
+                    combatant_id__in=[waiver.combatant_id for waiver in waivers]
+                )
+            )
+        )
+
+        if warrants:
+            invalidate_roster()
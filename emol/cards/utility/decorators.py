@@ -5,7 +5,8 @@ from functools import wraps
 
 from cards.models.user_permission import UserPermission
 from current_user.middleware import get_current_user
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.utils.log import log_response
 
 
 def permission_required(permission, related=None):
@@ -43,3 +44,38 @@ def permission_required(permission, related=None):
         return check_permission
 
     return actual_decorator
+
+
+def async_require_http_methods(request_method_list):
+    """Django's require_http_methods, for async views.
+
+    Django's own decorators only wrap async views from Django 5.0 on; before
+    that they turn them into sync views that return a coroutine. CSRF checks
+    for async views come from CsrfViewMiddleware instead of csrf_protect.
+
+    Usage::
+
+        @async_require_http_methods(["GET", "POST"])
+        async def my_view(request):
+            ...
+
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        async def inner(request, *args, **kwargs):
+            if request.method not in request_method_list:
+                response = HttpResponseNotAllowed(request_method_list)
+                log_response(
+                    "Method Not Allowed (%s): %s",
+                    request.method,
+                    request.path,
+                    response=response,
+                    request=request,
+                )
+                return response
+            return await view_func(request, *args, **kwargs)
+
+        return inner
+
+    return decorator
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Conditional GET helpers for public pages built from cached data.
+
+Pages rendered with base.html show a navbar that depends on who is signed
+in, so validators are only handed to anonymous visitors; everyone else gets
+a freshly rendered page.
+"""
+
+import hashlib
+
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    """Build a strong ETag from the values a page's content depends on."""
+    digest = hashlib.sha256("\0".join(str(part) for part in parts).encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def is_cacheable(request):
+    """Whether a response to this request may carry validators."""
+    return request.method in ("GET", "HEAD") and request.user.is_anonymous
+
+
+def not_modified(request, etag, last_modified=None):
+    """Get a 304 response if the client's copy is current, otherwise None.
+
+    Args:
+        request: The incoming request
+        etag: The page's current ETag
+        last_modified: Optional datetime the page content last changed
+    """
+    if not is_cacheable(request):
+        return None
+
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+
+
+def set_validators(request, response, etag, last_modified=None, max_age=0):
+    """Add ETag, Last-Modified and Cache-Control headers to a response.
+
+    Args:
+        request: The request being answered
+        response: The response to add headers to
+        etag: The page's current ETag
+        last_modified: Optional datetime the page content last changed
+        max_age: Seconds clients may use the page without revalidating
+    """
+    patch_vary_headers(response, ["Cookie"])
+    if not is_cacheable(request):
+        return response
+
+    response.headers["ETag"] = etag
+    if last_modified:
+        response.headers["Last-Modified"] = http_date(last_modified.timestamp())
+
+    if max_age:
+        patch_cache_control(response, public=True, max_age=max_age)
+    else:
+        patch_cache_control(response, public=True, no_cache=True)
+    return response
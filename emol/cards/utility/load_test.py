@@ -0,0 +1,194 @@
+"""Load test workers: drive a running server with a mix of requests.
+
+This module only uses requests and the standard library, so it can run in
+worker processes that never set Django up. The load_test command builds a
+Plan from the database and hands it to run_worker in each thread or
+process.
+
+Each worker has its own HTTP sessions and picks a scenario for each request
+by weight from the plan's mix:
+
+    card: GET a combatant's card page
+    pin: POST a correct PIN to the PIN verification form
+    request: POST the card request form for an address with no combatant,
+        so no mail is sent
+    staff_detail: GET one combatant from the API as a logged in staff user
+    staff_list: GET the combatant list from the API as a staff user
+
+Requests carry an X-Real-IP header from a pool of simulated client
+addresses, so the global throttle counts them as coming from many clients
+rather than whitelisting them as local.
+"""
+
+import random
+import time
+from typing import NamedTuple, Optional
+
+import requests
+
+SCENARIOS = ("card", "pin", "request", "staff_detail", "staff_list")
+DEFAULT_MIX = {
+    "card": 60,
+    "pin": 10,
+    "request": 10,
+    "staff_detail": 15,
+    "staff_list": 5,
+}
+REQUEST_TIMEOUT = 30
+
+
+class Plan(NamedTuple):
+    """What the workers request and how hard
+
+    Attributes:
+        base_url: Server to load, e.g. http://localhost:8000
+        mix: Scenario name to relative weight
+        duration: Seconds each worker runs for
+        requests: Requests for this worker to make, or None to run for the
+            duration
+        clients: Number of simulated client addresses; 0 sends none
+        seed: Seed for the workers' random generators
+        card_paths: Card page paths
+        pin_targets: (PIN form path, PIN) pairs
+        request_path: Card request form path
+        staff_detail_paths: Combatant API paths
+        staff_list_path: Combatant list API path
+        session_cookie: (cookie name, session key) of the staff session
+        csrf_cookie: Name of the CSRF cookie
+    """
+
+    base_url: str
+    mix: dict
+    duration: float
+    requests: Optional[int]
+    clients: int
+    seed: int
+    card_paths: list
+    pin_targets: list
+    request_path: str
+    staff_detail_paths: list
+    staff_list_path: str
+    session_cookie: tuple
+    csrf_cookie: str
+
+
+def parse_mix(text):
+    """Parse a mix such as "card=70,pin=30"
+
+    Returns:
+        A dict of scenario to weight
+
+    Raises:
+        ValueError: On an unknown scenario or a bad weight
+    """
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {name!r}; choose from {SCENARIOS}")
+        mix[name] = float(weight)
+        if mix[name] < 0:
+            raise ValueError(f"Negative weight for {name}")
+    if not any(mix.values()):
+        raise ValueError("The mix has no weight")
+    return mix
+
+
+class Worker:
+    """One simulated stream of visitors and staff"""
+
+    def __init__(self, plan, number):
+        self.plan = plan
+        self.rng = random.Random(f"{plan.seed}:{number}")
+        self.public = requests.Session()
+        self.staff = requests.Session()
+        self.staff.cookies.set(*plan.session_cookie)
+        self.csrf_token = None
+
+    def url(self, path):
+        return self.plan.base_url + path
+
+    def headers(self):
+        if not self.plan.clients:
+            return {}
+        n = self.rng.randrange(self.plan.clients)
+        return {"X-Real-IP": f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}"}
+
+    def post_form(self, path, data):
+        if self.csrf_token is None:
+            # Forms need the CSRF cookie. The card request page always sets
+            # it; the PIN form redirects while PINs are switched off.
+            self.public.get(
+                self.url(self.plan.request_path),
+                headers=self.headers(),
+                timeout=REQUEST_TIMEOUT,
+            )
+            self.csrf_token = self.public.cookies.get(self.plan.csrf_cookie, "")
+        return self.public.post(
+            self.url(path),
+            data={**data, "csrfmiddlewaretoken": self.csrf_token},
+            headers={**self.headers(), "Referer": self.url(path)},
+            allow_redirects=False,
+            timeout=REQUEST_TIMEOUT,
+        )
+
+    def card(self):
+        return self.public.get(
+            self.url(self.rng.choice(self.plan.card_paths)),
+            headers=self.headers(),
+            allow_redirects=False,
+            timeout=REQUEST_TIMEOUT,
+        )
+
+    def pin(self):
+        path, pin = self.rng.choice(self.plan.pin_targets)
+        return self.post_form(path, {"pin": pin})
+
+    def request(self):
+        email = f"load-test-{self.rng.randrange(10**6)}@load-test.invalid"
+        return self.post_form(self.plan.request_path, {"request-card-email": email})
+
+    def staff_detail(self):
+        return self.staff.get(
+            self.url(self.rng.choice(self.plan.staff_detail_paths)),
+            headers=self.headers(),
+            allow_redirects=False,
+            timeout=REQUEST_TIMEOUT,
+        )
+
+    def staff_list(self):
+        return self.staff.get(
+            self.url(self.plan.staff_list_path),
+            headers=self.headers(),
+            allow_redirects=False,
+            timeout=REQUEST_TIMEOUT,
+        )
+
+    def run(self):
+        """Make requests until the duration or request count is reached
+
+        Returns:
+            A list of (scenario, status, seconds); status is None if the
+            request failed without a response
+        """
+        scenarios = [name for name, weight in self.plan.mix.items() if weight]
+        weights = [self.plan.mix[name] for name in scenarios]
+        deadline = time.monotonic() + self.plan.duration
+        results = []
+        while time.monotonic() < deadline:
+            if self.plan.requests is not None and len(results) >= self.plan.requests:
+                break
+            scenario = self.rng.choices(scenarios, weights)[0]
+            start = time.perf_counter()
+            try:
+                status = getattr(self, scenario)().status_code
+            except requests.RequestException:
+                status = None
+            results.append((scenario, status, time.perf_counter() - start))
+        return results
+
+
+def run_worker(plan, number):
+    """Run one worker; a top level function so that processes can run it"""
+    return Worker(plan, number).run()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""Cached public marshal roster.
+
+The marshal list page shows every combatant holding a warrant on a valid
+card, grouped by discipline. Warrants change rarely, so the roster is built
+once into plain data and kept in the cache along with an ETag and a
+Last-Modified time for conditional requests.
+
+The cached roster is dropped whenever something it shows changes: warrants,
+cards, marshal or discipline names, or a combatant's SCA name. It also
+records the day it was built, since cards expire with the calendar rather
+than with a save.
+
+Settings:
+    MARSHAL_ROSTER_CACHE_TIMEOUT: Seconds to keep a roster in the cache
+"""
+
+import json
+import logging
+
+from cards.utility.http_cache import make_etag
+from cards.utility.time import add_years, today
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger("cards")
+
+CACHE_KEY = "marshal_roster"
+DEFAULT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def build_roster():
+    """Build the marshal roster from the database.
+
+    Returns:
+        A dict with the roster date, build time, ETag and a list of
+        disciplines, each with its marshals and their warrant names
+    """
+    # pylint: disable=import-outside-toplevel
+    from cards.models import CombatantWarrant, Discipline
+
+    as_of = today()
+    disciplines = {
+        discipline.id: {"name": discipline.name, "marshals": []}
+        for discipline in Discipline.objects.order_by("name")
+    }
+
+    # Cards are valid for two years from issue (see Card.is_valid)
+    warrants = (
+        CombatantWarrant.objects.filter(card__date_issued__gt=add_years(as_of, -2))
+        .values_list(
+            "card__combatant__sca_name",
+            "marshal__discipline_id",
+            "marshal__name",
+        )
+        .order_by("card__combatant__sca_name", "marshal__name")
+    )
+
+    for sca_name, discipline_id, marshal_name in warrants:
+        marshals = disciplines[discipline_id]["marshals"]
+        if not marshals or marshals[-1]["sca_name"] != sca_name:
+            marshals.append({"sca_name": sca_name, "warrants": []})
+        marshals[-1]["warrants"].append(marshal_name)
+
+    roster = list(disciplines.values())
+
+    return {
+        "as_of": as_of,
+        "last_modified": timezone.now(),
+        "etag": make_etag(json.dumps(roster)),
+        "disciplines": roster,
+    }
+
+
+def get_roster():
+    """Get the marshal roster, building and caching it if needed."""
+    roster = cache.get(CACHE_KEY)
+    if roster is not None and roster["as_of"] == today():
+        return roster
+
+    logger.info("Building marshal roster")
+    roster = build_roster()
+    cache.set(
+        CACHE_KEY,
+        roster,
+        getattr(settings, "MARSHAL_ROSTER_CACHE_TIMEOUT", DEFAULT_CACHE_TIMEOUT),
+    )
+    return roster
+
+
+def invalidate_roster(**kwargs):  # noqa: ARG001
+    """Drop the cached roster. Usable directly as a signal receiver.
+
+    The roster is dropped again once the transaction commits, so a request
+    that rebuilds it from pre-commit data in the meantime doesn't stick.
+    """
+    logger.debug("Invalidating marshal roster")
+    cache.delete(CACHE_KEY)
+    transaction.on_commit(lambda: cache.delete(CACHE_KEY))
+
+
+def remember_sca_name(sender, instance, **kwargs):  # noqa: ARG001
+    """post_init receiver: note a combatant's SCA name as loaded."""
+    instance._roster_sca_name = instance.__dict__.get("sca_name")
+
+
+def invalidate_on_sca_name_change(sender, instance, created, **kwargs):  # noqa: ARG001
+    """post_save receiver: drop the roster if a combatant's SCA name changed."""
+    if not created and instance.sca_name != instance._roster_sca_name:
+        invalidate_roster()
+    instance._roster_sca_name = instance.sca_name
+
+
+def connect_signals():
+    """Hook roster invalidation up to the models it depends on."""
+    # pylint: disable=import-outside-toplevel
+    from cards.models import Card, Combatant, CombatantWarrant, Discipline, Marshal
+    from django.db.models import signals
+
+    for model in (CombatantWarrant, Card, Marshal, Discipline):
+        signals.post_save.connect(
+            invalidate_roster, sender=model, dispatch_uid=f"roster_{model.__name__}"
+        )
+        signals.post_delete.connect(
+            invalidate_roster, sender=model, dispatch_uid=f"roster_{model.__name__}"
+        )
+
+    # Card.warrants.add() and friends bypass CombatantWarrant.save()
+    signals.m2m_changed.connect(
+        invalidate_roster, sender=Card.warrants.through, dispatch_uid="roster_warrants"
+    )
+
+    signals.post_init.connect(
+        remember_sca_name, sender=Combatant, dispatch_uid="roster_sca_name"
+    )
+    signals.post_save.connect(
+        invalidate_on_sca_name_change,
+        sender=Combatant,
+        dispatch_uid="roster_sca_name",
+    )
@@ -1,8 +1,16 @@
 """Simple name generator based on heraldic terms.
 
 Generates random name identifiers of the form "argent-base-charge"
+
+The namespace can also be enumerated: name_at() maps an index onto a name and
+shuffle_index() permutes indexes with a keyed Feistel network, so walking
+0, 1, 2, ... through both visits every name exactly once in an order that
+looks random. An optional fourth term (see FOURTH_TERMS) multiplies the size
+of the namespace when the three-term names start running out.
 """
 
+import hashlib
+import hmac
 from random import randint
 
 TINCTURES = [
@@ -263,6 +271,123 @@ CHARGES = {
     ],
 }
 
+FOURTH_TERMS = [
+    "wavy",
+    "nebuly",
+    "embattled",
+    "engrailed",
+    "invected",
+    "indented",
+    "dancetty",
+    "raguly",
+    "potenty",
+    "dovetailed",
+    "urdy",
+    "rayonny",
+    "bretessed",
+    "flory",
+    "cotised",
+    "fimbriated",
+    "voided",
+    "couped",
+    "erased",
+    "crowned",
+    "gorged",
+    "armed",
+    "langued",
+    "displayed",
+    "addorsed",
+    "respectant",
+    "counterchanged",
+    "semy",
+    "enfiled",
+    "inverted",
+    "reversed",
+    "crined",
+]
+
+FEISTEL_ROUNDS = 4
+
+
+def _families():
+    return (BEASTS, CHARGES)
+
+
+def namespace_size(fourth_term=False):
+    """Number of distinct names the generator can produce.
+
+    Args:
+        fourth_term: Count names with a fourth term appended
+    """
+    size = sum(len(family[1]) * len(family[2]) for family in _families())
+    size *= len(TINCTURES)
+    if fourth_term:
+        size *= len(FOURTH_TERMS)
+    return size
+
+
+def name_at(index, fourth_term=False):
+    """Get the name at a position in the enumerated namespace.
+
+    Args:
+        index: Position in the namespace, 0 <= index < namespace_size()
+        fourth_term: Enumerate four-term names
+
+    Raises:
+        IndexError: If index is outside the namespace
+    """
+    if not 0 <= index < namespace_size(fourth_term):
+        raise IndexError(f"Name index {index} is outside the namespace")
+
+    suffix = ""
+    if fourth_term:
+        index, fourth = divmod(index, len(FOURTH_TERMS))
+        suffix = f"-{FOURTH_TERMS[fourth]}"
+
+    index, tincture = divmod(index, len(TINCTURES))
+    for family in _families():
+        family_size = len(family[1]) * len(family[2])
+        if index < family_size:
+            first, second = divmod(index, len(family[2]))
+            return (
+                f"{family[1][first]}-{family[2][second]}-{TINCTURES[tincture]}{suffix}"
+            )
+        index -= family_size
+
+    raise IndexError("Name index is outside the namespace")  # pragma: no cover
+
+
+def shuffle_index(index, size, key):
+    """Map an index onto a pseudo-random position in range(size).
+
+    This is a bijection on range(size) for a given key: a balanced Feistel
+    network over the smallest even bit width that covers size, with
+    cycle-walking to bring results that land outside the range back in.
+
+    Args:
+        index: Position to shuffle, 0 <= index < size
+        size: Size of the range being permuted
+        key: Secret string selecting the permutation
+    """
+    half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+    mask = (1 << half_bits) - 1
+    key = key.encode()
+
+    def round_value(round_number, value):
+        digest = hmac.new(
+            key, f"{round_number}:{value}".encode(), hashlib.sha256
+        ).digest()
+        return int.from_bytes(digest[:8], "big") & mask
+
+    value = index
+    while True:
+        left, right = value >> half_bits, value & mask
+        for round_number in range(FEISTEL_ROUNDS):
+            left, right = right, left ^ round_value(round_number, right)
+        value = (left << half_bits) | right
+        if value < size:
+            return value
+
 
 def generate_name():
     """
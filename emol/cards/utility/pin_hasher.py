@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""Bounded worker pool for PIN hashing and verification.
+
+PIN hashes use their own PBKDF2 configuration (PIN_HASH_ITERATIONS) so the
+CPU cost of a PIN check is fixed by our settings rather than by whatever
+Django's password hasher defaults happen to be.
+
+All hashing runs on a small thread pool with a bounded queue. When the pool
+is saturated, callers get PinHasherBusy straight away instead of piling up
+behind each other; views turn that into a 429. Async views await the pool
+with averify_pin and ahash_pin, so a hash never blocks the thread that runs
+their sync code.
+
+Settings:
+    PIN_HASH_ITERATIONS: PBKDF2 iterations for PIN hashes
+    PIN_HASH_WORKERS: Number of hashing threads
+    PIN_HASH_QUEUE_DEPTH: Number of hash jobs allowed to wait for a thread
+    PIN_HASH_TIMEOUT: Seconds to wait for a queued job before giving up
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password
+
+logger = logging.getLogger("cards")
+
+DEFAULT_ITERATIONS = 100_000
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE_DEPTH = 8
+DEFAULT_TIMEOUT = 10
+
+
+class PinHasherBusy(Exception):
+    """The PIN hashing pool has no capacity for another job."""
+
+
+class PinHasher(PBKDF2PasswordHasher):
+    """PBKDF2 hasher with a PIN-specific algorithm tag and iteration count."""
+
+    algorithm = "pin_pbkdf2_sha256"
+
+    @property  # type: ignore[override]
+    def iterations(self):
+        return getattr(settings, "PIN_HASH_ITERATIONS", DEFAULT_ITERATIONS)
+
+
+class PinHashPool:
+    """A thread pool that refuses work rather than queueing without bound.
+
+    Capacity is workers + queue_depth jobs; one slot is held from submit
+    until the job finishes, whether or not the caller is still waiting.
+    """
+
+    def __init__(self, workers, queue_depth, timeout):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="pin-hash"
+        )
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+
+    def submit(self, func, *args):
+        """Queue func(*args) on the pool.
+
+        Returns:
+            A concurrent.futures.Future for the result
+
+        Raises:
+            PinHasherBusy: If the pool is full
+        """
+        if not self._slots.acquire(blocking=False):
+            logger.warning("PIN hash pool saturated, rejecting request")
+            raise PinHasherBusy()
+
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(lambda _future: self._slots.release())
+        return future
+
+    def run(self, func, *args):
+        """Run func(*args) on the pool and wait for its result.
+
+        Raises:
+            PinHasherBusy: If the pool is full or the job times out
+        """
+        future = self.submit(func, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError as exc:
+            logger.warning("PIN hash job timed out after %ss", self.timeout)
+            raise PinHasherBusy() from exc
+
+    async def arun(self, func, *args):
+        """Run func(*args) on the pool and await its result.
+
+        Raises:
+            PinHasherBusy: If the pool is full or the job times out
+        """
+        future = self.submit(func, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError as exc:
+            logger.warning("PIN hash job timed out after %ss", self.timeout)
+            raise PinHasherBusy() from exc
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_hasher = PinHasher()
+
+
+def get_pool():
+    """Get the process-wide PIN hash pool, creating it on first use."""
+    global _pool  # pylint: disable=global-statement
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PinHashPool(
+                    workers=getattr(settings, "PIN_HASH_WORKERS", DEFAULT_WORKERS),
+                    queue_depth=getattr(
+                        settings, "PIN_HASH_QUEUE_DEPTH", DEFAULT_QUEUE_DEPTH
+                    ),
+                    timeout=getattr(settings, "PIN_HASH_TIMEOUT", DEFAULT_TIMEOUT),
+                )
+    return _pool
+
+
+def _verify(raw_pin, encoded):
+    if encoded.startswith(f"{_hasher.algorithm}$"):
+        return _hasher.verify(raw_pin, encoded)
+
+    # PINs set before the PIN hasher existed use Django's default hashers
+    return check_password(raw_pin, encoded)
+
+
+def hash_pin(raw_pin):
+    """Hash a PIN on the pool.
+
+    Args:
+        raw_pin: The plain text PIN
+
+    Returns:
+        The encoded hash
+
+    Raises:
+        PinHasherBusy: If the pool has no capacity
+    """
+    return get_pool().run(_hasher.encode, raw_pin, _hasher.salt())
+
+
+def verify_pin(raw_pin, encoded):
+    """Check a PIN against an encoded hash on the pool.
+
+    Args:
+        raw_pin: The plain text PIN
+        encoded: The stored hash
+
+    Returns:
+        True if the PIN matches
+
+    Raises:
+        PinHasherBusy: If the pool has no capacity
+    """
+    return bool(get_pool().run(_verify, raw_pin, encoded))
+
+
+async def ahash_pin(raw_pin):
+    """Async hash_pin"""
+    return await get_pool().arun(_hasher.encode, raw_pin, _hasher.salt())
+
+
+async def averify_pin(raw_pin, encoded):
+    """Async verify_pin"""
+    return bool(await get_pool().arun(_verify, raw_pin, encoded))
+
+
+def needs_rehash(encoded):
+    """Whether a stored hash should be replaced with the current PIN hasher.
+
+    True for hashes from Django's default hashers and for PIN hashes made
+    with a different iteration count than is currently configured.
+    """
+    if not encoded.startswith(f"{_hasher.algorithm}$"):
+        return True
+    return _hasher.must_update(encoded)
@@ -0,0 +1,212 @@
+"""Streaming CSV and JSON exports of combatant and warrant rosters.
+
+Both rosters are one row per record (per card for the combatant roster, per
+warrant for the warrant roster). Rows are read with QuerySet.iterator() in
+chunks and encoded as they go, so an export of any size uses constant memory
+and the first bytes reach the client before the last row has been read.
+
+Filters, from the query string:
+
+    discipline: Discipline slug; repeat for several
+    valid: "true" for current cards only, "false" for expired only
+    expires_from, expires_to: Only cards expiring within this window
+        (inclusive, YYYY-MM-DD)
+"""
+
+import csv
+import json
+from datetime import date
+
+from cards.models import Card, CombatantWarrant
+from cards.utility.time import DATE_FORMAT, add_years, string_to_date, today
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Cards are valid for this many years from date_issued (see Card.expiration_date)
+CARD_YEARS = 2
+
+ROSTER_FIELDS = [
+    "sca_name",
+    "legal_name",
+    "email",
+    "member_number",
+    "card_id",
+    "discipline",
+    "authorizations",
+    "date_issued",
+    "expiration_date",
+    "valid",
+]
+
+WARRANT_ROSTER_FIELDS = [
+    "sca_name",
+    "discipline",
+    "marshal",
+    "date_issued",
+    "expiration_date",
+    "valid",
+]
+
+
+class ExportFilterError(ValueError):
+    """A query string filter couldn't be parsed"""
+
+
+def parse_filters(params):
+    """Parse export filters from a QueryDict
+
+    Returns:
+        A dict of disciplines (list of slugs), valid (bool or None),
+        expires_from and expires_to (dates or None)
+
+    Raises:
+        ExportFilterError: If a value is malformed
+    """
+    valid = params.get("valid")
+    if valid not in (None, "", "true", "false"):
+        raise ExportFilterError("valid must be true or false")
+
+    filters = {
+        "disciplines": params.getlist("discipline"),
+        "valid": None if not valid else valid == "true",
+    }
+    for name in ("expires_from", "expires_to"):
+        value = params.get(name)
+        try:
+            filters[name] = string_to_date(value) if value else None
+        except ValueError as exc:
+            raise ExportFilterError(f"{name} must be a YYYY-MM-DD date") from exc
+
+    return filters
+
+
+def filter_cards(queryset, filters, prefix=""):
+    """Apply parsed filters to a queryset of cards or rows with a card
+
+    Args:
+        queryset: The queryset to filter
+        filters: As returned by parse_filters
+        prefix: Lookup path from the queryset's model to Card, e.g. "card__"
+    """
+    queryset = queryset.filter(
+        **{f"{prefix}discipline__slug__in": filters["disciplines"]}
+    )
+
+    # A card is valid while date_issued + CARD_YEARS is in the future
+    valid_after = add_years(today(), -CARD_YEARS)
+    if filters["valid"] is True:
+        queryset = queryset.filter(**{f"{prefix}date_issued__gt": valid_after})
+    elif filters["valid"] is False:
+        queryset = queryset.filter(**{f"{prefix}date_issued__lte": valid_after})
+
+    if filters["expires_from"]:
+        queryset = queryset.filter(
+            **{
+                f"{prefix}date_issued__gte": add_years(
+                    filters["expires_from"], -CARD_YEARS
+                )
+            }
+        )
+    if filters["expires_to"]:
+        queryset = queryset.filter(
+            **{
+                f"{prefix}date_issued__lte": add_years(
+                    filters["expires_to"], -CARD_YEARS
+                )
+            }
+        )
+
+    return queryset
+
+
+def _card_dates(card, current):
+    expiration_date = card.expiration_date
+    return {
+        "date_issued": card.date_issued,
+        "expiration_date": expiration_date,
+        "valid": expiration_date > current,
+    }
+
+
+def roster_rows(filters):
+    """Yield combatant roster rows (one per card)"""
+    cards = (
+        filter_cards(Card.objects.all(), filters)
+        .select_related("combatant", "discipline")
+        .prefetch_related("authorizations")
+        .order_by("discipline__name", "combatant__sca_name", "id")
+    )
+
+    current = today()
+    for card in cards.iterator(chunk_size=_chunk_size()):
+        combatant = card.combatant
+        yield {
+            "sca_name": combatant.sca_name,
+            "legal_name": combatant.legal_name,
+            "email": combatant.email,
+            "member_number": combatant.member_number,
+            "card_id": combatant.card_id,
+            "discipline": card.discipline.name,
+            "authorizations": [auth.name for auth in card.authorizations.all()],
+            **_card_dates(card, current),
+        }
+
+
+def warrant_roster_rows(filters):
+    """Yield warrant roster rows (one per warrant)"""
+    warrants = (
+        filter_cards(CombatantWarrant.objects.all(), filters, prefix="card__")
+        .select_related("card__combatant", "card__discipline", "marshal")
+        .order_by(
+            "card__discipline__name", "marshal__name", "card__combatant__sca_name"
+        )
+    )
+
+    current = today()
+    for warrant in warrants.iterator(chunk_size=_chunk_size()):
+        card = warrant.card
+        yield {
+            # Not combatant.name, which falls back to the legal name; the
+            # warrant roster doesn't need read_combatant_info
+            "sca_name": card.combatant.sca_name,
+            "discipline": card.discipline.name,
+            "marshal": warrant.marshal.name,
+            **_card_dates(card, current),
+        }
+
+
+def _chunk_size():
+    return getattr(settings, "EXPORT_CHUNK_SIZE", 1000)
+
+
+class _Echo:
+    """File-like object that hands back what is written, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return "; ".join(value)
+    if isinstance(value, date):
+        return value.strftime(DATE_FORMAT)
+    return value
+
+
+def stream_csv(rows, fields):
+    """Yield CSV lines for rows, header first"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([_csv_value(row[field]) for field in fields])
+
+
+def stream_json(rows):
+    """Yield a JSON array of rows a piece at a time"""
+    yield "["
+    separator = ""
+    for row in rows:
+        yield separator + json.dumps(row, cls=DjangoJSONEncoder)
+        separator = ","
+    yield "]"
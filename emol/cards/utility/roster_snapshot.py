@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""Signed, versioned roster snapshots for offline checks at the field.
+
+A snapshot lists every combatant with a card_id and at least one valid card:
+their SCA name, waiver expiry, and for each valid card its discipline,
+expiry, authorizations and warrants. Legal names and contact details are
+never included.
+
+The version is the latest RosterChange version, which follows commit order
+(see RosterVersion). Given the version a device already holds, we send only
+the entries whose card_id has been logged since, plus the card_ids to drop.
+Cards expiring doesn't log a change, so devices must check the expiry dates
+they hold against their own clock.
+
+The snapshot is compact JSON, signed with cards.utility.signing and wrapped
+in an envelope:
+
+    {"kid": ..., "alg": "Ed25519", "snapshot": "<JSON>", "signature": ...}
+
+The signature covers the UTF-8 bytes of the snapshot string, which devices
+store as is so it can be re-verified offline.
+"""
+
+import json
+import logging
+from collections import defaultdict
+
+from cards.models import (
+    Card,
+    Combatant,
+    CombatantAuthorization,
+    CombatantWarrant,
+    Discipline,
+    RosterChange,
+    Waiver,
+)
+from cards.utility import card_payload, signing
+from cards.utility.time import add_years, today
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+logger = logging.getLogger("cards")
+
+CACHE_KEY = "roster_snapshot:{version}:{day}"
+
+# Layout of each combatant and card entry in a snapshot
+COMBATANT_FIELDS = ["card_id", "sca_name", "waiver_expiry", "cards"]
+CARD_FIELDS = ["discipline", "expiry", "authorizations", "warrants"]
+
+# Combatant fields that appear in the snapshot
+SNAPSHOT_COMBATANT_FIELDS = {"card_id", "sca_name", "accepted_privacy_policy"}
+
+
+def record_changes(card_ids):
+    """Log roster changes for some card_ids and drop their cached status"""
+    card_ids = list(card_ids)
+    RosterChange.record(card_ids)
+    card_payload.invalidate(card_ids)
+
+
+def record_combatant_changes(combatant_ids):
+    """Log roster changes for combatants by id"""
+    combatant_ids = {combatant_id for combatant_id in combatant_ids if combatant_id}
+    if combatant_ids:
+        record_changes(
+            Combatant.objects.filter(id__in=combatant_ids).values_list(
+                "card_id", flat=True
+            )
+        )
+
+
+def record_card_changes(card_ids):
+    """Log roster changes for the combatants holding some cards"""
+    card_ids = {card_id for card_id in card_ids if card_id}
+    if card_ids:
+        record_changes(
+            Combatant.objects.filter(cards__id__in=card_ids).values_list(
+                "card_id", flat=True
+            )
+        )
+
+
+def _combatant_changed(sender, instance, **kwargs):  # noqa: ARG001
+    update_fields = kwargs.get("update_fields")
+    if update_fields is None or SNAPSHOT_COMBATANT_FIELDS & set(update_fields):
+        record_changes([instance.card_id])
+
+
+def _combatant_deleted(sender, instance, **kwargs):  # noqa: ARG001
+    record_changes([instance.card_id])
+
+
+def _card_or_waiver_changed(sender, instance, **kwargs):  # noqa: ARG001
+    record_combatant_changes([instance.combatant_id])
+
+
+def _card_relation_changed(sender, instance, **kwargs):  # noqa: ARG001
+    record_card_changes([instance.card_id])
+
+
+def connect_signals():
+    """Log roster changes whenever a snapshot's source rows change.
+
+    Bulk operations skip these signals and call record_combatant_changes or
+    record_card_changes themselves. Logging a change also drops the card's
+    cached status (see cards.utility.card_payload).
+    """
+    post_save.connect(_combatant_changed, sender=Combatant)
+    post_delete.connect(_combatant_deleted, sender=Combatant)
+    for model in (Card, Waiver):
+        post_save.connect(_card_or_waiver_changed, sender=model)
+        post_delete.connect(_card_or_waiver_changed, sender=model)
+    for model in (CombatantAuthorization, CombatantWarrant):
+        post_save.connect(_card_relation_changed, sender=model)
+        post_delete.connect(_card_relation_changed, sender=model)
+
+
+def build_disciplines():
+    """Discipline, authorization and marshal names keyed by slug"""
+    return {
+        discipline.slug: {
+            "name": discipline.name,
+            "authorizations": {
+                authorization.slug: authorization.name
+                for authorization in discipline.authorizations.all()
+            },
+            "marshals": {
+                marshal.slug: marshal.name for marshal in discipline.marshals.all()
+            },
+        }
+        for discipline in Discipline.objects.prefetch_related(
+            "authorizations", "marshals"
+        )
+    }
+
+
+def build_entries(card_ids=None):
+    """Build snapshot entries, optionally only for some card_ids
+
+    Uses a fixed number of queries however many combatants are included.
+
+    Returns:
+        A dict of card_id to entry, laid out as COMBATANT_FIELDS
+    """
+    cards = Card.objects.filter(
+        date_issued__gt=add_years(today(), -2),
+        combatant__accepted_privacy_policy=True,
+    ).exclude(combatant__card_id="")
+    if card_ids is not None:
+        cards = cards.filter(combatant__card_id__in=card_ids)
+
+    authorizations = defaultdict(list)
+    for card_id, slug in CombatantAuthorization.objects.filter(
+        card__in=cards
+    ).values_list("card_id", "authorization__slug"):
+        authorizations[card_id].append(slug)
+
+    warrants = defaultdict(list)
+    for card_id, slug in CombatantWarrant.objects.filter(card__in=cards).values_list(
+        "card_id", "marshal__slug"
+    ):
+        warrants[card_id].append(slug)
+
+    waivers = {
+        combatant_id: add_years(date_signed, Waiver.WAIVER_VALIDITY_YEARS)
+        for combatant_id, date_signed in Waiver.objects.filter(
+            combatant__cards__in=cards
+        ).values_list("combatant_id", "date_signed")
+    }
+
+    entries = {}
+    for card_pk, combatant_id, card_id, sca_name, slug, date_issued in cards.order_by(
+        "combatant__card_id", "discipline__slug"
+    ).values_list(
+        "id",
+        "combatant_id",
+        "combatant__card_id",
+        "combatant__sca_name",
+        "discipline__slug",
+        "date_issued",
+    ):
+        if card_id not in entries:
+            waiver_expiry = waivers.get(combatant_id)
+            entries[card_id] = [
+                card_id,
+                sca_name or "",
+                waiver_expiry.isoformat() if waiver_expiry else None,
+                [],
+            ]
+        entries[card_id][3].append(
+            [
+                slug,
+                add_years(date_issued, 2).isoformat(),
+                sorted(authorizations[card_pk]),
+                sorted(warrants[card_pk]),
+            ]
+        )
+
+    return entries
+
+
+def sign_snapshot(snapshot):
+    """Serialize and sign a snapshot dict
+
+    Returns:
+        The envelope as a JSON string
+    """
+    body = json.dumps(snapshot, separators=(",", ":"), sort_keys=True)
+    return json.dumps(
+        {
+            "kid": signing.key_id(),
+            "alg": signing.ALGORITHM,
+            "snapshot": body,
+            "signature": signing.sign(body.encode()),
+        },
+        separators=(",", ":"),
+    )
+
+
+def get_snapshot(since=None, day=None):
+    """Get the signed snapshot, or the changes since a version
+
+    Args:
+        since: The version the device already has. A full snapshot is sent if
+            this is None, or older than the change log, or newer than the
+            current version.
+        day: The date a full snapshot is cached for; defaults to today
+
+    Returns:
+        (version, envelope JSON string)
+    """
+    oldest, version = RosterChange.version_range()
+    full = since is None or since > version or (oldest and since < oldest - 1)
+
+    if full:
+        # A full snapshot only changes with the version and the date (cards
+        # expire), so cache it on both.
+        key = CACHE_KEY.format(version=version, day=(day or today()).isoformat())
+        envelope = cache.get(key)
+        if envelope is None:
+            envelope = sign_snapshot(_snapshot(version, None, build_entries()))
+            cache.set(
+                key,
+                envelope,
+                getattr(settings, "ROSTER_SNAPSHOT_CACHE_TIMEOUT", 60 * 60 * 24),
+            )
+        return version, envelope
+
+    changed = set(
+        RosterChange.objects.filter(
+            version__gt=since, version__lte=version
+        ).values_list("card_id", flat=True)
+    )
+    entries = build_entries(changed) if changed else {}
+    snapshot = _snapshot(version, since, entries)
+    snapshot["removed"] = sorted(changed - set(entries))
+    return version, sign_snapshot(snapshot)
+
+
+def _snapshot(version, since, entries):
+    return {
+        "version": version,
+        "since": since,
+        "generated_at": timezone.now().isoformat(),
+        "fields": {"combatant": COMBATANT_FIELDS, "card": CARD_FIELDS},
+        "disciplines": build_disciplines(),
+        "combatants": [entries[card_id] for card_id in sorted(entries)],
+        "removed": [],
+    }
@@ -0,0 +1,351 @@
+"""Deterministic synthetic data at production scale, for benchmarking.
+
+Generates combatants with cards, authorizations, warrants, waivers, PINs,
+reminders and one-time codes in proportions resembling the real roster.
+Everything about combatant number n is drawn from a random generator
+seeded with (seed, n), so the same seed always produces the same data,
+however it is chunked. Card IDs come from the CardIdAllocator, so they
+depend on the database's allocator seed.
+
+Rows are written with one bulk_create per model per chunk, so model signals
+don't fire: roster changes are logged per chunk, reminders are built with
+Reminder.bulk_create_or_update_reminders and the marshal roster is dropped
+once at the end. PIN hashing is far too slow to do per combatant, so PINs
+come from a small pool hashed once (see seed_pin).
+
+Seeded combatants have emails at SEED_EMAIL_DOMAIN. Seeding again appends
+more combatants, numbered on from those already there.
+"""
+
+import logging
+import random
+import uuid
+from datetime import date, timedelta
+
+from cards.models import (
+    Card,
+    CardIdAllocator,
+    Combatant,
+    CombatantAuthorization,
+    CombatantWarrant,
+    Discipline,
+    OneTimeCode,
+    Region,
+    Reminder,
+    Waiver,
+)
+from cards.models.card_id_allocator import CardIdNamespaceExhausted
+from cards.utility.marshal_roster import invalidate_roster
+from cards.utility.pin_hasher import hash_pin
+from cards.utility.roster_snapshot import record_changes
+from cards.utility.time import today
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger("cards")
+
+SEED_EMAIL_DOMAIN = "scale-seed.invalid"
+
+# (value, weight) distributions
+CARDS_PER_COMBATANT = [(0, 12), (1, 55), (2, 24), (3, 7), (4, 2)]
+EXTRA_AUTHORIZATIONS = [(0, 40), (1, 30), (2, 20), (3, 10)]
+
+# Fractions of combatants, or of cards for warrants
+PRIVACY_ACCEPTED_RATE = 0.95
+WAIVER_RATE = 0.9
+PIN_RATE = 0.4
+PIN_LOCKED_RATE = 0.01
+WARRANT_RATE = 0.08
+MEMBER_RATE = 0.6
+ONE_TIME_CODE_RATE = 0.1
+
+# Cards are good for two years, so about a third of these have expired;
+# waivers are good for seven
+CARD_MAX_AGE_DAYS = 3 * 365
+WAIVER_MAX_AGE_DAYS = 8 * 365
+
+PIN_POOL_SIZE = 8
+
+SCA_GIVEN_NAMES = [
+    "Aelfric", "Alys", "Brandr", "Catrin", "Dafydd", "Eleanor", "Finnr",
+    "Gwenllian", "Hrolfr", "Isabeau", "Jehan", "Katla", "Leofric", "Mairead",
+    "Njall", "Osanna", "Padraig", "Ragnhild", "Sigrid", "Tancred", "Ulfr",
+    "Wynflaed", "Ysolde", "Zoe",
+]  # fmt: skip
+SCA_BYNAMES = [
+    "of Ealdormere", "the Bold", "Ironhand", "de Montfort", "inghen Bhriain",
+    "Ketilsdottir", "of the Marches", "the Younger", "Ravenswood", "Halfdanarson",
+    "la Rousse", "of Trillium", "Wolfsbane", "ap Rhys", "the Quiet", "Strongarm",
+]  # fmt: skip
+GIVEN_NAMES = [
+    "Alex", "Beth", "Chris", "Dana", "Evan", "Fiona", "Grant", "Hannah",
+    "Ian", "Julia", "Kevin", "Laura", "Mark", "Nora", "Owen", "Paula",
+    "Quinn", "Rachel", "Sam", "Tara",
+]  # fmt: skip
+FAMILY_NAMES = [
+    "Anderson", "Brown", "Campbell", "Davis", "Ellis", "Fraser", "Gagnon",
+    "Harris", "Ivanov", "Jones", "King", "Lee", "MacDonald", "Nguyen",
+    "O'Brien", "Patel", "Roy", "Smith", "Tremblay", "Wilson",
+]  # fmt: skip
+CITIES = [
+    "Toronto", "Ottawa", "Hamilton", "London", "Kingston", "Sudbury",
+    "Thunder Bay", "Guelph", "Waterloo", "Peterborough",
+]  # fmt: skip
+
+
+def seed_pin(number):
+    """The PIN given to seeded combatant number n, if it has one"""
+    return f"{(number % PIN_POOL_SIZE) * 1111 % 10000:04d}"
+
+
+def seed_email(number):
+    return f"combatant{number:06d}@{SEED_EMAIL_DOMAIN}"
+
+
+def weighted(rng, distribution):
+    values, weights = zip(*distribution)
+    return rng.choices(values, weights)[0]
+
+
+class ScaleSeeder:
+    """Generate seeded combatants and everything hanging off them.
+
+    Args:
+        seed: Seed for the random generators
+        chunk_size: Combatants written per transaction
+    """
+
+    def __init__(self, seed=0, chunk_size=1000):
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.as_of = today()
+        self.now = timezone.now()
+
+        self.disciplines = list(
+            Discipline.objects.order_by("id").prefetch_related(
+                "authorizations", "marshals"
+            )
+        )
+        self.authorizations = {
+            discipline.id: sorted(
+                discipline.authorizations.all(), key=lambda a: (not a.is_primary, a.id)
+            )
+            for discipline in self.disciplines
+        }
+        self.marshals = {
+            discipline.id: sorted(discipline.marshals.all(), key=lambda m: m.id)
+            for discipline in self.disciplines
+        }
+        self.provinces = list(
+            Region.objects.filter(active=True)
+            .order_by("code")
+            .values_list("code", flat=True)
+        ) or ["ON"]
+
+        self.pin_hashes = None
+        self.counts = {
+            "combatants": 0,
+            "waivers": 0,
+            "cards": 0,
+            "authorizations": 0,
+            "warrants": 0,
+            "pins": 0,
+            "one_time_codes": 0,
+        }
+
+    def run(self, count):
+        """Seed count more combatants
+
+        Returns:
+            A dict of how many of each kind of row were created
+        """
+        if not self.disciplines:
+            raise ValueError("There are no disciplines; run import_disciplines first")
+
+        start = Combatant.objects.filter(
+            email__endswith=f"@{SEED_EMAIL_DOMAIN}"
+        ).count()
+        for chunk_start in range(start, start + count, self.chunk_size):
+            chunk_end = min(chunk_start + self.chunk_size, start + count)
+            with transaction.atomic():
+                self.write(range(chunk_start, chunk_end))
+            logger.info("Seeded combatants %s to %s", chunk_start, chunk_end - 1)
+
+        invalidate_roster()
+        return dict(self.counts)
+
+    def rng(self, number):
+        return random.Random(f"{self.seed}:{number}")
+
+    def get_pin_hashes(self):
+        if self.pin_hashes is None:
+            self.pin_hashes = [hash_pin(seed_pin(n)) for n in range(PIN_POOL_SIZE)]
+        return self.pin_hashes
+
+    def days_ago(self, rng, max_days):
+        return self.as_of - timedelta(days=rng.randrange(max_days))
+
+    def make_combatant(self, number, rng):
+        given, family = rng.choice(GIVEN_NAMES), rng.choice(FAMILY_NAMES)
+        accepted = rng.random() < PRIVACY_ACCEPTED_RATE
+        member = rng.random() < MEMBER_RATE
+        combatant = Combatant(
+            uuid=uuid.UUID(int=rng.getrandbits(128), version=4),
+            email=seed_email(number),
+            sca_name=f"{rng.choice(SCA_GIVEN_NAMES)} {rng.choice(SCA_BYNAMES)}",
+            legal_name=f"{given} {family}",
+            phone=f"555-{rng.randrange(10000):04d}",
+            address1=f"{rng.randrange(1, 9999)} {family} Street",
+            city=rng.choice(CITIES),
+            province=rng.choice(self.provinces),
+            postal_code=(
+                f"{rng.choice('KLMNP')}{rng.randrange(10)}{rng.choice('ABCEGH')} "
+                f"{rng.randrange(10)}{rng.choice('JKLMNP')}{rng.randrange(10)}"
+            ),
+            dob=date(1950, 1, 1) + timedelta(days=rng.randrange(58 * 365)),
+            member_number=rng.randrange(100000, 999999) if member else None,
+            member_expiry=(
+                self.as_of + timedelta(days=rng.randrange(-365, 365))
+                if member
+                else None
+            ),
+            accepted_privacy_policy=accepted,
+            privacy_acceptance_code=(
+                None
+                if accepted
+                else "".join(rng.choices("abcdefghijkmnpqrstuvwxyz23456789", k=16))
+            ),
+        )
+
+        if rng.random() < PIN_RATE:
+            combatant.pin_hash = self.get_pin_hashes()[number % PIN_POOL_SIZE]
+            self.counts["pins"] += 1
+            if rng.random() < PIN_LOCKED_RATE:
+                combatant.pin_failed_attempts = Combatant.PIN_MAX_ATTEMPTS
+                combatant.pin_locked_until = self.now + timedelta(minutes=15)
+
+        return combatant
+
+    def allocate_card_ids(self, count):
+        terms = CardIdAllocator.current_terms()
+        try:
+            return CardIdAllocator.allocate_many(count, terms)
+        except CardIdNamespaceExhausted:
+            if terms == 4:
+                raise
+            # The three-term namespace only holds about 20k names
+            logger.info("Seeding card IDs from the four-term namespace")
+            return CardIdAllocator.allocate_many(count, 4)
+
+    def write(self, numbers):
+        """Write one chunk of seeded combatants. Call inside a transaction."""
+        rngs = [self.rng(number) for number in numbers]
+        combatants = [
+            self.make_combatant(number, rng) for number, rng in zip(numbers, rngs)
+        ]
+
+        accepted = [c for c in combatants if c.accepted_privacy_policy]
+        for combatant, card_id in zip(accepted, self.allocate_card_ids(len(accepted))):
+            combatant.card_id = card_id
+
+        Combatant.objects.bulk_create(combatants)
+        if combatants[0].pk is None:
+            # MySQL doesn't return primary keys from bulk_create
+            ids = dict(
+                Combatant.objects.filter(
+                    uuid__in=[combatant.uuid for combatant in combatants]
+                ).values_list("uuid", "id")
+            )
+            for combatant in combatants:
+                combatant.id = ids[combatant.uuid]
+        self.counts["combatants"] += len(combatants)
+
+        waivers = [
+            Waiver(
+                combatant_id=combatant.id,
+                date_signed=self.days_ago(rng, WAIVER_MAX_AGE_DAYS),
+            )
+            for combatant, rng in zip(combatants, rngs)
+            if rng.random() < WAIVER_RATE
+        ]
+        Waiver.objects.bulk_create(waivers)
+        if waivers and waivers[0].pk is None:
+            waivers = list(
+                Waiver.objects.filter(
+                    combatant_id__in=[waiver.combatant_id for waiver in waivers]
+                )
+            )
+        self.counts["waivers"] += len(waivers)
+
+        cards = []
+        for combatant, rng in zip(combatants, rngs):
+            count = min(weighted(rng, CARDS_PER_COMBATANT), len(self.disciplines))
+            for discipline in rng.sample(self.disciplines, count):
+                card = Card(
+                    uuid=uuid.UUID(int=rng.getrandbits(128), version=4),
+                    combatant_id=combatant.id,
+                    discipline=discipline,
+                    date_issued=self.days_ago(rng, CARD_MAX_AGE_DAYS),
+                )
+                card.rng = rng
+                cards.append(card)
+        Card.objects.bulk_create(cards)
+        if cards and cards[0].pk is None:
+            ids = dict(
+                Card.objects.filter(uuid__in=[card.uuid for card in cards]).values_list(
+                    "uuid", "id"
+                )
+            )
+            for card in cards:
+                card.id = ids[card.uuid]
+        self.counts["cards"] += len(cards)
+
+        authorizations = []
+        warrants = []
+        for card in cards:
+            rng = card.rng
+            available = self.authorizations[card.discipline_id]
+            if available:
+                held = [available[0]] + rng.sample(
+                    available[1:],
+                    min(weighted(rng, EXTRA_AUTHORIZATIONS), len(available) - 1),
+                )
+                authorizations.extend(
+                    CombatantAuthorization(card_id=card.id, authorization=authorization)
+                    for authorization in held
+                )
+
+            marshals = self.marshals[card.discipline_id]
+            if marshals and rng.random() < WARRANT_RATE:
+                warrants.append(
+                    CombatantWarrant(card_id=card.id, marshal=rng.choice(marshals))
+                )
+        CombatantAuthorization.objects.bulk_create(authorizations)
+        CombatantWarrant.objects.bulk_create(warrants)
+        self.counts["authorizations"] += len(authorizations)
+        self.counts["warrants"] += len(warrants)
+
+        Reminder.bulk_create_or_update_reminders(cards + waivers)
+
+        codes = [
+            self.make_one_time_code(combatant, rng)
+            for combatant, rng in zip(combatants, rngs)
+            if rng.random() < ONE_TIME_CODE_RATE
+        ]
+        OneTimeCode.objects.bulk_create(codes)
+        self.counts["one_time_codes"] += len(codes)
+
+        record_changes(combatant.card_id for combatant in accepted)
+
+    def make_one_time_code(self, combatant, rng):
+        path = rng.choice(["/self-serve-update/{code}", "/pin/setup/{code}"])
+        consumed = rng.random() < 0.5
+        return OneTimeCode(
+            combatant_id=combatant.id,
+            code=uuid.UUID(int=rng.getrandbits(128), version=4),
+            url_template=f"{settings.BASE_URL}{path}",
+            expires_at=self.now + timedelta(hours=rng.randrange(-72, 24)),
+            consumed=consumed,
+            consumed_at=self.now - timedelta(hours=1) if consumed else None,
+        )
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""Ed25519 signatures that field devices can check offline.
+
+Roster snapshots and card QR payloads are signed with a private key only the
+server holds. Devices fetch the public key once (see the signing-key API) and
+can then verify anything we've signed with no network connection.
+
+The key is a 32-byte Ed25519 seed. Set CARD_SIGNING_KEY to its URL-safe
+base64 encoding to pin it; otherwise it is derived from SECRET_KEY, so
+rotating SECRET_KEY also rotates the signing key.
+
+Settings:
+    CARD_SIGNING_KEY: Optional base64 Ed25519 seed
+"""
+
+import base64
+import hashlib
+from functools import lru_cache
+
+from django.conf import settings
+
+ALGORITHM = "Ed25519"
+KEY_DERIVATION_SALT = b"cards.signing"
+
+
+def b64encode(data):
+    """URL-safe base64 without padding"""
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def b64decode(data):
+    """Decode URL-safe base64 with or without padding
+
+    Raises:
+        ValueError: If data isn't valid base64
+    """
+    if isinstance(data, str):
+        data = data.encode("ascii")
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def _seed():
+    configured = getattr(settings, "CARD_SIGNING_KEY", None)
+    if configured:
+        return b64decode(configured)
+    return hashlib.sha256(KEY_DERIVATION_SALT + settings.SECRET_KEY.encode()).digest()
+
+
+# cryptography is imported on first use; the roster signal handlers pull
+# this module into every process, and most never sign anything.
+
+
+@lru_cache(maxsize=4)
+def _private_key(seed):
+    # pylint: disable=import-outside-toplevel
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+    return Ed25519PrivateKey.from_private_bytes(seed)
+
+
+def public_key():
+    """The raw 32-byte public key"""
+    # pylint: disable=import-outside-toplevel
+    from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+
+    return (
+        _private_key(_seed()).public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)
+    )
+
+
+def key_id():
+    """A short identifier for the current key, so devices can spot rotation"""
+    return hashlib.sha256(public_key()).hexdigest()[:8]
+
+
+def sign(data):
+    """Sign bytes
+
+    Returns:
+        The signature as URL-safe base64
+    """
+    return b64encode(_private_key(_seed()).sign(data))
+
+
+def verify(data, signature):
+    """Check a signature made by sign()
+
+    Args:
+        data: The signed bytes
+        signature: The signature as URL-safe base64
+
+    Returns:
+        True if the signature is valid for data under the current key
+    """
+    # pylint: disable=import-outside-toplevel
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+
+    try:
+        Ed25519PublicKey.from_public_bytes(public_key()).verify(
+            b64decode(signature), data
+        )
+    except (InvalidSignature, ValueError):
+        return False
+    return True
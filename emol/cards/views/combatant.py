@@ -2,15 +2,25 @@
 """Handlers for combatant administration views."""
 import logging
 
-from cards.models import Authorization, Combatant, Discipline, Region
+from asgiref.sync import sync_to_async
+from cards.models import Combatant, Discipline, Region
 from cards.models.user_permission import UserPermission
+from cards.utility.card_access import has_card_access
+from cards.utility.card_payload import make_payload
 from cards.utility.decorators import permission_required
 from current_user import get_current_user
 from django.shortcuts import redirect, render
 from feature_switches.helpers import is_enabled
+from query_budget.decorators import query_budget
 
 logger = logging.getLogger("cards")
 
+DISCIPLINE_WRITE_PERMISSIONS = [
+    "write_card_date",
+    "write_authorizations",
+    "write_marshal",
+]
+
 
 @permission_required("read_combatant_info")
 def combatant_list(request):
@@ -31,17 +41,29 @@ def combatant_list(request):
     return render(request, "combatant/combatant_list.html", context)
 
 
+@query_budget(queries=20)
 @permission_required("read_combatant_info")
 def combatant_detail(request):
     """Render the combatant detail form skeleton.
 
-    A subsequent GET to /api/combatant/<uuid> should follow to populate
+    A subsequent GET to /api/combatant-bundle/<uuid> should follow to populate
     the form fields if editing an existing combatant.
+
+    Each discipline comes with its authorizations and marshals prefetched and
+    a write_permissions dict saying which of its fields the user may change.
     """
+    disciplines = list(
+        Discipline.objects.prefetch_related("authorizations", "marshals")
+    )
+    write_permissions = UserPermission.user_discipline_permissions(
+        request.user, DISCIPLINE_WRITE_PERMISSIONS, disciplines
+    )
+    for discipline in disciplines:
+        discipline.write_permissions = write_permissions[discipline.id]
+
     context = {
         "user": get_current_user(),
-        "disciplines": Discipline.objects.all(),
-        "authorizations": Authorization.objects.all(),
+        "disciplines": disciplines,
         "regions": Region.objects.all(),
         "combatant": {},
         "uuid": "",
@@ -49,29 +71,36 @@ def combatant_detail(request):
     return render(request, "combatant/combatant_detail.html", context)
 
 
-def combatant_card(request, card_id):
+@query_budget(queries=30, total_ms=1000)
+async def combatant_card(request, card_id):
     """View a combatant's card, accessed by its card_id.
 
+    Served async so that an ASGI worker isn't tied up by slow clients. The
+    combatant comes from the async ORM; the feature switch, QR payload and
+    template (which walks the combatant's cards) run through sync_to_async.
+
     Args:
         card_id: The ID of the card to view
     """
     try:
-        combatant = Combatant.objects.get(card_id=card_id)
-
-        if is_enabled("pin_authentication") and combatant.has_pin:
-            session_key = f"pin_verified_{card_id}"
-            if not request.session.get(session_key):
-                return redirect("pin-verify", card_id=card_id)
-
-        if not hasattr(combatant, "waiver"):
-            return render(request, "combatant/waiver_expired.html", {})
-
-        context = {
-            "legal_name": combatant.legal_name,
-            "sca_name": combatant.sca_name,
-            "waiver_expiry": combatant.waiver.expiry_or_expired,
-            "cards": combatant.cards,
-        }
-        return render(request, "combatant/card.html", context)
+        combatant = await Combatant.objects.select_related("waiver").aget(
+            card_id=card_id
+        )
     except Combatant.DoesNotExist:
         return redirect("/")
+
+    if combatant.has_pin and await sync_to_async(is_enabled)("pin_authentication"):
+        if not has_card_access(request, combatant):
+            return redirect("pin-verify", card_id=card_id)
+
+    if not hasattr(combatant, "waiver"):
+        return await sync_to_async(render)(request, "combatant/waiver_expired.html", {})
+
+    context = {
+        "legal_name": combatant.legal_name,
+        "sca_name": combatant.sca_name,
+        "waiver_expiry": combatant.waiver.expiry_or_expired,
+        "cards": combatant.cards,
+        "card_payload": await sync_to_async(make_payload)(card_id),
+    }
+    return await sync_to_async(render)(request, "combatant/card.html", context)
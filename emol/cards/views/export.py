@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""Streaming roster exports.
+
+Both exports need the warrant_roster permission for every discipline they
+cover. Without a discipline filter they cover every discipline the user has
+it for. The combatant roster includes personal details, so it also needs
+read_combatant_info.
+"""
+import logging
+
+from cards.models import Discipline
+from cards.models.user_permission import UserPermission
+from cards.utility.decorators import permission_required
+from cards.utility.roster_export import (
+    ROSTER_FIELDS,
+    WARRANT_ROSTER_FIELDS,
+    ExportFilterError,
+    parse_filters,
+    roster_rows,
+    stream_csv,
+    stream_json,
+    warrant_roster_rows,
+)
+from cards.utility.time import today
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+logger = logging.getLogger("cards")
+
+WARRANT_ROSTER_PERMISSION = "warrant_roster"
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "json": "application/json",
+}
+
+
+def _export(request, name, file_format, rows, fields):
+    """Check permissions and filters, then stream rows in file_format"""
+    try:
+        filters = parse_filters(request.GET)
+    except ExportFilterError as exc:
+        return HttpResponse(str(exc), status=400, content_type="text/plain")
+
+    disciplines = list(Discipline.objects.all())
+    granted = UserPermission.user_discipline_permissions(
+        request.user, [WARRANT_ROSTER_PERMISSION], disciplines
+    )
+    permitted = {
+        discipline.slug
+        for discipline in disciplines
+        if granted[discipline.id][WARRANT_ROSTER_PERMISSION]
+    }
+
+    if filters["disciplines"]:
+        if not set(filters["disciplines"]) <= permitted:
+            return HttpResponse(status=403)
+    elif permitted:
+        filters["disciplines"] = sorted(permitted)
+    else:
+        return HttpResponse(status=403)
+
+    logger.info(
+        "%s exporting %s (%s) for %s",
+        request.user,
+        name,
+        file_format,
+        ", ".join(filters["disciplines"]),
+    )
+
+    if file_format == "csv":
+        content = stream_csv(rows(filters), fields)
+    else:
+        content = stream_json(rows(filters))
+
+    response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[file_format])
+    response["Content-Disposition"] = (
+        f'attachment; filename="{name}-{today():%Y-%m-%d}.{file_format}"'
+    )
+    return response
+
+
+@require_GET
+@permission_required("read_combatant_info")
+def roster_export(request, file_format):
+    """Stream the combatant roster: one row per card"""
+    return _export(request, "roster", file_format, roster_rows, ROSTER_FIELDS)
+
+
+@require_GET
+def warrant_roster_export(request, file_format):
+    """Stream the warrant roster: one row per warrant"""
+    if not request.user.is_authenticated:
+        return HttpResponse(status=401)
+
+    return _export(
+        request,
+        "warrant-roster",
+        file_format,
+        warrant_roster_rows,
+        WARRANT_ROSTER_FIELDS,
+    )
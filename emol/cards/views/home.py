@@ -2,8 +2,14 @@
 import logging
 from typing import Any, Dict
 
+from asgiref.sync import sync_to_async
 from cards.mail import send_card_url, send_info_update, send_privacy_policy
-from cards.models import Combatant, CombatantWarrant, Discipline
+from cards.models import Combatant
+from cards.utility.decorators import async_require_http_methods
+from cards.utility.http_cache import not_modified, set_validators
+from cards.utility.marshal_roster import get_roster
+from cards.utility.pin_hasher import PinHasherBusy
+from cards.utility.privacy import privacy_policy_url
 from current_user import get_current_user
 from django.core.exceptions import MultipleObjectsReturned
 from django.db.models import QuerySet
@@ -12,6 +18,7 @@ from django.template.defaulttags import register
 from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.http import require_http_methods
 from feature_switches.helpers import is_enabled
+from query_budget.decorators import query_budget
 
 logger = logging.getLogger("cards")
 
@@ -38,6 +45,9 @@ def _find_combatants_by_email_and_pin(email: str, pin: str) -> list:
 
     Returns:
         List of combatants that match both email and PIN
+
+    Raises:
+        PinHasherBusy: If the PIN hash pool is saturated
     """
     combatants: QuerySet[Combatant, Combatant] = Combatant.objects.filter(email=email)
     matching = []
@@ -49,14 +59,43 @@ def _find_combatants_by_email_and_pin(email: str, pin: str) -> list:
     return matching
 
 
-@csrf_protect
-@require_http_methods(["GET", "POST"])
-def request_card(request):
-    """Handle GET and POST methods for card requests."""
-    pin_enabled = is_enabled("pin_authentication")
+async def _afind_combatants_by_email_and_pin(email: str, pin: str) -> list:
+    """Async _find_combatants_by_email_and_pin
+
+    PINs are checked with Combatant.acheck_pin, so hashing doesn't hold up
+    the thread that runs sync code for async views.
+    """
+    matching = []
+    async for combatant in Combatant.objects.filter(email=email):
+        if not combatant.has_pin or await combatant.acheck_pin(pin):
+            matching.append(combatant)
+    return matching
+
+
+def _send_card_url(combatant: Combatant) -> None:
+    """Send a combatant their card URL, or the privacy policy if not accepted."""
+    if combatant.accepted_privacy_policy:
+        send_card_url(combatant)
+    else:
+        logger.error("Card request for %s (privacy not accepted)", combatant)
+        send_privacy_policy(combatant)
+
+
+@query_budget(queries=15)
+@async_require_http_methods(["GET", "POST"])
+async def request_card(request):
+    """Handle GET and POST methods for card requests.
+
+    Served async. PIN hashes are awaited on the PIN hash pool and mail is
+    sent from a thread of its own, so neither ties up the thread that runs
+    sync code for every async view.
+    """
+    pin_enabled = await sync_to_async(is_enabled)("pin_authentication")
 
     if request.method == "GET":
-        return render(request, "home/request_card.html", {"pin_enabled": pin_enabled})
+        return await sync_to_async(render)(
+            request, "home/request_card.html", {"pin_enabled": pin_enabled}
+        )
 
     context = {
         "message": "If a combatant exists for this email, instructions have been sent."
@@ -66,43 +105,34 @@ def request_card(request):
 
     try:
         if pin_enabled and pin:
-            combatants = _find_combatants_by_email_and_pin(email, pin)
+            combatants = await _afind_combatants_by_email_and_pin(email, pin)
             if not combatants:
                 context = {
                     "message": "No matching combatant found.",
                     "pin_enabled": pin_enabled,
                 }
-                return render(request, "home/request_card.html", context)
-
-            for combatant in combatants:
-                if combatant.accepted_privacy_policy:
-                    send_card_url(combatant)
-                else:
-                    logger.error(
-                        "Card request for %s (privacy not accepted)", combatant
-                    )
-                    send_privacy_policy(combatant)
+                return await sync_to_async(render)(
+                    request, "home/request_card.html", context
+                )
         else:
-            try:
-                combatant = Combatant.objects.get(email=email)
-                if combatant.accepted_privacy_policy:
-                    send_card_url(combatant)
-                else:
-                    logger.error(
-                        "Card request for %s (privacy not accepted)", combatant
-                    )
-                    send_privacy_policy(combatant)
-            except MultipleObjectsReturned:
-                combatants = Combatant.objects.filter(email=email)
-                for combatant in combatants:
-                    if combatant.accepted_privacy_policy:
-                        send_card_url(combatant)
-                    else:
-                        send_privacy_policy(combatant)
-    except Combatant.DoesNotExist:
-        logger.error("Card URL request: No combatant for %s", email)
+            combatants = [
+                combatant async for combatant in Combatant.objects.filter(email=email)
+            ]
+            if not combatants:
+                logger.error("Card URL request: No combatant for %s", email)
 
-    return render(request, "message/message.html", context)
+        for combatant in combatants:
+            if not combatant.accepted_privacy_policy:
+                # Saves the combatant's acceptance code if it has none yet,
+                # which must happen on the thread sync ORM calls share
+                await sync_to_async(privacy_policy_url)(combatant)
+            # Sending mail touches no database, so it needn't hold that
+            # thread up
+            await sync_to_async(_send_card_url, thread_sensitive=False)(combatant)
+    except PinHasherBusy:
+        return await sync_to_async(render)(request, "429.html", status=429)
+
+    return await sync_to_async(render)(request, "message/message.html", context)
 
 
 @csrf_protect
@@ -164,6 +194,8 @@ def update_info(request):
 
     except Combatant.DoesNotExist:
         logger.warning("No combatant found with email %s", email)
+    except PinHasherBusy:
+        return render(request, "429.html", status=429)
 
     return render(request, "message/message.html", context)
 
@@ -173,47 +205,28 @@ def message(request):
     return render(request, "message/message_embed.html")
 
 
-def marshal_list(request):
+@query_budget(queries=12, total_ms=1000)
+async def marshal_list(request):
     """Display the list of marshals by discipline.
 
-    Retrieves all disciplines and their active marshals, organized by discipline.
+    The roster comes from the cache (see cards.utility.marshal_roster), and
+    anonymous visitors can revalidate it with ETag/Last-Modified. Served
+    async; the roster lookup, the conditional request checks (which load the
+    session user) and rendering run through sync_to_async.
     """
-    logger.info("Fetching marshal list")
-
-    disciplines = Discipline.objects.all().order_by("name")
-    logger.debug("Found %s disciplines", disciplines.count())
-
-    warrants = CombatantWarrant.objects.select_related(
-        "card__combatant", "marshal", "marshal__discipline"
-    ).order_by("card__combatant__sca_name")
-
-    logger.debug("Found %s total warrants", warrants.count())
-
-    marshal_lists = {}
-    for warrant in warrants:
-        try:
-            if warrant.marshal is None:
-                logger.warning("Warrant %s has no associated marshal", warrant.id)
-                continue
+    roster = await sync_to_async(get_roster)()
 
-            discipline_id = warrant.marshal.discipline_id
-            if discipline_id not in marshal_lists:
-                marshal_lists[discipline_id] = []
-            marshal_lists[discipline_id].append(warrant)
-        except AttributeError as e:
-            logger.error("Missing attribute for warrant %s: %s", warrant.id, str(e))
-        except ValueError as e:
-            logger.error("Invalid data for warrant %s: %s", warrant.id, str(e))
-
-    logger.debug("Organized warrants into %s discipline groups", len(marshal_lists))
-
-    context = {
-        "disciplines": disciplines,
-        "marshal_lists": marshal_lists,
-    }
+    response = await sync_to_async(not_modified)(
+        request, roster["etag"], roster["last_modified"]
+    )
+    if response is not None:
+        return response
 
-    return render(
+    response = await sync_to_async(render)(
         request,
         "home/marshal_list.html",
-        context,
+        {"disciplines": roster["disciplines"]},
+    )
+    return await sync_to_async(set_validators)(
+        request, response, roster["etag"], roster["last_modified"]
     )
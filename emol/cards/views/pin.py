@@ -3,14 +3,19 @@
 import logging
 from typing import cast
 
+from asgiref.sync import sync_to_async
 from cards.mail import send_card_url, send_pin_reset, send_pin_setup
 from cards.models import Combatant, OneTimeCode
+from cards.utility.card_access import grant_card_access
+from cards.utility.decorators import async_require_http_methods
+from cards.utility.pin_hasher import PinHasherBusy
 from django.core.exceptions import ValidationError
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import redirect, render
 from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.http import require_http_methods
 from feature_switches.helpers import is_enabled
+from query_budget.decorators import query_budget
 
 logger = logging.getLogger("cards")
 
@@ -116,6 +121,8 @@ def pin_setup(request: HttpRequest, code: str) -> HttpResponse:
             "message/message.html",
             {"message": "This PIN setup link is invalid or has expired."},
         )
+    except PinHasherBusy:
+        return render(request, "429.html", status=429)
     except Exception:
         logger.exception("Unexpected error in pin_setup for code %s", code)
         return render(
@@ -214,6 +221,8 @@ def pin_reset(request: HttpRequest, code: str) -> HttpResponse:
             "message/message.html",
             {"message": "This PIN reset link is invalid or has expired."},
         )
+    except PinHasherBusy:
+        return render(request, "429.html", status=429)
     except Exception:
         logger.exception("Unexpected error in pin_reset for code %s", code)
         return render(
@@ -223,11 +232,15 @@ def pin_reset(request: HttpRequest, code: str) -> HttpResponse:
         )
 
 
-@csrf_protect
-@require_http_methods(["GET", "POST"])
-def pin_verify(request: HttpRequest, card_id: str) -> HttpResponse:
+@query_budget(queries=15)
+@async_require_http_methods(["GET", "POST"])
+async def pin_verify(request: HttpRequest, card_id: str) -> HttpResponse:
     """Verify PIN before showing card.
 
+    Served async like the card view it guards. The PIN hash is awaited on
+    the PIN hash pool (Combatant.acheck_pin), so it doesn't tie up the
+    thread that runs sync code for async views.
+
     Args:
         request: The HTTP request
         card_id: The combatant's card ID
@@ -235,17 +248,17 @@ def pin_verify(request: HttpRequest, card_id: str) -> HttpResponse:
     Returns:
         Redirect to card view or error message
     """
-    if not is_enabled("pin_authentication"):
+    if not await sync_to_async(is_enabled)("pin_authentication"):
         return redirect("combatant-card", card_id=card_id)
 
     try:
-        combatant = Combatant.objects.get(card_id=card_id)
+        combatant = await Combatant.objects.aget(card_id=card_id)
 
         if not combatant.has_pin:
             return redirect("combatant-card", card_id=card_id)
 
         if combatant.is_locked_out:
-            return render(
+            return await sync_to_async(render)(
                 request,
                 "message/message.html",
                 {
@@ -256,7 +269,7 @@ def pin_verify(request: HttpRequest, card_id: str) -> HttpResponse:
             )
 
         if request.method == "GET":
-            return render(
+            return await sync_to_async(render)(
                 request,
                 "pin/verify.html",
                 {"card_id": card_id, "combatant_name": combatant.name},
@@ -264,15 +277,16 @@ def pin_verify(request: HttpRequest, card_id: str) -> HttpResponse:
 
         pin = request.POST.get("pin", "")
 
-        if combatant.check_pin(pin):
-            request.session[f"pin_verified_{card_id}"] = True
-            return redirect("combatant-card", card_id=card_id)
+        if await combatant.acheck_pin(pin):
+            response = redirect("combatant-card", card_id=card_id)
+            grant_card_access(request, response, combatant)
+            return response
 
         remaining_attempts = combatant.PIN_MAX_ATTEMPTS - combatant.pin_failed_attempts
         error_msg = f"Incorrect PIN. {remaining_attempts} attempts remaining."
 
         if combatant.is_locked_out:
-            return render(
+            return await sync_to_async(render)(
                 request,
                 "message/message.html",
                 {
@@ -282,7 +296,7 @@ def pin_verify(request: HttpRequest, card_id: str) -> HttpResponse:
                 },
             )
 
-        return render(
+        return await sync_to_async(render)(
             request,
             "pin/verify.html",
             {
@@ -293,14 +307,16 @@ def pin_verify(request: HttpRequest, card_id: str) -> HttpResponse:
         )
 
     except Combatant.DoesNotExist:
-        return render(
+        return await sync_to_async(render)(
             request,
             "message/message.html",
             {"message": "Card not found."},
         )
+    except PinHasherBusy:
+        return await sync_to_async(render)(request, "429.html", status=429)
     except Exception:
         logger.exception("Unexpected error in pin_verify for card_id %s", card_id)
-        return render(
+        return await sync_to_async(render)(
             request,
             "message/message.html",
             {"message": "An unexpected error occurred. Please try again later."},
@@ -3,6 +3,7 @@ import logging
 from cards.models.combatant import Combatant
 from cards.models.privacy_policy import PrivacyPolicy
 from cards.utility.decorators import permission_required
+from cards.utility.http_cache import make_etag, not_modified, set_validators
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.http import HttpResponseBadRequest
@@ -14,6 +15,12 @@ from feature_switches.helpers import is_enabled
 
 logger = logging.getLogger("cards")
 
+DEFAULT_CACHE_MAX_AGE = 60 * 60 * 24
+
+
+def _max_age():
+    return getattr(settings, "PRIVACY_POLICY_CACHE_MAX_AGE", DEFAULT_CACHE_MAX_AGE)
+
 
 @require_http_methods(["GET", "POST"])
 def privacy_policy(request, code=None):
@@ -28,11 +35,13 @@ def privacy_policy(request, code=None):
         combatant = get_object_or_404(Combatant, privacy_acceptance_code=code)
 
     latest = PrivacyPolicy.latest_version()
-    if latest:
-        policy_text = latest.text.replace("[DATE]", latest.created_at.strftime("%Y-%m-%d"))
-    else:
-        policy_text = ""
-    context = {"policy": policy_text}
+    etag = make_etag("privacy-policy", latest.version if latest else None)
+    if combatant is None:
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+    context = {"policy_html": latest.html if latest else ""}
     if request.method == "POST":
         if combatant is None:
             return HttpResponseBadRequest()
@@ -60,8 +69,12 @@ def privacy_policy(request, code=None):
     context["code"] = code if combatant is not None else None
     if combatant is not None:
         logger.debug("privacy acceptance for combatant %s", combatant)
+        return render(request, "privacy/privacy_policy.html", context)
 
-    return render(request, "privacy/privacy_policy.html", context)
+    # The latest policy changes whenever a new version is approved, so
+    # clients revalidate it every time; only versioned URLs get a max-age
+    response = render(request, "privacy/privacy_policy.html", context)
+    return set_validators(request, response, etag)
 
 
 @permission_required("can_edit_privacy_policy")
@@ -158,9 +171,7 @@ def edit_privacy_policy(request):
         }
         return render(request, "privacy/edit_policy.html", context)
 
-    latest_text = ""
-    if latest:
-        latest_text = latest.text.replace("[DATE]", latest.created_at.strftime("%Y-%m-%d"))
+    latest_text = latest.display_text if latest else ""
 
     context = {
         "draft": draft,
@@ -242,13 +253,18 @@ def view_version(request, version):
     latest = PrivacyPolicy.latest_version()
     is_latest = latest and latest.version == version
 
-    policy_text = policy.text.replace("[DATE]", policy.created_at.strftime("%Y-%m-%d"))
+    # Approved versions never change, but the "not the latest" note does
+    etag = make_etag("privacy-policy", version, latest.version if latest else None)
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
 
     context = {
         "policy": policy,
-        "policy_text": policy_text,
+        "policy_html": policy.html,
         "changelog": policy.changelog,
         "is_latest": is_latest,
         "latest_version": latest.version if latest else None,
     }
-    return render(request, "privacy/view_version.html", context)
+    response = render(request, "privacy/view_version.html", context)
+    return set_validators(request, response, etag, max_age=_max_age())
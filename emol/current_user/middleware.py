@@ -1,52 +1,68 @@
 """
-On requests, stash the current user in thread local storage
+On requests, stash the current user in a context variable
 if the user is not anonymous, for ease of reference through
 models and code.
 
+A context variable rather than thread local storage, so that under ASGI,
+where one thread runs many requests' coroutines, each request sees its own
+user. Code run through sync_to_async gets a copy of the caller's context,
+so it sees the same user.
+
 Shamelessly cribbed from https://github.com/PaesslerAG/django-currentuser
 
 """
 
-from threading import local
+from contextvars import ContextVar
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.contrib.auth.models import AnonymousUser
 
-USER_ATTR_NAME = "__current_user__"
+_current_user: ContextVar = ContextVar("current_user", default=None)
+
 
-_thread_locals = local()
+def _set_current_user(request):
+    # request.user closure; asserts laziness;
+    # memorization is implemented in
+    # request.user (non-data descriptor)
+    _current_user.set(lambda: getattr(request, "user", None))
 
 
-def _set_current_user(user_func):
-    # setattr(_thread_locals, USER_ATTR_NAME, user_func)
-    # Maybe we don't need to make a bound method here
-    setattr(
-        _thread_locals,
-        USER_ATTR_NAME,
-        getattr(user_func, "__get__", lambda: user_func)(user_func, local),
-    )
+class CurrentUserMiddleware:
+    """Middleware to store the current user in a context variable.
 
+    Works in both sync and async middleware chains, so Django doesn't have to
+    adapt the chain around it when running under ASGI.
+    """
 
-class ThreadLocalUserMiddleware:
-    """Middleware to store current user in thread-local storage."""
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        # request.user closure; asserts laziness;
-        # memorization is implemented in
-        # request.user (non-data descriptor)
-        _set_current_user(lambda self: getattr(request, "user", None))
-        response = self.get_response(request)
-        return response
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        _set_current_user(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        _set_current_user(request)
+        return await self.get_response(request)
 
 
 def get_current_user():
     """
     We won't use this directly from here.
     Let's import it into some utils in apps instead
+
+    request.user is loaded lazily with a database query, so async code
+    should call this through sync_to_async.
     """
-    current_user = getattr(_thread_locals, USER_ATTR_NAME, None)
+    current_user = _current_user.get()
     if isinstance(current_user, AnonymousUser):
         return None
 
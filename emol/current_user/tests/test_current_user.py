@@ -1,4 +1,7 @@
-from current_user.middleware import ThreadLocalUserMiddleware, get_current_user
+import asyncio
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from current_user.middleware import CurrentUserMiddleware, get_current_user
 from django.contrib.auth.models import AnonymousUser
 from django.http import HttpResponse
 from django.test import RequestFactory, TestCase
@@ -9,10 +12,10 @@ def view_function(request):
     return HttpResponse()
 
 
-class ThreadLocalUserMiddlewareTestCase(TestCase):
+class CurrentUserMiddlewareTestCase(TestCase):
     def setUp(self):
         self.factory = RequestFactory()
-        self.middleware = ThreadLocalUserMiddleware(view_function)
+        self.middleware = CurrentUserMiddleware(view_function)
 
     def test_anonymous_user(self):
         request = self.factory.get("/")
@@ -56,3 +59,44 @@ class ThreadLocalUserMiddlewareTestCase(TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertIsNone(get_current_user())
+
+
+class CurrentUserMiddlewareAsyncTestCase(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    async def test_async_chain(self):
+        async def async_view(request):
+            return HttpResponse(str(get_current_user()))
+
+        middleware = CurrentUserMiddleware(async_view)
+        self.assertTrue(iscoroutinefunction(middleware))
+
+        request = self.factory.get("/")
+        request.user = SSOUser(email="async@example.com")
+        response = await middleware(request)
+
+        self.assertEqual(response.content, b"async@example.com")
+
+    async def test_concurrent_requests_see_their_own_user(self):
+        """Interleaved requests on one thread don't see each other's user"""
+        both_started = asyncio.Barrier(2)
+
+        async def async_view(request):
+            await both_started.wait()
+            user = await sync_to_async(get_current_user)()
+            return HttpResponse(user.email)
+
+        middleware = CurrentUserMiddleware(async_view)
+        requests = []
+        for email in ["first@example.com", "second@example.com"]:
+            request = self.factory.get("/")
+            request.user = SSOUser(email=email)
+            requests.append(request)
+
+        responses = await asyncio.gather(*(middleware(request) for request in requests))
+
+        self.assertEqual(
+            [response.content for response in responses],
+            [b"first@example.com", b"second@example.com"],
+        )
@@ -2,7 +2,6 @@
 
 import logging
 
-from botocore.exceptions import ClientError
 from django.conf import settings
 
 from emol.secrets import get_aws_session
@@ -49,6 +48,11 @@ class AWSEmailer:
         reply_to = reply_to or settings.MOL_EMAIL
         sender = f"Ealdormere eMoL <{from_email}>"
 
+        # botocore is only needed once we actually send
+        from botocore.exceptions import (  # pylint: disable=import-outside-toplevel
+            ClientError,
+        )
+
         session = get_aws_session()
         client = session.client("ses")
         try:
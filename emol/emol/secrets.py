@@ -1,12 +1,38 @@
+"""Secrets from AWS SSM Parameter Store.
+
+Every parameter under /emol/ is fetched in one GetParametersByPath call
+(paged if there are more than ten) through a single SSM client, and kept
+both in memory and in a local cache file so that most process starts - web
+workers and cron-driven management commands alike - make no network call.
+
+The cache file is written with mode 0600 and only trusted if it is owned by
+the current user and not readable by anyone else. If SSM can't be reached,
+an expired cache file is used rather than failing.
+
+Environment:
+    EMOL_SECRETS_CACHE: Path of the cache file; empty to disable it.
+        Defaults to emol-secrets-<uid>.json in the temp directory.
+    EMOL_SECRETS_CACHE_TTL: Seconds before the cache file is refreshed
+        (default 900)
+    SSM_ENDPOINT_URL: Send SSM calls here instead of AWS, e.g. localstack
+"""
+
 import json
 import logging
 import os
+import stat
+import tempfile
+import time
 from functools import lru_cache
 
-import boto3
-
 logger = logging.getLogger(__name__)
 
+SECRETS_PATH = "/emol/"
+DEFAULT_CACHE_TTL = 900
+
+# Secrets from the last successful load_secrets(), or None
+_secrets = None
+
 
 def get_aws_credentials():
     """Read AWS credentials from environment, fall back to file"""
@@ -38,10 +64,143 @@ def get_aws_session():
     credentials = get_aws_credentials()
     if not credentials:
         raise Exception("No AWS credentials available")
+
+    # boto3 is slow to import and most processes never need it: secrets
+    # usually come from the cache file, and only some paths send mail
+    import boto3  # pylint: disable=import-outside-toplevel
+
     return boto3.session.Session(**credentials)
 
 
-@lru_cache(maxsize=32)
+@lru_cache(maxsize=1)
+def get_ssm_client():
+    """The process's SSM client, created on first use"""
+    ssm_kwargs = {}
+    if os.environ.get("SSM_ENDPOINT_URL"):
+        ssm_kwargs["endpoint_url"] = os.environ.get("SSM_ENDPOINT_URL")
+
+    return get_aws_session().client("ssm", **ssm_kwargs)
+
+
+def fetch_secrets(ssm):
+    """Fetch every parameter under SECRETS_PATH
+
+    Returns:
+        A dict of parameter name to value
+    """
+    secrets = {}
+    paginator = ssm.get_paginator("get_parameters_by_path")
+    for page in paginator.paginate(
+        Path=SECRETS_PATH, Recursive=True, WithDecryption=True
+    ):
+        for parameter in page["Parameters"]:
+            secrets[parameter["Name"]] = parameter["Value"]
+    return secrets
+
+
+def cache_file_path():
+    """Where secrets are cached locally, or None if caching is disabled"""
+    path = os.environ.get("EMOL_SECRETS_CACHE")
+    if path is None:
+        return os.path.join(tempfile.gettempdir(), f"emol-secrets-{os.getuid()}.json")
+    return path or None
+
+
+def read_cache_file(path, ttl):
+    """Read cached secrets if the file is private to us
+
+    Returns:
+        (secrets, fresh), or (None, False) if there is no usable cache file
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            info = os.fstat(f.fileno())
+            if info.st_uid != os.getuid() or info.st_mode & (
+                stat.S_IRWXG | stat.S_IRWXO
+            ):
+                logger.warning("Ignoring secrets cache %s: not private", path)
+                return None, False
+            secrets = json.load(f)
+    except FileNotFoundError:
+        return None, False
+    except (OSError, ValueError) as exc:
+        logger.warning("Ignoring secrets cache %s: %s", path, exc)
+        return None, False
+
+    return secrets, time.time() - info.st_mtime < ttl
+
+
+def write_cache_file(path, secrets):
+    """Write secrets to a mode 0600 file, replacing any old one atomically"""
+    directory = os.path.dirname(path) or "."
+    try:
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".emol-secrets-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(secrets, f)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    except OSError as exc:
+        logger.warning("Could not write secrets cache %s: %s", path, exc)
+
+
+def load_secrets():
+    """All /emol/ secrets, from the cache file or SSM
+
+    Secrets are kept for the life of the process once loaded. A failed load
+    is not kept, so the next lookup tries SSM again.
+
+    Returns:
+        A dict of parameter name to value; empty if SSM can't be reached and
+        there is no cache file
+    """
+    global _secrets  # pylint: disable=global-statement
+    if _secrets is not None:
+        return _secrets
+
+    path = cache_file_path()
+    ttl = int(os.environ.get("EMOL_SECRETS_CACHE_TTL", DEFAULT_CACHE_TTL))
+
+    cached, fresh = read_cache_file(path, ttl) if path else (None, False)
+    if fresh:
+        _secrets = cached
+        return _secrets
+
+    try:
+        secrets = fetch_secrets(get_ssm_client())
+    except Exception as e:
+        if cached is not None:
+            logger.warning("Error retrieving parameters, using stale cache: %s", e)
+            _secrets = cached
+            return _secrets
+        logger.error("Error retrieving parameters: %s", str(e))
+        return {}
+
+    if path:
+        write_cache_file(path, secrets)
+    _secrets = secrets
+    return _secrets
+
+
+def forget_secrets():
+    """Drop the in-memory secrets so the next lookup loads them again"""
+    global _secrets  # pylint: disable=global-statement
+    _secrets = None
+
+
+def clear_secrets_cache():
+    """Forget cached secrets so the next lookup goes to SSM"""
+    forget_secrets()
+    path = cache_file_path()
+    if path:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
 def get_secret(name):
     """Get a secret from SSM Parameter Store"""
     if os.environ.get("EMOL_DEV"):
@@ -56,23 +215,7 @@ def get_secret(name):
         }
         return dev_secrets.get(name)
 
-    credentials = get_aws_credentials()
-    if not credentials:
-        raise Exception("No AWS credentials available")
-
-    ssm_kwargs = {}
-    if os.environ.get("SSM_ENDPOINT_URL"):
-        ssm_kwargs["endpoint_url"] = os.environ.get("SSM_ENDPOINT_URL")
-
-    session = get_aws_session()
-    ssm = session.client("ssm", **ssm_kwargs)
-
-    try:
-        response = ssm.get_parameter(Name=name, WithDecryption=True)
-        return response["Parameter"]["Value"]
-    except ssm.exceptions.ParameterNotFound as exc:
-        logger.error("Parameter '%s' not found: %s", name, exc)
-        return None
-    except Exception as e:
-        logger.error("Error retrieving parameter '%s': %s", name, str(e))
-        return None
+    value = load_secrets().get(name)
+    if value is None:
+        logger.error("Parameter '%s' not found", name)
+    return value
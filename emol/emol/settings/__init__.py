@@ -9,3 +9,30 @@ Settings files:
 Optional override:
 - emol_production.py: production overrides (mounted from /opt/emol_config/)
 """
+
+import os
+
+
+def configure_settings_module():
+    """Set DJANGO_SETTINGS_MODULE for manage.py, WSGI and ASGI.
+
+    The module name comes from /emol/django_settings_module in Parameter
+    Store, unless DJANGO_SETTINGS_MODULE is already set, in which case that
+    wins and the lookup is skipped.
+
+    Raises:
+        CommandError: If the settings module can't be retrieved
+    """
+    if os.environ.get("DJANGO_SETTINGS_MODULE"):
+        return
+
+    # pylint: disable=import-outside-toplevel
+    from django.core.management.base import CommandError
+
+    from emol.secrets import get_secret
+
+    settings = get_secret("/emol/django_settings_module")
+    if not settings:
+        raise CommandError("Could not retrieve settings path from AWS Parameter Store")
+
+    os.environ["DJANGO_SETTINGS_MODULE"] = settings
@@ -24,8 +24,10 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "query_budget.middleware.QueryBudgetMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "feature_switches.middleware.RequestProfilingMiddleware",
     "global_throttle.middleware.GlobalThrottleMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "csp.middleware.CSPMiddleware",
@@ -35,7 +37,7 @@ MIDDLEWARE = [
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "current_user.middleware.ThreadLocalUserMiddleware",
+    "current_user.middleware.CurrentUserMiddleware",
 ]
 
 ROOT_URLCONF = "emol.urls"
@@ -110,6 +112,11 @@ LOGGING = {
             "level": "INFO",
             "propagate": False,
         },
+        "query_budget": {
+            "handlers": ["console", "file"],
+            "level": "INFO",
+            "propagate": False,
+        },
     },
     "formatters": {
         "app": {
@@ -204,3 +211,78 @@ CSP_CONNECT_SRC = (
 
 # Reminder configuration
 REMINDER_DAYS = [60, 30, 14, 0]
+
+# PIN hashing: fixed per-check cost, run on a bounded pool (see
+# cards.utility.pin_hasher). Requests beyond workers + queue depth get a 429.
+PIN_HASH_ITERATIONS = 100_000
+PIN_HASH_WORKERS = 2
+PIN_HASH_QUEUE_DEPTH = 8
+PIN_HASH_TIMEOUT = 10
+
+# Lifetime of the signed cookie issued after PIN verification
+# (see cards.utility.card_access)
+CARD_ACCESS_MAX_AGE = 60 * 60 * 24 * 14
+
+# Append a fourth heraldic term to new card IDs once the three-term namespace
+# is filling up (see the card_id_capacity management command)
+CARD_ID_FOURTH_TERM = False
+
+# Upper bound on how long the public marshal roster stays cached; it is also
+# dropped whenever warrants, cards or SCA names change
+MARSHAL_ROSTER_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Rows validated and written per transaction by the combatant importer
+COMBATANT_IMPORT_CHUNK_SIZE = 500
+
+# Rows fetched per query by the streaming roster exports
+EXPORT_CHUNK_SIZE = 1000
+
+# Ed25519 seed (URL-safe base64) for signing offline roster snapshots and
+# card QR payloads; derived from SECRET_KEY when unset (see
+# cards.utility.signing)
+CARD_SIGNING_KEY = None
+
+# Upper bound on how long a full roster snapshot stays cached; the cache key
+# changes with the roster version and the date
+ROSTER_SNAPSHOT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Days of roster changes kept for delta updates; devices with an older
+# snapshot get a full one
+ROSTER_CHANGE_RETENTION_DAYS = 90
+
+# Upper bound on how long a card's status stays cached for the card-verify
+# API; it is also dropped whenever the card changes
+CARD_VERIFY_CACHE_TIMEOUT = 60 * 60
+
+# OIDC discovery metadata and JWKS are cached as long as their HTTP cache
+# headers allow, capped at the max; the default applies when there are none
+# (see sso_user.oidc)
+OIDC_METADATA_DEFAULT_TTL = 60 * 60
+OIDC_METADATA_MAX_TTL = 60 * 60 * 24
+
+# Query and latency budget for views that don't declare one with the
+# query_budget decorator; breaches are logged, and with QUERY_BUDGET_RAISE
+# going over the query count raises (see query_budget.middleware)
+QUERY_BUDGET_DEFAULT = {"queries": 50, "db_ms": None, "total_ms": None}
+QUERY_BUDGET_RAISE = False
+
+# Queries at least this slow are sampled, with the view and the line of our
+# code that ran them, into a ring buffer in the cache; see the slow_queries
+# command (and query_budget.sampler). Each process writes its samples to the
+# buffer after a response at most once per flush interval (seconds)
+SLOW_QUERY_THRESHOLD_MS = 200
+SLOW_QUERY_BUFFER_SIZE = 500
+SLOW_QUERY_FLUSH_INTERVAL = 30
+SLOW_QUERY_APPS = ["cards", "feature_switches", "global_throttle"]
+
+# Requests profiled under the request_profiling feature switch: the share of
+# anonymous requests sampled when it is global, where profiles are kept (a
+# directory in the temp dir when unset; it must be private to the app's
+# user) and how many (see feature_switches.middleware)
+REQUEST_PROFILING_SAMPLE_RATE = 0.01
+REQUEST_PROFILING_DIR = None
+REQUEST_PROFILING_MAX_PROFILES = 100
+
+# How long clients may reuse a versioned privacy policy page before
+# revalidating. The latest policy page is always revalidated.
+PRIVACY_POLICY_CACHE_MAX_AGE = 60 * 60 * 24
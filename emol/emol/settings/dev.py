@@ -8,6 +8,9 @@ SECRET_KEY = "super-secret-development-key-1234"
 
 DEBUG = True
 NO_ENFORCE_PERMISSIONS = True
+
+# Fail loudly when a view goes over its query budget
+QUERY_BUDGET_RAISE = True
 ALLOWED_HOSTS = ["localhost"]
 DEBUG_LEVEL = "DEBUG"
 
@@ -69,6 +72,11 @@ LOGGING = {
             "level": "INFO",
             "propagate": False,
         },
+        "query_budget": {
+            "handlers": ["console", "file"],
+            "level": DEBUG_LEVEL,
+            "propagate": False,
+        },
         "cards": {
             "handlers": ["console", "file"],
             "level": DEBUG_LEVEL,
@@ -39,8 +39,8 @@ OAUTH_CLIENT_SECRET = get_secret("/emol/oauth_client_secret")
 
 AUTHLIB_OAUTH_CLIENTS = {
     "google": {
-        "client_id": get_secret("/emol/oauth_client_id"),
-        "client_secret": get_secret("/emol/oauth_client_secret"),
+        "client_id": OAUTH_CLIENT_ID,
+        "client_secret": OAUTH_CLIENT_SECRET,
     }
 }
 
@@ -9,6 +9,17 @@ SECRET_KEY = "super-secret-test-key-1234"
 
 DEBUG = True
 NO_ENFORCE_PERMISSIONS = True
+
+# Fail loudly when a view goes over its query budget
+QUERY_BUDGET_RAISE = True
+
+# The suite's own timings aren't worth sampling, and anything still queued
+# at exit would be flushed after the test database is gone
+SLOW_QUERY_THRESHOLD_MS = None
+
+# Sampling an anonymous request for profiling looks the switch up, which
+# would randomly add queries to views' budgets; tests opt in
+REQUEST_PROFILING_SAMPLE_RATE = 0
 ALLOWED_HOSTS = ["localhost"]
 
 # Configure Google authentication
@@ -0,0 +1,178 @@
+"""Tests for batched, cached secret loading."""
+
+import json
+import os
+import stat
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import boto3
+from botocore.stub import Stubber
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase
+
+from emol import secrets
+from emol.settings import configure_settings_module
+
+
+def parameters_page(values, next_token=None):
+    page = {
+        "Parameters": [
+            {"Name": name, "Value": value, "Type": "SecureString"}
+            for name, value in values.items()
+        ]
+    }
+    if next_token:
+        page["NextToken"] = next_token
+    return page
+
+
+class SecretsTestCase(SimpleTestCase):
+    """Tests for emol.secrets against a stubbed SSM client."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.directory.name, "secrets.json")
+        environ = patch.dict(
+            os.environ,
+            {"EMOL_SECRETS_CACHE": self.cache_path, "EMOL_SECRETS_CACHE_TTL": "60"},
+        )
+        environ.start()
+        os.environ.pop("EMOL_DEV", None)
+
+        self.ssm = boto3.client(
+            "ssm",
+            region_name="ca-central-1",
+            aws_access_key_id="test",
+            aws_secret_access_key="test",
+        )
+        self.stubber = Stubber(self.ssm)
+        self.stubber.activate()
+        client = patch("emol.secrets.get_ssm_client", return_value=self.ssm)
+        client.start()
+
+        secrets.forget_secrets()
+        self.addCleanup(secrets.forget_secrets)
+        self.addCleanup(client.stop)
+        self.addCleanup(environ.stop)
+        self.addCleanup(self.directory.cleanup)
+
+    def expect_fetch(self, *pages):
+        params = {"Path": "/emol/", "Recursive": True, "WithDecryption": True}
+        token = None
+        for page in pages:
+            expected = dict(params, NextToken=token) if token else params
+            self.stubber.add_response("get_parameters_by_path", page, expected)
+            token = page.get("NextToken")
+
+    def test_fetches_all_parameters_once(self):
+        self.expect_fetch(
+            parameters_page({"/emol/db_name": "emol"}, next_token="more"),
+            parameters_page({"/emol/oauth_client_id": "client"}),
+        )
+
+        self.assertEqual(secrets.get_secret("/emol/db_name"), "emol")
+        self.assertEqual(secrets.get_secret("/emol/oauth_client_id"), "client")
+        self.assertIsNone(secrets.get_secret("/emol/missing"))
+        self.stubber.assert_no_pending_responses()
+
+        mode = stat.S_IMODE(os.stat(self.cache_path).st_mode)
+        self.assertEqual(mode, 0o600)
+
+    def test_fresh_cache_file_skips_ssm(self):
+        self.expect_fetch(parameters_page({"/emol/db_name": "emol"}))
+        secrets.load_secrets()
+        secrets.forget_secrets()
+
+        # No response queued, so any SSM call would fail the test
+        self.assertEqual(secrets.get_secret("/emol/db_name"), "emol")
+
+    def test_expired_cache_file_is_refreshed(self):
+        self.expect_fetch(parameters_page({"/emol/db_name": "old"}))
+        secrets.load_secrets()
+        secrets.forget_secrets()
+        stale = time.time() - 120
+        os.utime(self.cache_path, (stale, stale))
+
+        self.expect_fetch(parameters_page({"/emol/db_name": "new"}))
+        self.assertEqual(secrets.get_secret("/emol/db_name"), "new")
+
+    def test_stale_cache_used_when_ssm_fails(self):
+        self.expect_fetch(parameters_page({"/emol/db_name": "emol"}))
+        secrets.load_secrets()
+        secrets.forget_secrets()
+        stale = time.time() - 120
+        os.utime(self.cache_path, (stale, stale))
+
+        self.stubber.add_client_error("get_parameters_by_path", "InternalError")
+        self.assertEqual(secrets.get_secret("/emol/db_name"), "emol")
+
+    def test_failure_not_kept(self):
+        self.stubber.add_client_error("get_parameters_by_path", "InternalError")
+        self.assertIsNone(secrets.get_secret("/emol/db_name"))
+
+        self.expect_fetch(parameters_page({"/emol/db_name": "emol"}))
+        self.assertEqual(secrets.get_secret("/emol/db_name"), "emol")
+        self.stubber.assert_no_pending_responses()
+
+    def test_cache_file_readable_by_others_is_ignored(self):
+        with open(self.cache_path, "w", encoding="utf-8") as f:
+            json.dump({"/emol/db_name": "planted"}, f)
+        os.chmod(self.cache_path, 0o644)
+
+        self.expect_fetch(parameters_page({"/emol/db_name": "emol"}))
+        self.assertEqual(secrets.get_secret("/emol/db_name"), "emol")
+
+    def test_cache_file_disabled(self):
+        os.environ["EMOL_SECRETS_CACHE"] = ""
+        self.expect_fetch(parameters_page({"/emol/db_name": "emol"}))
+
+        self.assertEqual(secrets.get_secret("/emol/db_name"), "emol")
+        self.assertFalse(os.path.exists(self.cache_path))
+
+
+class ConfigureSettingsModuleTestCase(SimpleTestCase):
+    """Choosing the settings module for manage.py, WSGI and ASGI."""
+
+    @patch("emol.secrets.get_secret")
+    def test_explicit_module_skips_lookup(self, get_secret):
+        with patch.dict(os.environ, {"DJANGO_SETTINGS_MODULE": "emol.settings.test"}):
+            configure_settings_module()
+            self.assertEqual(os.environ["DJANGO_SETTINGS_MODULE"], "emol.settings.test")
+        get_secret.assert_not_called()
+
+    @patch("emol.secrets.get_secret", return_value="emol.settings.prod")
+    def test_module_from_parameter_store(self, _):
+        with patch.dict(os.environ):
+            del os.environ["DJANGO_SETTINGS_MODULE"]
+            configure_settings_module()
+            self.assertEqual(os.environ["DJANGO_SETTINGS_MODULE"], "emol.settings.prod")
+
+    @patch("emol.secrets.get_secret", return_value=None)
+    def test_missing_module(self, _):
+        with patch.dict(os.environ):
+            del os.environ["DJANGO_SETTINGS_MODULE"]
+            with self.assertRaises(CommandError):
+                configure_settings_module()
+
+
+@unittest.skipUnless(
+    os.environ.get("SSM_ENDPOINT_URL") and not os.environ.get("EMOL_DEV"),
+    "Set SSM_ENDPOINT_URL to run against a local SSM such as localstack",
+)
+class LocalSSMTestCase(SimpleTestCase):
+    """Fetch the seeded /emol/ parameters from a local SSM stand-in."""
+
+    def setUp(self):
+        secrets.get_ssm_client.cache_clear()
+        secrets.forget_secrets()
+        self.addCleanup(secrets.forget_secrets)
+
+    def test_fetch(self):
+        with patch.dict(os.environ, {"EMOL_SECRETS_CACHE": ""}):
+            self.assertEqual(
+                secrets.get_secret("/emol/django_settings_module"),
+                "emol.settings.dev",
+            )
@@ -1,7 +1,12 @@
 """Admin configuration for feature switches."""
 
 from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.template.response import TemplateResponse
+from django.urls import path
+from feature_switches import profiling
 from feature_switches.helpers import clear_cache
+from feature_switches.middleware import note_profiling
 from feature_switches.models import FeatureSwitch
 
 
@@ -39,3 +44,59 @@ class FeatureSwitchAdmin(admin.ModelAdmin):
         switch_name = obj.name
         super().delete_model(request, obj)
         clear_cache(switch_name)
+
+    def get_urls(self):
+        """Add the request profile browser"""
+        urls = super().get_urls()
+        my_urls = [
+            path(
+                "profiles/",
+                self.admin_site.admin_view(self.profiles_view),
+                name="feature_switches_profiles",
+            ),
+            path(
+                "profiles/<str:name>.<str:extension>",
+                self.admin_site.admin_view(self.profile_download_view),
+                name="feature_switches_profile_download",
+            ),
+        ]
+        return my_urls + urls
+
+    def profiles_view(self, request):
+        """List the saved request profiles, newest first
+
+        Also picks up the request_profiling switch for the viewing user, so
+        they needn't log in again after turning it on for themselves.
+        """
+        if not self.has_view_permission(request):
+            raise Http404
+        note_profiling(request, request.user)
+
+        if request.method == "POST" and self.has_delete_permission(request):
+            for name in request.POST.getlist("delete"):
+                if profiling.PROFILE_NAME.match(name):
+                    profiling.delete_profile(name)
+
+        context = {
+            **self.admin_site.each_context(request),
+            "title": "Request profiles",
+            "opts": self.model._meta,
+            "profiles": profiling.list_profiles(),
+            "profile_dir": profiling.profile_dir(),
+            "can_delete": self.has_delete_permission(request),
+        }
+        return TemplateResponse(
+            request, "admin/feature_switches/profiles.html", context
+        )
+
+    def profile_download_view(self, request, name, extension):
+        """Download one of a profile's files"""
+        if not self.has_view_permission(request):
+            raise Http404
+
+        try:
+            file_path = profiling.profile_path(name, extension)
+            stream = open(file_path, "rb")  # pylint: disable=consider-using-with
+        except (ValueError, FileNotFoundError) as exc:
+            raise Http404("No such profile") from exc
+        return FileResponse(stream, as_attachment=True, filename=f"{name}.{extension}")
@@ -9,3 +9,8 @@ class FeatureSwitchesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "feature_switches"
     verbose_name = "Feature Switches"
+
+    def ready(self):
+        from feature_switches import middleware
+
+        middleware.connect_signals()
@@ -0,0 +1,149 @@
+"""Profile requests on demand, controlled by the request_profiling switch.
+
+With the switch on for a logged in user ('list' mode with their combatant
+in the list, or 'global'), all of their requests are profiled. With it
+'global', anonymous requests are also profiled, at a rate of
+REQUEST_PROFILING_SAMPLE_RATE.
+
+Looking the switch up costs queries, so it isn't done on every request.
+Whether a user is profiled is noted in their session when they log in, and
+again whenever they open the request profiles admin page, so a switch
+turned on for someone already logged in takes effect from there. Only
+requests from noted users look the switch up again, so that turning it off
+stops profiling once the switch's cache entry expires. Anonymous requests
+are sampled before the switch is looked up, so most cost nothing.
+
+Requests run under cProfile, and the results are saved by
+feature_switches.profiling, where staff can browse and download them from
+the feature switch admin. One request per process is profiled at a time;
+others arriving meanwhile run unprofiled.
+
+Only requests served through WSGI, as in production, are profiled. Under
+ASGI a request awaiting something gives the event loop to other requests,
+and the profiler, which is per thread, would record their work as well.
+"""
+
+import cProfile
+import logging
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
+from feature_switches.helpers import is_enabled
+from feature_switches.profiling import save_profile
+
+logger = logging.getLogger(__name__)
+
+SWITCH_NAME = "request_profiling"
+SESSION_KEY = "request_profiling"
+
+_profiling = threading.Lock()
+
+
+def note_profiling(request, user):
+    """Note in the session whether the switch is on for a user"""
+    request.session[SESSION_KEY] = is_enabled(SWITCH_NAME, user=user)
+
+
+def _logged_in(sender, request, user, **kwargs):
+    if request is not None and hasattr(request, "session"):
+        note_profiling(request, user)
+
+
+def connect_signals():
+    """Note whether users are profiled as they log in."""
+    user_logged_in.connect(_logged_in)
+
+
+def should_profile(request):
+    """Whether the switch asks for this request to be profiled"""
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        rate = getattr(settings, "REQUEST_PROFILING_SAMPLE_RATE", 0.01)
+        if random.random() >= rate:
+            return False
+        return is_enabled(SWITCH_NAME)
+    if not request.session.get(SESSION_KEY):
+        return False
+    return is_enabled(SWITCH_NAME, user=user)
+
+
+def redacted_path(request):
+    """The request path without the query string or values from the URL
+
+    Values the URL pattern captures, such as one-time codes and card IDs,
+    are replaced with their names, e.g. /pin/setup/<code>.
+    """
+    path = request.path
+    match = getattr(request, "resolver_match", None)
+    if match is not None:
+        for name, value in match.kwargs.items():
+            path = path.replace(str(value), f"<{name}>")
+        for value in match.args:
+            path = path.replace(str(value), "<arg>")
+    return path
+
+
+def describe(request, response, duration):
+    user = getattr(request, "user", None)
+    match = getattr(request, "resolver_match", None)
+    return {
+        "created": time.time(),
+        "method": request.method,
+        "path": redacted_path(request),
+        "view": match.view_name if match else None,
+        "status": response.status_code,
+        "duration_ms": round(duration * 1000, 1),
+        "user": user.email if user is not None and user.is_authenticated else None,
+    }
+
+
+def save(profiler, request, response, duration):
+    try:
+        name = save_profile(profiler, describe(request, response, duration))
+    except OSError as exc:
+        logger.error("Could not save profile of %s: %s", request.path, exc)
+        return
+    logger.info("Profiled %s %s as %s", request.method, request.path, name)
+
+
+class RequestProfilingMiddleware:
+    """Request profiling middleware
+
+    Must come after AuthenticationMiddleware, since it needs request.user.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if not should_profile(request) or not _profiling.acquire(blocking=False):
+            return self.get_response(request)
+
+        try:
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            save(profiler, request, response, time.perf_counter() - start)
+        finally:
+            _profiling.release()
+        return response
+
+    async def __acall__(self, request):
+        # Not profiled; see the module docstring
+        return await self.get_response(request)
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def add_request_profiling_switch(apps, schema_editor):
+    """Add the request_profiling switch, disabled, if it doesn't exist."""
+    FeatureSwitch = apps.get_model("feature_switches", "FeatureSwitch")
+    FeatureSwitch.objects.get_or_create(
+        name="request_profiling",
+        defaults={
+            "description": "Profile requests: all requests of listed users, or "
+            "when global, a sample of anonymous requests too. Profiles are under "
+            "Feature switches > Request profiles.",
+            "access_mode": "disabled",
+        },
+    )
+
+
+def remove_request_profiling_switch(apps, schema_editor):
+    """Remove the request_profiling switch."""
+    FeatureSwitch = apps.get_model("feature_switches", "FeatureSwitch")
+    FeatureSwitch.objects.filter(name="request_profiling").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("feature_switches", "0003_alter_featureswitch_name"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            add_request_profiling_switch, remove_request_profiling_switch
+        ),
+    ]
@@ -0,0 +1,203 @@
+"""Request profiles on disk.
+
+Each profile is saved as three files sharing a name: the cProfile stats
+(<name>.prof, for pstats or snakeviz), the same data as collapsed stacks
+(<name>.collapsed, for flamegraph.pl or speedscope) and a small JSON
+description of the request (<name>.json). Only the newest
+REQUEST_PROFILING_MAX_PROFILES are kept.
+
+Profiles show how requests ran, so the directory must be ours and closed
+to other users (it is made mode 0700 if need be), and the files are
+written mode 0600.
+
+cProfile records which function called which, not whole stacks, so the
+collapsed stacks are rebuilt by walking the call graph down from the
+functions called from outside the profile, splitting each function's time
+between its callers in proportion to the time each spent calling it. That
+is exact for functions with a single caller and a good estimate for the
+rest. Recursion, such as the middleware chain calling back into itself, is
+folded into the outermost call.
+"""
+
+import json
+import logging
+import marshal
+import os
+import pstats
+import re
+import stat
+import tempfile
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_NAME = re.compile(r"^\d+-[0-9a-f]{8}$")
+EXTENSIONS = ("prof", "collapsed", "json")
+
+# Stop walking the call graph below this many microseconds, or this deep
+MIN_STACK_US = 1
+MAX_STACK_DEPTH = 200
+
+
+def profile_dir():
+    return getattr(settings, "REQUEST_PROFILING_DIR", None) or os.path.join(
+        tempfile.gettempdir(), f"emol-profiles-{os.getuid()}"
+    )
+
+
+def private_profile_dir():
+    """The profile directory, made if need be
+
+    Raises:
+        OSError: If it belongs to another user or others can open it
+    """
+    directory = profile_dir()
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.stat(directory)
+    if info.st_uid != os.getuid() or info.st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+        raise OSError(f"Profile directory {directory} is not private")
+    return directory
+
+
+def open_new(path, mode):
+    """Open a new mode 0600 file for writing"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    if "b" in mode:
+        return os.fdopen(fd, mode)
+    return os.fdopen(fd, mode, encoding="utf-8")
+
+
+def profile_path(name, extension):
+    """Path of one of a profile's files
+
+    Raises:
+        ValueError: If the name or extension isn't one we would have made
+    """
+    if not PROFILE_NAME.match(name) or extension not in EXTENSIONS:
+        raise ValueError(f"Not a profile file: {name}.{extension}")
+    return os.path.join(profile_dir(), f"{name}.{extension}")
+
+
+def frame_label(func):
+    filename, lineno, name = func
+    if filename == "~":
+        # Built in functions
+        return name
+    root = str(settings.BASE_DIR.parent) + os.sep
+    filename = filename.rpartition("site-packages" + os.sep)[2]
+    if filename.startswith(root):
+        filename = filename[len(root) :]
+    return f"{name} ({filename}:{lineno})"
+
+
+def collapse(stats):
+    """Rebuild collapsed stacks from pstats data
+
+    Args:
+        stats: A pstats.Stats
+
+    Returns:
+        A Counter of "root;caller;callee" to self time in microseconds
+    """
+    callees = {}
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, _, _, edge_cumulative) in callers.items():
+            callees.setdefault(caller, []).append((func, edge_cumulative))
+
+    labels = {func: frame_label(func) for func in stats.stats}
+    stacks = Counter()
+
+    def walk(func, stack, share):
+        own = stats.stats[func][2]
+        stack = stack + [labels[func]]
+        self_us = round(own * share * 1e6)
+        if self_us:
+            stacks[";".join(stack)] += self_us
+        if len(stack) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_cumulative in callees.get(func, []):
+            callee_cumulative = stats.stats[callee][3]
+            if not callee_cumulative or labels[callee] in stack:
+                continue
+            callee_share = share * edge_cumulative / callee_cumulative
+            if callee_cumulative * callee_share * 1e6 >= MIN_STACK_US:
+                walk(callee, stack, min(callee_share, 1.0))
+
+    # Roots are called from outside the profile: their calls outnumber the
+    # calls recorded from their callers. Calls from outside can't be
+    # recursive, and cumulative time only counts non-recursive calls.
+    for func, (primitive, calls, _, _, callers) in stats.stats.items():
+        outside = calls - sum(edge[0] for edge in callers.values())
+        if outside > 0:
+            walk(func, [], min(outside / primitive, 1.0))
+    return stacks
+
+
+def save_profile(profiler, info):
+    """Write a finished profile and prune old ones
+
+    Args:
+        profiler: A disabled cProfile.Profile
+        info: JSON-serializable description of the request
+
+    Returns:
+        The profile's name
+    """
+    private_profile_dir()
+    name = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+
+    stats = pstats.Stats(profiler)
+    # What Stats.dump_stats writes, but to a file only we can read
+    with open_new(profile_path(name, "prof"), "wb") as stream:
+        marshal.dump(stats.stats, stream)
+    with open_new(profile_path(name, "collapsed"), "w") as stream:
+        for stack, microseconds in sorted(collapse(stats).items()):
+            stream.write(f"{stack} {microseconds}\n")
+    with open_new(profile_path(name, "json"), "w") as stream:
+        json.dump({**info, "name": name}, stream)
+
+    prune()
+    return name
+
+
+def list_profiles():
+    """Descriptions of the saved profiles, newest first"""
+    try:
+        names = [
+            f[: -len(".json")] for f in os.listdir(profile_dir()) if f.endswith(".json")
+        ]
+    except FileNotFoundError:
+        return []
+
+    profiles = []
+    for name in sorted(filter(PROFILE_NAME.match, names), reverse=True):
+        try:
+            with open(profile_path(name, "json"), encoding="utf-8") as stream:
+                profile = json.load(stream)
+        except (OSError, ValueError):
+            # Pruned or still being written
+            continue
+        profile["created_at"] = datetime.fromtimestamp(profile["created"], timezone.utc)
+        profiles.append(profile)
+    return profiles
+
+
+def delete_profile(name):
+    for extension in EXTENSIONS:
+        try:
+            os.unlink(profile_path(name, extension))
+        except FileNotFoundError:
+            pass
+
+
+def prune():
+    """Delete all but the newest REQUEST_PROFILING_MAX_PROFILES profiles"""
+    keep = getattr(settings, "REQUEST_PROFILING_MAX_PROFILES", 100)
+    for profile in list_profiles()[keep:]:
+        logger.debug("Pruning profile %s", profile["name"])
+        delete_profile(profile["name"])
@@ -1,8 +1,18 @@
 """Tests for feature_switches app."""
 
+import cProfile
+import os
+import pstats
+import shutil
+import stat
+import tempfile
+
+from asgiref.sync import sync_to_async
 from cards.models.combatant import Combatant
 from django.core.cache import cache
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from feature_switches import profiling
 from feature_switches.helpers import CACHE_KEY_PREFIX, clear_cache, is_enabled
 from feature_switches.models import (
     ACCESS_MODE_DISABLED,
@@ -343,3 +353,193 @@ class FeatureSwitchTemplateTagTestCase(TestCase):
         context_no_user = {}
         result_no_user = switch_enabled(context_no_user, "list_template")
         self.assertFalse(result_no_user)
+
+
+def inner():
+    return sum(range(20000))
+
+
+def outer():
+    return inner()
+
+
+class RequestProfilingTestCase(TestCase):
+    """Tests for request profiling under the request_profiling switch."""
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings = override_settings(REQUEST_PROFILING_DIR=directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.switch = FeatureSwitch.objects.get(name="request_profiling")
+        self.user = SSOUser.objects.create_superuser(email="staff@example.com")
+        self.combatant = Combatant.objects.create(
+            email="staff@example.com", legal_name="Staff", sca_name="Staff"
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def set_mode(self, access_mode):
+        self.switch.access_mode = access_mode
+        self.switch.save()
+        # clear_cache only reaches users in the list; global mode is cached
+        # for everyone else too
+        cache.clear()
+
+    def test_disabled(self):
+        """Test that nothing is profiled with the switch disabled."""
+        self.client.force_login(self.user)
+        self.client.get("/")
+
+        self.assertEqual(profiling.list_profiles(), [])
+
+    def test_listed_user(self):
+        """Test that a listed staff user's requests are profiled."""
+        self.switch.allowed_users.add(self.combatant)
+        self.set_mode(ACCESS_MODE_LIST)
+        self.client.force_login(self.user)
+
+        self.client.get("/")
+        self.client.logout()
+        self.client.get("/")
+
+        profiles = profiling.list_profiles()
+        self.assertEqual(len(profiles), 1)
+        self.assertEqual(profiles[0]["path"], "/")
+        self.assertEqual(profiles[0]["user"], "staff@example.com")
+        self.assertEqual(profiles[0]["status"], 200)
+
+        name = profiles[0]["name"]
+        stats = pstats.Stats(profiling.profile_path(name, "prof"))
+        self.assertTrue(stats.stats)
+        with open(profiling.profile_path(name, "collapsed"), encoding="utf-8") as f:
+            stacks = [line.rsplit(" ", 1) for line in f]
+        # The stacks reach down into the view, and account for most of the time
+        self.assertTrue(any("views" in stack for stack, _ in stacks))
+        total = sum(int(microseconds) for _, microseconds in stacks)
+        self.assertGreater(total, stats.total_tt * 1e6 / 2)
+
+    def test_switched_after_login(self):
+        """Test that the profiles page picks up a switch turned on after login."""
+        self.client.force_login(self.user)
+        self.set_mode(ACCESS_MODE_GLOBAL)
+
+        self.client.get("/")
+        self.assertEqual(profiling.list_profiles(), [])
+
+        self.client.get(reverse("admin:feature_switches_profiles"))
+        self.client.get("/")
+        self.assertEqual(len(profiling.list_profiles()), 1)
+
+        self.set_mode(ACCESS_MODE_DISABLED)
+        self.client.get("/")
+        self.assertEqual(len(profiling.list_profiles()), 1)
+
+    def test_anonymous_sampling(self):
+        """Test that a global switch samples anonymous requests."""
+        self.set_mode(ACCESS_MODE_GLOBAL)
+
+        with override_settings(REQUEST_PROFILING_SAMPLE_RATE=0):
+            self.client.get("/")
+        self.assertEqual(profiling.list_profiles(), [])
+
+        with override_settings(REQUEST_PROFILING_SAMPLE_RATE=1):
+            self.client.get("/")
+        self.assertEqual(profiling.list_profiles()[0]["user"], None)
+
+    @override_settings(REQUEST_PROFILING_SAMPLE_RATE=1)
+    def test_secrets_redacted(self):
+        """Test that codes, card IDs and query strings aren't saved."""
+        self.set_mode(ACCESS_MODE_GLOBAL)
+
+        self.client.get("/pin/setup/secret-code-123?email=someone@example.com")
+        self.client.get("/card/secret-card-id")
+
+        paths = sorted(p["path"] for p in profiling.list_profiles())
+        self.assertEqual(paths, ["/card/<card_id>", "/pin/setup/<code>"])
+
+    def test_files_private(self):
+        """Test that profiles are written to a private directory."""
+        directory = os.path.join(profiling.profile_dir(), "profiles")
+        with override_settings(REQUEST_PROFILING_DIR=directory):
+            profiler = cProfile.Profile()
+            profiler.runcall(outer)
+            name = profiling.save_profile(profiler, {"created": 0})
+
+            self.assertEqual(stat.S_IMODE(os.stat(directory).st_mode), 0o700)
+            for extension in profiling.EXTENSIONS:
+                mode = os.stat(profiling.profile_path(name, extension)).st_mode
+                self.assertEqual(stat.S_IMODE(mode), 0o600)
+
+    def test_shared_directory_refused(self):
+        """Test that profiles aren't written where other users can read them."""
+        os.chmod(profiling.profile_dir(), 0o755)
+        profiler = cProfile.Profile()
+        profiler.runcall(outer)
+
+        with self.assertRaises(OSError):
+            profiling.save_profile(profiler, {"created": 0})
+        self.assertEqual(os.listdir(profiling.profile_dir()), [])
+
+    async def test_async_not_profiled(self):
+        """Test that requests served through ASGI aren't profiled."""
+        await sync_to_async(self.set_mode)(ACCESS_MODE_GLOBAL)
+        await sync_to_async(self.client.force_login)(self.user)
+        self.async_client.cookies.update(self.client.cookies)
+
+        with override_settings(REQUEST_PROFILING_SAMPLE_RATE=1):
+            await self.async_client.get("/")
+        self.assertEqual(profiling.list_profiles(), [])
+
+    @override_settings(REQUEST_PROFILING_MAX_PROFILES=2)
+    def test_bounded(self):
+        """Test that only the newest profiles are kept."""
+        self.set_mode(ACCESS_MODE_GLOBAL)
+        self.client.force_login(self.user)
+        for page in ("/", "/privacy-policy", "/request-card"):
+            self.client.get(page)
+
+        profiles = profiling.list_profiles()
+        self.assertEqual(
+            [p["path"] for p in profiles], ["/request-card", "/privacy-policy"]
+        )
+        self.assertEqual(len(os.listdir(profiling.profile_dir())), 6)
+
+    def test_collapse(self):
+        """Test that call paths are rebuilt from caller data."""
+        profiler = cProfile.Profile()
+        profiler.runcall(outer)
+
+        stacks = profiling.collapse(pstats.Stats(profiler))
+
+        self.assertTrue(
+            any(stack.startswith("outer (") and ";inner (" in stack for stack in stacks)
+        )
+
+    def test_admin(self):
+        """Test browsing and downloading profiles in the admin."""
+        self.set_mode(ACCESS_MODE_GLOBAL)
+        self.client.force_login(self.user)
+        self.client.get("/")
+        name = profiling.list_profiles()[0]["name"]
+
+        response = self.client.get(reverse("admin:feature_switches_profiles"))
+        self.assertContains(response, name)
+
+        response = self.client.get(
+            reverse("admin:feature_switches_profile_download", args=[name, "collapsed"])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("attachment", response["Content-Disposition"])
+
+        response = self.client.get(
+            reverse("admin:feature_switches_profile_download", args=["bogus", "json"])
+        )
+        self.assertEqual(response.status_code, 404)
+
+        self.client.post(reverse("admin:feature_switches_profiles"), {"delete": [name]})
+        self.assertFalse(any(p["name"] == name for p in profiling.list_profiles()))
@@ -2,6 +2,7 @@
 
 import logging
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.conf import settings
 from django.core.cache import cache
 from django.shortcuts import render
@@ -30,10 +31,19 @@ class GlobalThrottleMiddleware:
     3) Optionally set the following settings in settings.py:
     GLOBAL_THROTTLE_LIMIT: the maximum number of requests allowed within the duration
     GLOBAL_THROTTLE_WINDOW: the duration of the throttling window in seconds
+
+    Works in both sync and async middleware chains. Under ASGI the throttle
+    check (session user and cache lookups) runs through sync_to_async.
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
         self.request_limit = getattr(settings, "GLOBAL_THROTTLE_LIMIT", None)
         self.request_window = getattr(settings, "GLOBAL_THROTTLE_WINDOW", None)
 
@@ -123,29 +133,37 @@ class GlobalThrottleMiddleware:
 
     def __call__(self, request):
         """Handle the request and throttle if necessary"""
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         logger.debug("GlobalThrottleMiddleware processing request to %s", request.path)
-        throttled = self.maybe_throttle(request)
-        ip_address = self.get_client_ip(request)
+        if self.maybe_throttle(request):
+            return self.throttled_response(request)
 
-        if throttled:
-            logger.error(
-                "MIDDLEWARE THROTTLING: Returning 429 for %s from IP %s",
-                request.path,
-                ip_address,
-            )
-            response = render(request, "429.html", status=429)
-        else:
-            logger.debug(
-                "Request to %s from IP %s allowed by middleware",
-                request.path,
-                ip_address,
-            )
-            response = self.get_response(request)
+        self.log_allowed(request)
+        return self.get_response(request)
 
-        # response["X-RateLimit-Limit"] = str(self.request_limit)
-        # response["X-RateLimit-Remaining"] = str(
-        #     getattr(request, "throttle_remaining", 0)
-        # )
-        # response["X-RateLimit-Window"] = f"{self.request_window}s"
+    async def __acall__(self, request):
+        """Handle the request and throttle if necessary, under ASGI"""
+        logger.debug("GlobalThrottleMiddleware processing request to %s", request.path)
+        if await sync_to_async(self.maybe_throttle)(request):
+            return await sync_to_async(self.throttled_response)(request)
+
+        self.log_allowed(request)
+        return await self.get_response(request)
+
+    def throttled_response(self, request):
+        """Render the 429 page"""
+        logger.error(
+            "MIDDLEWARE THROTTLING: Returning 429 for %s from IP %s",
+            request.path,
+            self.get_client_ip(request),
+        )
+        return render(request, "429.html", status=429)
 
-        return response
+    def log_allowed(self, request):
+        logger.debug(
+            "Request to %s from IP %s allowed by middleware",
+            request.path,
+            self.get_client_ip(request),
+        )
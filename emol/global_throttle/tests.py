@@ -1,7 +1,9 @@
 import time
 
+from asgiref.sync import iscoroutinefunction
 from django.contrib.auth.models import AnonymousUser
 from django.core.cache import cache
+from django.http import HttpResponse
 from django.test import RequestFactory, TestCase
 from django.test.utils import override_settings
 from django.urls import path, reverse
@@ -89,6 +91,23 @@ class GlobalThrottleMiddlewareTestCase(TestCase):
             self.assertFalse(middleware.maybe_throttle(request))
         self.assertTrue(middleware.maybe_throttle(request))
 
+    @override_settings(GLOBAL_THROTTLE_LIMIT=2)
+    async def test_async_chain_throttled(self):
+        """Test that the middleware throttles in an async middleware chain"""
+
+        async def async_view(request):
+            return HttpResponse()
+
+        middleware = GlobalThrottleMiddleware(async_view)
+        self.assertTrue(iscoroutinefunction(middleware))
+
+        request = self.factory.get(reverse("non_exempt_view"))
+        request.user = AnonymousUser()
+        request.META["REMOTE_ADDR"] = "192.168.1.105"  # Non-whitelisted IP
+        statuses = [(await middleware(request)).status_code for _ in range(3)]
+
+        self.assertEqual(statuses, [200, 200, 429])
+
     @override_settings(GLOBAL_THROTTLE_LIMIT=10, GLOBAL_THROTTLE_WINDOW=2)
     def test_throttle_window(self):
         """Test that the throttle window resets after the specified time
@@ -1,20 +1,13 @@
 #!/usr/bin/env python
 """Django's command-line utility for administrative tasks."""
-import os
 import sys
 
-from django.core.management.base import CommandError
-
-from emol.secrets import get_secret
+from emol.settings import configure_settings_module
 
 
 def main():
     """Run administrative tasks."""
-    settings = get_secret("/emol/django_settings_module")
-    if not settings:
-        raise CommandError("Could not retrieve settings path from AWS Parameter Store")
-
-    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings)
+    configure_settings_module()
 
     try:
         from django.core.management import execute_from_command_line
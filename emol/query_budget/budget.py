@@ -0,0 +1,22 @@
+from typing import NamedTuple, Optional
+
+
+class Budget(NamedTuple):
+    """Limits for one request; None means no limit"""
+
+    queries: Optional[int] = None
+    db_ms: Optional[float] = None
+    total_ms: Optional[float] = None
+
+    def with_defaults(self, default):
+        """Fill in any unset limit from another budget"""
+        return Budget(
+            *(
+                default_limit if limit is None else limit
+                for limit, default_limit in zip(self, default)
+            )
+        )
+
+
+class QueryBudgetExceeded(Exception):
+    """A request ran more queries than its budget allows"""
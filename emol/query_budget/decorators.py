@@ -0,0 +1,26 @@
+from query_budget.budget import Budget
+
+
+def query_budget(queries=None, db_ms=None, total_ms=None):
+    """Declare a view's query and latency budget
+
+    Works on view functions (sync or async) and on view classes, including
+    DRF views and viewsets. Any limit left as None falls back to
+    QUERY_BUDGET_DEFAULT. See query_budget.middleware.
+
+    Usage::
+
+        @query_budget(queries=10, total_ms=500)
+        def my_view(request):
+            ...
+
+        @query_budget(queries=20)
+        class MyViewSet(viewsets.ModelViewSet):
+            ...
+    """
+
+    def decorator(view):
+        view.query_budget = Budget(queries=queries, db_ms=db_ms, total_ms=total_ms)
+        return view
+
+    return decorator
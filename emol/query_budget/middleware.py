@@ -0,0 +1,128 @@
+"""Middleware to record and enforce per-view query and latency budgets"""
+
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from query_budget.budget import Budget, QueryBudgetExceeded
+from query_budget.recorder import install_all, recording
+
+logger = logging.getLogger("query_budget")
+
+
+def get_view_budget(request):
+    """The budget declared by the view that served a request, if any"""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+
+    view = match.func
+    budget = getattr(view, "query_budget", None)
+    if budget is None:
+        # Django's as_view() puts the view class on .view_class, DRF's on .cls
+        view_class = getattr(view, "view_class", None) or getattr(view, "cls", None)
+        budget = getattr(view_class, "query_budget", None)
+    return budget
+
+
+class QueryBudgetMiddleware:
+    """Query budget middleware
+
+    Records the number of database queries, the time spent in the database
+    and the total time for every request, and checks them against the
+    budget declared with the query_budget decorator, or QUERY_BUDGET_DEFAULT
+    for views that don't declare one.
+
+    A breach is logged as a warning along with the most repeated query
+    shapes, which is usually enough to spot an N+1. With QUERY_BUDGET_RAISE
+    set (as in dev and test), going over the query count raises
+    QueryBudgetExceeded instead so that regressions fail tests. The db_ms
+    and total_ms limits are always just logged: wall-clock time depends on
+    the machine and its load, and shouldn't fail a request.
+
+    Usage:
+    1) Put this middleware ahead of the session and authentication
+    middleware, so their queries count too.
+
+    2) Optionally set the following settings in settings.py:
+    QUERY_BUDGET_DEFAULT: dict of queries, db_ms and total_ms for views
+    without a budget of their own
+    QUERY_BUDGET_RAISE: raise on a query count breach rather than just
+    logging it
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+        # Connections opened from here on get the recorder as they connect;
+        # this covers any that are already open
+        install_all()
+
+        self.default = Budget(**getattr(settings, "QUERY_BUDGET_DEFAULT", {}))
+        self.enforce = getattr(settings, "QUERY_BUDGET_RAISE", False)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        start = time.perf_counter()
+        with recording(request) as recorder:
+            response = self.get_response(request)
+        self.check(request, recorder, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        with recording(request) as recorder:
+            response = await self.get_response(request)
+        self.check(request, recorder, time.perf_counter() - start)
+        return response
+
+    def check(self, request, recorder, duration):
+        """Compare a request's usage with its budget"""
+        db_ms = recorder.duration * 1000
+        total_ms = duration * 1000
+        logger.debug(
+            "%s %s: %s queries, %.1f ms in database, %.1f ms total",
+            request.method,
+            request.path,
+            recorder.count,
+            db_ms,
+            total_ms,
+        )
+
+        budget = (get_view_budget(request) or Budget()).with_defaults(self.default)
+        usage = (
+            ("queries", recorder.count, budget.queries),
+            ("db_ms", round(db_ms, 1), budget.db_ms),
+            ("total_ms", round(total_ms, 1), budget.total_ms),
+        )
+        breached = [
+            (name, used, limit)
+            for name, used, limit in usage
+            if limit is not None and used > limit
+        ]
+        if not breached:
+            return
+
+        breaches = [f"{name} {used:g} > {limit:g}" for name, used, limit in breached]
+
+        message = f"Budget exceeded for {request.method} {request.path}: " + ", ".join(
+            breaches
+        )
+        shapes = recorder.top_shapes()
+        if shapes:
+            message += "\nMost repeated queries:" + "".join(
+                f"\n  {count} x {shape}" for shape, count in shapes
+            )
+
+        # Only the query count is enforced; timings vary too much run to run
+        if self.enforce and any(name == "queries" for name, _, _ in breached):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
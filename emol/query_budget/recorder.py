@@ -0,0 +1,101 @@
+"""Record the database queries a block of code runs.
+
+A single execute wrapper is installed on every database connection. It
+times each query and hands slow ones to the sampler (see
+query_budget.sampler); otherwise it only does any work while a recorder is
+active. The active recorder is held in a context variable so that under
+ASGI concurrent requests each get their own, including the queries their
+async views run through sync_to_async. Recorders nest: queries recorded by
+an inner block count towards the enclosing one too.
+
+Usage::
+
+    with recording() as recorder:
+        ...
+    recorder.count, recorder.duration, recorder.top_shapes()
+"""
+
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from query_budget import sampler
+from query_budget.sql import normalize_sql
+
+_recorder: ContextVar = ContextVar("query_recorder", default=None)
+
+
+class QueryRecorder:
+    """Query count, time in the database and a tally of query shapes"""
+
+    def __init__(self, request=None, parent=None):
+        self.request = request
+        self.parent = parent
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def add(self, sql, duration):
+        self.count += 1
+        self.duration += duration
+        self.shapes[normalize_sql(sql)] += 1
+        if self.parent is not None:
+            self.parent.add(sql, duration)
+
+    def top_shapes(self, limit=5):
+        """The most repeated query shapes, as (shape, count), most first"""
+        return [item for item in self.shapes.most_common(limit) if item[1] > 1]
+
+
+def record_queries(execute, sql, params, many, context):
+    """Execute wrapper feeding the active recorder and the slow query sampler"""
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        recorder = _recorder.get()
+        if recorder is not None:
+            recorder.add(sql, duration)
+        if duration >= sampler.threshold():
+            sampler.sample(sql, duration, getattr(recorder, "request", None))
+
+
+def install(connection):
+    """Add the recording wrapper to a connection, once"""
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_queries)
+
+
+def install_all():
+    """Add the recording wrapper to this thread's connections
+
+    Connections opened later get it from the connection_created signal.
+    """
+    for connection in connections.all(initialized_only=True):
+        install(connection)
+
+
+def _connection_created(sender, connection, **kwargs):
+    install(connection)
+
+
+connection_created.connect(_connection_created)
+
+
+@contextmanager
+def recording(request=None):
+    """Record the queries run inside the block
+
+    Args:
+        request: The request being served, for slow query samples
+    """
+    recorder = QueryRecorder(request, parent=_recorder.get())
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
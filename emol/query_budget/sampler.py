@@ -0,0 +1,212 @@
+"""Sample slow queries along with where they came from.
+
+Every query slower than SLOW_QUERY_THRESHOLD_MS is sampled with its
+normalised SQL, its duration, the view serving the request and the nearest
+stack frame in our own code. Queries under the threshold cost one
+comparison.
+
+Samples wait in a small per-process queue and are flushed into a ring
+buffer in the cache, shared by all workers and capped at
+SLOW_QUERY_BUFFER_SIZE samples. The slow_queries management command
+reports the worst offenders from it.
+
+Rewriting the buffer is a cache read and write of up to
+SLOW_QUERY_BUFFER_SIZE samples, so it is kept off the response path: the
+queue is flushed once the response has gone out (on request_finished),
+and then at most once every SLOW_QUERY_FLUSH_INTERVAL seconds per
+process. Once a process has sampled anything, whatever is still queued
+when it exits, including queries sampled outside a request, is flushed
+then. With sampling off nothing is queued or flushed.
+
+Settings:
+    SLOW_QUERY_THRESHOLD_MS: Sample queries taking at least this long;
+        None to turn sampling off
+    SLOW_QUERY_BUFFER_SIZE: Samples kept in the ring buffer
+    SLOW_QUERY_FLUSH_INTERVAL: Minimum seconds between flushes
+    SLOW_QUERY_APPS: Packages whose frames a query is attributed to
+"""
+
+import atexit
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished
+from query_budget.sql import normalize_sql
+
+logger = logging.getLogger("query_budget")
+
+CACHE_KEY = "slow_queries"
+DEFAULT_THRESHOLD_MS = 200
+DEFAULT_BUFFER_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 30
+DEFAULT_APPS = ["cards", "feature_switches", "global_throttle"]
+
+# Frames in these are the sampler itself
+INTERNAL_MODULES = {__name__, "query_budget.recorder"}
+
+_pending: deque = deque(maxlen=DEFAULT_BUFFER_SIZE)
+_last_flush = -math.inf
+_flush_at_exit = False
+
+# Set while this thread is flushing, so the flush's own queries aren't sampled
+_flushing = threading.local()
+
+
+def threshold_ms():
+    """The sampling threshold in ms, or None when sampling is off"""
+    return getattr(settings, "SLOW_QUERY_THRESHOLD_MS", DEFAULT_THRESHOLD_MS)
+
+
+def threshold():
+    """The sampling threshold in seconds; infinite when sampling is off"""
+    limit = threshold_ms()
+    return math.inf if limit is None else limit / 1000
+
+
+def view_name(request):
+    """Dotted path of the view serving a request, if it has been resolved"""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+
+    view = getattr(match.func, "cls", match.func)
+    return f"{view.__module__}.{view.__qualname__}"
+
+
+def code_location():
+    """The innermost stack frame in one of SLOW_QUERY_APPS
+
+    Returns:
+        "path/to/module.py:line in function", or None if the query didn't
+        come from our code
+    """
+    apps = set(getattr(settings, "SLOW_QUERY_APPS", DEFAULT_APPS))
+    frame = sys._getframe(1)  # pylint: disable=protected-access
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.split(".")[0] in apps and module not in INTERNAL_MODULES:
+            code = frame.f_code
+            path = os.path.relpath(code.co_filename, settings.BASE_DIR.parent)
+            return f"{path}:{frame.f_lineno} in {code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def sample(sql, duration, request=None):
+    """Queue a sample of a slow query"""
+    global _flush_at_exit  # pylint: disable=global-statement
+
+    if threshold_ms() is None or getattr(_flushing, "active", False):
+        return
+
+    if not _flush_at_exit:
+        atexit.register(flush)
+        _flush_at_exit = True
+    _pending.append(
+        {
+            "sql": normalize_sql(sql),
+            "ms": round(duration * 1000, 1),
+            "view": view_name(request),
+            "location": code_location(),
+            "at": time.time(),
+        }
+    )
+
+
+def flush():
+    """Move queued samples into the shared ring buffer
+
+    Queued samples are dropped if sampling has been turned off since.
+    """
+    if threshold_ms() is None:
+        _pending.clear()
+        return
+
+    samples = []
+    while _pending:
+        samples.append(_pending.popleft())
+    if not samples:
+        return
+
+    size = getattr(settings, "SLOW_QUERY_BUFFER_SIZE", DEFAULT_BUFFER_SIZE)
+    _flushing.active = True
+    try:
+        # Workers flushing at the same moment can drop each other's samples,
+        # which is fine for a sample
+        buffer = cache.get(CACHE_KEY, []) + samples
+        cache.set(CACHE_KEY, buffer[-size:], None)
+    except Exception:
+        logger.exception("Could not save %s slow query samples", len(samples))
+    finally:
+        _flushing.active = False
+
+
+def flush_if_due():
+    """Flush queued samples unless this process flushed them recently"""
+    global _last_flush  # pylint: disable=global-statement
+
+    interval = getattr(settings, "SLOW_QUERY_FLUSH_INTERVAL", DEFAULT_FLUSH_INTERVAL)
+    now = time.monotonic()
+    if not _pending or now - _last_flush < interval:
+        return
+
+    _last_flush = now
+    flush()
+
+
+def _request_finished(sender, **kwargs):
+    flush_if_due()
+
+
+request_finished.connect(_request_finished)
+
+
+def get_samples():
+    """Samples in the ring buffer, oldest first"""
+    return cache.get(CACHE_KEY, [])
+
+
+def clear_samples():
+    cache.delete(CACHE_KEY)
+    _pending.clear()
+
+
+def aggregate(samples):
+    """Group samples by SQL shape and code location
+
+    Returns:
+        A list of dicts with sql, location, views, count, total_ms and
+        max_ms, worst total first
+    """
+    groups = {}
+    for item in samples:
+        key = (item["sql"], item["location"])
+        group = groups.setdefault(
+            key,
+            {
+                "sql": item["sql"],
+                "location": item["location"],
+                "views": set(),
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+            },
+        )
+        group["count"] += 1
+        group["total_ms"] += item["ms"]
+        group["max_ms"] = max(group["max_ms"], item["ms"])
+        if item["view"]:
+            group["views"].add(item["view"])
+
+    offenders = sorted(groups.values(), key=lambda g: g["total_ms"], reverse=True)
+    for group in offenders:
+        group["views"] = sorted(group["views"])
+        group["total_ms"] = round(group["total_ms"], 1)
+    return offenders
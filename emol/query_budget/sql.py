@@ -0,0 +1,23 @@
+"""SQL statement shapes, for grouping queries that differ only in values"""
+
+import re
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+PLACEHOLDER = re.compile(r"%s|\?")
+PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """Reduce a SQL statement to its shape
+
+    Literals and placeholders become ?, and a list of placeholders (as in an
+    IN clause) becomes (...), so the same query with different parameters or
+    a different number of ids has the same shape.
+    """
+    shape = STRING_LITERAL.sub("?", sql)
+    shape = NUMBER_LITERAL.sub("?", shape)
+    shape = PLACEHOLDER.sub("?", shape)
+    shape = PLACEHOLDER_LIST.sub("(...)", shape)
+    return WHITESPACE.sub(" ", shape).strip()
@@ -0,0 +1,290 @@
+import math
+from unittest.mock import patch
+
+from django.http import HttpResponse
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.urls import path
+from django.views import View
+from query_budget import sampler
+from query_budget.budget import Budget, QueryBudgetExceeded
+from query_budget.decorators import query_budget
+from query_budget.recorder import recording
+from query_budget.sql import normalize_sql
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from sso_user.models.user import SSOUser
+
+
+def n_plus_one(count):
+    for index in range(count):
+        SSOUser.objects.filter(email=f"user{index}@example.com").exists()
+
+
+@query_budget(queries=2)
+def tight_view(request):
+    n_plus_one(5)
+    return HttpResponse()
+
+
+@query_budget(queries=10)
+def roomy_view(request):
+    n_plus_one(5)
+    return HttpResponse()
+
+
+def default_view(request):
+    n_plus_one(5)
+    return HttpResponse()
+
+
+@query_budget(queries=2)
+async def async_view(request):
+    await SSOUser.objects.filter(email="a@example.com").aexists()
+    await SSOUser.objects.filter(email="b@example.com").aexists()
+    await SSOUser.objects.filter(email="c@example.com").aexists()
+    return HttpResponse()
+
+
+@query_budget(queries=2)
+class TightAPIView(APIView):
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        n_plus_one(5)
+        return Response({})
+
+
+@query_budget(queries=2)
+class TightView(View):
+    def get(self, request):
+        n_plus_one(5)
+        return HttpResponse()
+
+
+@query_budget(queries=10, total_ms=0)
+def slow_view(request):
+    n_plus_one(5)
+    return HttpResponse()
+
+
+urlpatterns = [
+    path("tight/", tight_view),
+    path("roomy/", roomy_view),
+    path("default/", default_view),
+    path("async/", async_view),
+    path("api/", TightAPIView.as_view()),
+    path("class/", TightView.as_view()),
+    path("slow/", slow_view),
+]
+
+MIDDLEWARE = ["query_budget.middleware.QueryBudgetMiddleware"]
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    MIDDLEWARE=MIDDLEWARE,
+    QUERY_BUDGET_DEFAULT={"queries": 3},
+    QUERY_BUDGET_RAISE=True,
+)
+class QueryBudgetMiddlewareTestCase(TestCase):
+    def test_breach_raises(self):
+        """Test that going over a view's budget raises, naming the shape"""
+        with self.assertRaises(QueryBudgetExceeded) as raised:
+            self.client.get("/tight/")
+
+        message = str(raised.exception)
+        self.assertIn("queries 5 > 2", message)
+        self.assertIn('5 x SELECT ? AS "a" FROM "sso_user" WHERE', message)
+
+    def test_within_budget(self):
+        """Test that a view within its own budget passes"""
+        response = self.client.get("/roomy/")
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_default_budget(self):
+        """Test that views without a budget get QUERY_BUDGET_DEFAULT"""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get("/default/")
+
+    def test_view_class_budget(self):
+        """Test that a budget declared on an APIView class applies"""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get("/api/")
+
+    def test_django_view_class_budget(self):
+        """Test that a budget declared on a plain Django class view applies"""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get("/class/")
+
+    def test_time_breach_logged_not_raised(self):
+        """Test that a wall-clock breach is logged even with QUERY_BUDGET_RAISE"""
+        with self.assertLogs("query_budget", level="WARNING") as logs:
+            response = self.client.get("/slow/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("total_ms", logs.output[0])
+
+    async def test_async_view_budget(self):
+        """Test that queries an async view runs through the async ORM count"""
+        with self.assertRaises(QueryBudgetExceeded) as raised:
+            await self.async_client.get("/async/")
+
+        self.assertIn("queries 3 > 2", str(raised.exception))
+
+    @override_settings(QUERY_BUDGET_RAISE=False)
+    def test_breach_logged(self):
+        """Test that without QUERY_BUDGET_RAISE a breach is only logged"""
+        with self.assertLogs("query_budget", level="WARNING") as logs:
+            response = self.client.get("/tight/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Budget exceeded for GET /tight/", logs.output[0])
+
+
+class QueryRecorderTestCase(TestCase):
+    def test_recording(self):
+        with recording() as recorder:
+            n_plus_one(3)
+
+        self.assertEqual(recorder.count, 3)
+        self.assertGreater(recorder.duration, 0)
+        self.assertEqual(len(recorder.top_shapes()), 1)
+
+    def test_nested(self):
+        with recording() as outer:
+            n_plus_one(1)
+            with recording() as inner:
+                n_plus_one(2)
+
+        self.assertEqual(inner.count, 2)
+        self.assertEqual(outer.count, 3)
+
+    def test_not_recording_outside_block(self):
+        with recording() as recorder:
+            pass
+        n_plus_one(1)
+
+        self.assertEqual(recorder.count, 0)
+
+    def test_normalize_sql(self):
+        self.assertEqual(
+            normalize_sql(
+                "SELECT * FROM t WHERE id IN (%s, %s,  %s) AND name = 'x' LIMIT 21"
+            ),
+            "SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?",
+        )
+
+    def test_budget_defaults(self):
+        self.assertEqual(
+            Budget(queries=5).with_defaults(Budget(queries=50, total_ms=100)),
+            Budget(queries=5, db_ms=None, total_ms=100),
+        )
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    MIDDLEWARE=MIDDLEWARE,
+    QUERY_BUDGET_DEFAULT={},
+    SLOW_QUERY_THRESHOLD_MS=0,
+    SLOW_QUERY_APPS=["query_budget"],
+    SLOW_QUERY_FLUSH_INTERVAL=0,
+)
+class SlowQuerySamplerTestCase(TestCase):
+    def setUp(self):
+        # Drop anything sampled while setting the test up
+        sampler.clear_samples()
+
+    def tearDown(self):
+        sampler.clear_samples()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        # Rolling the test data back is sampled too; drop those samples now
+        # that sampling is off again
+        sampler.clear_samples()
+
+    def test_samples_attributed(self):
+        """Test that samples carry the view and the calling frame"""
+        self.client.get("/roomy/")
+
+        samples = [s for s in sampler.get_samples() if "sso_user" in s["sql"]]
+        self.assertEqual(len(samples), 5)
+        self.assertEqual(samples[0]["view"], "query_budget.tests.roomy_view")
+        self.assertRegex(
+            samples[0]["location"], r"query_budget/tests\.py:\d+ in n_plus_one"
+        )
+
+    def test_aggregate(self):
+        self.client.get("/roomy/")
+
+        offenders = sampler.aggregate(sampler.get_samples())
+        offender = next(o for o in offenders if "sso_user" in o["sql"])
+        self.assertEqual(offender["count"], 5)
+        self.assertEqual(offender["views"], ["query_budget.tests.roomy_view"])
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=None)
+    def test_disabled(self):
+        self.client.get("/roomy/")
+
+        self.assertEqual(sampler.get_samples(), [])
+
+    @override_settings(SLOW_QUERY_BUFFER_SIZE=3)
+    def test_buffer_bounded(self):
+        self.client.get("/roomy/")
+
+        self.assertEqual(len(sampler.get_samples()), 3)
+
+    def test_flush_not_sampled(self):
+        """Test that the flush's own cache queries aren't queued"""
+        sampler.sample("SELECT 1", 0.3)
+        sampler.flush()
+
+        sampler.flush()
+        self.assertEqual(len(sampler.get_samples()), 1)
+
+    def test_flushed_after_response(self):
+        """Test that samples reach the buffer once the response is closed"""
+        with patch.object(sampler, "flush", wraps=sampler.flush) as flush:
+            response = self.client.get("/roomy/")
+
+        flush.assert_called_once()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(sampler.get_samples())
+
+    @override_settings(SLOW_QUERY_FLUSH_INTERVAL=3600)
+    def test_flush_interval(self):
+        """Test that a process doesn't rewrite the buffer on every request"""
+        with patch.object(sampler, "_last_flush", -math.inf):
+            self.client.get("/roomy/")
+            flushed = len(sampler.get_samples())
+            self.client.get("/roomy/")
+
+        self.assertGreater(flushed, 0)
+        self.assertEqual(len(sampler.get_samples()), flushed)
+
+    def test_flush_dropped_when_off(self):
+        """Test that samples queued before sampling was turned off aren't saved"""
+        sampler.sample("SELECT 1", 0.3)
+
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=None):
+            sampler.flush()
+
+        sampler.flush()
+        self.assertEqual(sampler.get_samples(), [])
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=None)
+    def test_off_not_queued(self):
+        """Test that nothing is queued, or flushed at exit, with sampling off"""
+        with patch.object(sampler, "_flush_at_exit", False), patch(
+            "atexit.register"
+        ) as register:
+            sampler.sample("SELECT 1", 0.3)
+
+        register.assert_not_called()
+        with override_settings(SLOW_QUERY_THRESHOLD_MS=0):
+            sampler.flush()
+            self.assertEqual(sampler.get_samples(), [])
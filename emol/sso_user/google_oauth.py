@@ -1,10 +1,11 @@
 import logging
 import os
+import time
 from typing import Any, Dict, cast
 
-from authlib.integrations.django_client import OAuth
 from django.http import HttpResponseRedirect
 from django.urls import reverse
+from sso_user.oidc import load_metadata
 
 logger = logging.getLogger("cards")
 
@@ -62,21 +63,45 @@ class GoogleOAuth:
 
     In development (EMOL_DEV=1), uses MockOAuthClient.
     In production, uses real Google OAuth.
+
+    Build one and reuse it (see sso_user.views.get_oauth), and get the
+    client through client() so the OIDC discovery metadata and JWKS come
+    from the shared cache (see sso_user.oidc) instead of being fetched by
+    authlib on each login.
     """
 
     # Configuration URL for Google OpenID Connect
     CONF_URL = "https://accounts.google.com/.well-known/openid-configuration"
 
     def __init__(self) -> None:
-        self.oauth = OAuth()
+        self.metadata_expires = 0.0
 
         if os.getenv("EMOL_DEV") == "1":
             logger.debug("Using MockOAuthClient for development")
+            self.oauth = None
             self.google = MockOAuthClient()
         else:
             logger.debug("Using production Google OAuth")
+            # pylint: disable=import-outside-toplevel
+            from authlib.integrations.django_client import OAuth
+
+            self.oauth = OAuth()
             self.google = self.oauth.register(
                 name="google",
                 server_metadata_url=self.CONF_URL,
                 client_kwargs={"scope": "openid email profile"},
             )
+
+    def refresh_metadata(self) -> None:
+        """Load OIDC metadata and JWKS from the cache once ours expire"""
+        if self.oauth is None or time.time() < self.metadata_expires:
+            return
+
+        metadata, self.metadata_expires = load_metadata(self.CONF_URL)
+        # _loaded_at stops authlib fetching the discovery document itself
+        self.google.server_metadata.update(metadata, _loaded_at=time.time())
+
+    def client(self) -> Any:
+        """The Google client, with current OIDC metadata"""
+        self.refresh_metadata()
+        return self.google
@@ -0,0 +1,100 @@
+"""Cached OpenID Connect discovery metadata and JWKS.
+
+The discovery document and the key set it points to change rarely and are
+served with HTTP cache headers. We keep each in the Django cache for as long
+as those headers allow, so processes share one copy and a login doesn't pay
+for the fetches.
+
+Settings:
+    OIDC_METADATA_DEFAULT_TTL: Seconds to keep a document that has no cache
+        headers
+    OIDC_METADATA_MAX_TTL: Upper bound on how long any document is kept
+"""
+
+import hashlib
+import logging
+import re
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger("cards")
+
+CACHE_KEY = "oidc_document:{digest}"
+FETCH_TIMEOUT = 10
+
+MAX_AGE = re.compile(r"(?:^|,)\s*(?:s-maxage|max-age)\s*=\s*\"?(\d+)", re.IGNORECASE)
+NO_CACHE = re.compile(r"(?:^|,)\s*(?:no-store|no-cache)\b", re.IGNORECASE)
+
+
+def cache_lifetime(headers, now=None):
+    """Seconds a response may be reused, from its cache headers
+
+    Cache-Control max-age (less Age) wins over Expires. no-store and no-cache
+    give 0.
+
+    Returns:
+        The lifetime in seconds, or None if the headers don't say
+    """
+    cache_control = headers.get("Cache-Control", "")
+    if NO_CACHE.search(cache_control):
+        return 0
+
+    match = MAX_AGE.search(cache_control)
+    if match:
+        try:
+            age = int(headers.get("Age", 0))
+        except ValueError:
+            age = 0
+        return max(int(match.group(1)) - age, 0)
+
+    if headers.get("Expires"):
+        try:
+            expires = parsedate_to_datetime(headers["Expires"]).timestamp()
+        except (TypeError, ValueError):
+            # An invalid Expires means already expired
+            return 0
+        return max(int(expires - (now or time.time())), 0)
+
+    return None
+
+
+def fetch_document(url):
+    """Get a JSON document, from the cache if it is still fresh
+
+    Returns:
+        (document, expires_at)
+    """
+    key = CACHE_KEY.format(digest=hashlib.sha256(url.encode()).hexdigest())
+    cached = cache.get(key)
+    if cached is not None and cached[1] > time.time():
+        return cached
+
+    response = requests.get(url, timeout=FETCH_TIMEOUT)
+    response.raise_for_status()
+    document = response.json()
+
+    lifetime = cache_lifetime(response.headers)
+    if lifetime is None:
+        lifetime = getattr(settings, "OIDC_METADATA_DEFAULT_TTL", 60 * 60)
+    lifetime = min(lifetime, getattr(settings, "OIDC_METADATA_MAX_TTL", 60 * 60 * 24))
+    logger.debug("Fetched %s, fresh for %s seconds", url, lifetime)
+
+    expires_at = time.time() + lifetime
+    if lifetime > 0:
+        cache.set(key, (document, expires_at), lifetime)
+    return document, expires_at
+
+
+def load_metadata(discovery_url):
+    """Discovery metadata with the JWKS it points to under "jwks"
+
+    Returns:
+        (metadata, expires_at), expiring when the first of the two does
+    """
+    metadata, metadata_expires = fetch_document(discovery_url)
+    jwks, jwks_expires = fetch_document(metadata["jwks_uri"])
+    return {**metadata, "jwks": jwks}, min(metadata_expires, jwks_expires)
@@ -1,9 +1,14 @@
 """Tests for sso_user app."""
 
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from io import StringIO
 from unittest.mock import patch
 
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from django.core.management import call_command
 from django.http import HttpResponse
 from django.test import Client, RequestFactory, TestCase, override_settings
@@ -11,6 +16,7 @@ from django.urls import reverse
 from sso_user.decorators import admin_required, login_required
 from sso_user.google_oauth import GoogleOAuth
 from sso_user.models import SSOUser
+from sso_user.oidc import cache_lifetime
 
 
 class SSOUserModelTest(TestCase):
@@ -49,6 +55,120 @@ class GoogleOAuthTest(TestCase):
         self.assertIn("profile", oauth.google.client_kwargs["scope"])
 
 
+class MetadataServer:
+    """A local stand-in for an OIDC provider's discovery and JWKS endpoints"""
+
+    def __init__(self, cache_control="max-age=3600"):
+        self.hits = {"/discovery": 0, "/jwks": 0}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # noqa: N802
+                server.hits[self.path] += 1
+                if self.path == "/discovery":
+                    body = {
+                        "issuer": server.url,
+                        "authorization_endpoint": f"{server.url}/auth",
+                        "token_endpoint": f"{server.url}/token",
+                        "jwks_uri": f"{server.url}/jwks",
+                    }
+                else:
+                    body = {"keys": [{"kty": "RSA", "kid": "test"}]}
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Cache-Control", cache_control)
+                self.end_headers()
+                self.wfile.write(json.dumps(body).encode())
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+GOOGLE_DOCUMENTS = {
+    GoogleOAuth.CONF_URL: {
+        "issuer": "https://accounts.google.com",
+        "authorization_endpoint": "https://accounts.google.com/o/oauth2/v2/auth",
+        "token_endpoint": "https://oauth2.googleapis.com/token",
+        "userinfo_endpoint": "https://openidconnect.googleapis.com/v1/userinfo",
+        "jwks_uri": "https://www.googleapis.com/oauth2/v3/certs",
+    },
+    "https://www.googleapis.com/oauth2/v3/certs": {
+        "keys": [{"kty": "RSA", "kid": "test"}]
+    },
+}
+
+
+def local_google_metadata(test):
+    """Serve Google's discovery metadata and JWKS locally instead of fetching"""
+
+    def fetch_document(url):
+        return GOOGLE_DOCUMENTS[url], time.time() + 3600
+
+    return patch("sso_user.oidc.fetch_document", fetch_document)(test)
+
+
+@patch.dict("os.environ", {"EMOL_DEV": ""})
+class OIDCMetadataCacheTest(TestCase):
+    """Discovery metadata and JWKS come from a shared cache."""
+
+    def setUp(self):
+        cache.clear()
+
+    def oauth(self, server):
+        with patch.object(GoogleOAuth, "CONF_URL", f"{server.url}/discovery"):
+            oauth = GoogleOAuth()
+            oauth.client()
+        return oauth
+
+    def test_metadata_cached_across_clients(self):
+        server = MetadataServer()
+        self.addCleanup(server.stop)
+
+        oauth = self.oauth(server)
+        metadata = oauth.google.server_metadata
+        self.assertEqual(metadata["token_endpoint"], f"{server.url}/token")
+        self.assertEqual(metadata["jwks"]["keys"][0]["kid"], "test")
+        self.assertEqual(oauth.google.load_server_metadata(), metadata)
+
+        # Another client, as in another worker, uses the shared cache
+        oauth.client()
+        self.oauth(server)
+        self.assertEqual(server.hits, {"/discovery": 1, "/jwks": 1})
+
+    def test_uncacheable_metadata_refetched(self):
+        server = MetadataServer(cache_control="no-store")
+        self.addCleanup(server.stop)
+
+        oauth = self.oauth(server)
+        with patch.object(GoogleOAuth, "CONF_URL", f"{server.url}/discovery"):
+            oauth.client()
+        self.assertEqual(server.hits, {"/discovery": 2, "/jwks": 2})
+
+    def test_cache_lifetime(self):
+        self.assertEqual(cache_lifetime({"Cache-Control": "public, max-age=600"}), 600)
+        self.assertEqual(
+            cache_lifetime({"Cache-Control": "max-age=600", "Age": "100"}), 500
+        )
+        self.assertEqual(cache_lifetime({"Cache-Control": "no-cache"}), 0)
+        self.assertEqual(
+            cache_lifetime(
+                {"Expires": "Thu, 01 Jan 2026 00:10:00 GMT"}, now=1767225600
+            ),
+            600,
+        )
+        self.assertEqual(cache_lifetime({"Expires": "0"}), 0)
+        self.assertIsNone(cache_lifetime({}))
+
+
+@local_google_metadata
 class OAuthViewsTest(TestCase):
     def setUp(self):
         self.client = Client()
@@ -71,6 +191,7 @@ class OAuthViewsTest(TestCase):
         self.assertEqual(response.url, "/")
 
 
+@local_google_metadata
 class AdminOAuthViewTest(TestCase):
     """Tests for admin OAuth views."""
 
@@ -1,5 +1,6 @@
 import logging
 import os
+from functools import lru_cache
 
 from django.conf import settings
 from django.contrib import messages
@@ -16,20 +17,23 @@ ADMIN_OAUTH_LOGIN_HINT = "admin-oauth-login-hint"
 
 logger = logging.getLogger("cards")
 
-oauth = GoogleOAuth()
+
+@lru_cache(maxsize=1)
+def get_oauth() -> GoogleOAuth:
+    """The shared OAuth client, created on first use"""
+    return GoogleOAuth()
 
 
 @never_cache
 def oauth_login(request: HttpRequest) -> HttpResponse:
     """Start OAuth flow."""
     redirect_uri = request.build_absolute_uri(reverse("oauth_callback"))
-    return oauth.google.authorize_redirect(request, redirect_uri)
+    return get_oauth().client().authorize_redirect(request, redirect_uri)
 
 
 @never_cache
 def oauth_callback(request):
-    oauth_client = GoogleOAuth()
-    token = oauth_client.google.authorize_access_token(request)
+    token = get_oauth().client().authorize_access_token(request)
 
     userinfo = token.get("userinfo")
     print(userinfo)
@@ -57,13 +61,13 @@ def oauth_logout(request: HttpRequest) -> HttpResponse:
 
 @never_cache
 def admin_oauth(request):
-    oauth_client = GoogleOAuth()
+    google = get_oauth().client()
 
     if all(key not in request.GET for key in ("code", "oauth_token")):
         redirect_uri = request.build_absolute_uri(reverse("admin_oauth"))
-        return oauth_client.google.authorize_redirect(request, redirect_uri)
+        return google.authorize_redirect(request, redirect_uri)
 
-    token = oauth_client.google.authorize_access_token(request)
+    token = google.authorize_access_token(request)
 
     userinfo = token.get("userinfo")
     if userinfo is None:
@@ -93,14 +97,15 @@ def admin_oauth(request):
 class GoogleLoginView(View):
     def get(self, request: HttpRequest, *args: list, **kwargs: dict) -> HttpResponse:
         redirect_uri = request.build_absolute_uri(reverse("google_auth"))
-        return oauth.google.authorize_redirect(request, redirect_uri)
+        return get_oauth().client().authorize_redirect(request, redirect_uri)
 
 
 class GoogleAuthorize(View):
     def get(self, request: HttpRequest, *args: list, **kwargs: dict) -> HttpResponse:
-        token = oauth.google.fetch_token(request)
+        google = get_oauth().client()
+        token = google.fetch_token(request)
         request.session["google_token"] = token
-        user_info = oauth.google.userinfo(token)
+        user_info = google.userinfo(token)
         request.session["user_info"] = user_info
         assert settings.LOGIN_REDIRECT_URL is not None
         return redirect(settings.LOGIN_REDIRECT_URL)
@@ -119,7 +124,7 @@ def mock_oauth_callback(request: HttpRequest) -> HttpResponse:
         return HttpResponse("Mock OAuth only available in development", status=400)
 
     # Get mock token with userinfo
-    token = oauth.google.authorize_access_token(request)
+    token = get_oauth().client().authorize_access_token(request)
     userinfo = token["userinfo"]
 
     # Get or create user
@@ -53,6 +53,7 @@ SHELL=/bin/bash
 PATH=/usr/local/bin:/usr/bin:/bin
 0 3 * * * root cd /opt/emol/emol && ${POETRY_BIN} run python manage.py send_reminders >> /var/log/emol/cron.log 2>&1
 0 4 * * * root cd /opt/emol/emol && ${POETRY_BIN} run python manage.py clean_expired >> /var/log/emol/cron.log 2>&1
+*/15 * * * * root cd /opt/emol/emol && ${POETRY_BIN} run python manage.py send_privacy_emails >> /var/log/emol/cron.log 2>&1
 EOF
 chmod 644 /etc/cron.d/emol
 touch /var/log/emol/cron.log
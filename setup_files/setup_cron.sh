@@ -3,6 +3,7 @@
 # Define the crontab entries
 entry1="0 3 * * * ubuntu /opt/emol/.venv/bin/python /opt/emol/emol/manage.py send_reminders"
 entry2="0 4 * * * ubuntu /opt/emol/.venv/bin/python /opt/emol/emol/manage.py clean_expired"
+entry3="*/15 * * * * ubuntu /opt/emol/.venv/bin/python /opt/emol/emol/manage.py send_privacy_emails"
 
 # Function to check if a crontab entry exists
 cron_entry_exists() {
@@ -22,4 +23,11 @@ if ! cron_entry_exists "$entry2"; then
     echo "Added crontab entry: $entry2"
 else
     echo "Crontab entry already exists: $entry2"
-fi
\ No newline at end of file
+fi
+
+if ! cron_entry_exists "$entry3"; then
+    (crontab -l 2>/dev/null; echo "$entry3") | crontab -
+    echo "Added crontab entry: $entry3"
+else
+    echo "Crontab entry already exists: $entry3"
+fi